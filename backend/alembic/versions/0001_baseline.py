@@ -0,0 +1,78 @@
+"""Baseline: the schema init_db created with create_all before any of the later features
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2026-10-17 00:00:00
+
+Only the users, appointments, notifications and prompt history tables. The tables and constraints
+added since then have migrations of their own, which skip what a create_all database already has.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "0001_baseline"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+# Enum columns store the member names
+user_role = sa.Enum("PATIENT", "DOCTOR", name="userrole")
+appointment_status = sa.Enum("SCHEDULED", "CANCELLED", "COMPLETED", name="appointmentstatus")
+
+
+def upgrade():
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("full_name", sa.String(), nullable=True),
+        sa.Column("email", sa.String(), nullable=False),
+        sa.Column("hashed_password", sa.String(), nullable=False),
+        sa.Column("role", user_role, nullable=False),
+        sa.Column("is_active", sa.Boolean(), nullable=True),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_full_name", "users", ["full_name"])
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    op.create_table(
+        "appointments",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("patient_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("doctor_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("start_time", sa.DateTime(), nullable=False),
+        sa.Column("end_time", sa.DateTime(), nullable=False),
+        sa.Column("status", appointment_status, nullable=False),
+        sa.Column("notes", sa.String(), nullable=True),
+    )
+    op.create_index("ix_appointments_id", "appointments", ["id"])
+
+    op.create_table(
+        "notifications",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("message", sa.Text(), nullable=False),
+        sa.Column("is_read", sa.Boolean(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    )
+    op.create_index("ix_notifications_id", "notifications", ["id"])
+    op.create_index("ix_notifications_user_id", "notifications", ["user_id"])
+
+    op.create_table(
+        "prompt_history",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("prompt_text", sa.Text(), nullable=False),
+        sa.Column("response_text", sa.Text(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    )
+    op.create_index("ix_prompt_history_id", "prompt_history", ["id"])
+    op.create_index("ix_prompt_history_user_id", "prompt_history", ["user_id"])
+
+
+def downgrade():
+    for table in ("prompt_history", "notifications", "appointments", "users"):
+        op.drop_table(table)
+    if op.get_bind().dialect.name == "postgresql":
+        for enum_type in (appointment_status, user_role):
+            enum_type.drop(op.get_bind(), checkfirst=True)
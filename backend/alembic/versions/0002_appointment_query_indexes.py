@@ -0,0 +1,39 @@
+"""Composite indexes for the hot appointment queries
+
+Revision ID: 0002_appointment_query_indexes
+Revises: 0001_baseline
+Create Date: 2026-10-17 00:00:01
+
+Every appointment query filters on a doctor, a patient or a status together with a start_time
+range: a doctor's day, a patient's clashes, the scheduled appointments of all doctors in a range.
+Without these, each of them scanned the whole table.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "0002_appointment_query_indexes"
+down_revision = "0001_baseline"
+branch_labels = None
+depends_on = None
+
+INDEXES = {
+    "ix_appointments_doctor_id_start_time": ["doctor_id", "start_time"],
+    "ix_appointments_patient_id_start_time": ["patient_id", "start_time"],
+    "ix_appointments_status_start_time": ["status", "start_time"],
+}
+
+
+def upgrade():
+    # Databases brought up to the baseline by init_db's create_all may have them already
+    existing = set()
+    if not op.get_context().as_sql:
+        existing = {index["name"] for index in sa.inspect(op.get_bind()).get_indexes("appointments")}
+    for name, columns in INDEXES.items():
+        if name not in existing:
+            op.create_index(name, "appointments", columns)
+
+
+def downgrade():
+    for name in INDEXES:
+        op.drop_index(name, table_name="appointments")
@@ -0,0 +1,45 @@
+"""Conversation messages and contexts of the SQL conversation backend
+
+Revision ID: 0003_conversation_tables
+Revises: 0002_appointment_query_indexes
+Create Date: 2026-10-17 00:00:02
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "0003_conversation_tables"
+down_revision = "0002_appointment_query_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Databases created by init_db's create_all before migrations may have them already
+    existing = set()
+    if not op.get_context().as_sql:
+        existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if "conversation_messages" not in existing:
+        op.create_table(
+            "conversation_messages",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+            sa.Column("role", sa.String(20), nullable=False),
+            sa.Column("payload", sa.Text(), nullable=False),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        )
+        op.create_index("ix_conversation_messages_user_id_id", "conversation_messages", ["user_id", "id"])
+
+    if "conversation_contexts" not in existing:
+        op.create_table(
+            "conversation_contexts",
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), primary_key=True),
+            sa.Column("context", sa.Text(), nullable=False),
+            sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        )
+
+
+def downgrade():
+    op.drop_table("conversation_contexts")
+    op.drop_table("conversation_messages")
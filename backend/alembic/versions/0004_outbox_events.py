@@ -0,0 +1,52 @@
+"""Transactional outbox for the calendar events and confirmation emails of bookings
+
+Revision ID: 0004_outbox_events
+Revises: 0003_conversation_tables
+Create Date: 2026-10-17 00:00:03
+
+The table as the outbox first shipped, for single appointments; 0007_appointment_series adds the
+series_id column.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "0004_outbox_events"
+down_revision = "0003_conversation_tables"
+branch_labels = None
+depends_on = None
+
+# Enum columns store the member names
+outbox_event_type = sa.Enum("CALENDAR_EVENT", "CONFIRMATION_EMAIL", name="outboxeventtype")
+outbox_status = sa.Enum("PENDING", "PROCESSING", "DONE", "DEAD", name="outboxstatus")
+
+
+def upgrade():
+    # Databases created by init_db's create_all before migrations may have it already
+    if not op.get_context().as_sql and sa.inspect(op.get_bind()).has_table("outbox_events"):
+        return
+
+    op.create_table(
+        "outbox_events",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("appointment_id", sa.Integer(), sa.ForeignKey("appointments.id"), nullable=False),
+        sa.Column("event_type", outbox_event_type, nullable=False),
+        sa.Column("payload", sa.Text(), nullable=False),
+        sa.Column("status", outbox_status, nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("next_attempt_at", sa.DateTime(), nullable=False),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("result", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    )
+    op.create_index("ix_outbox_events_id", "outbox_events", ["id"])
+    op.create_index("ix_outbox_events_appointment_id", "outbox_events", ["appointment_id"])
+    op.create_index("ix_outbox_events_status_next_attempt_at", "outbox_events", ["status", "next_attempt_at"])
+
+
+def downgrade():
+    op.drop_table("outbox_events")
+    if op.get_bind().dialect.name == "postgresql":
+        for enum_type in (outbox_status, outbox_event_type):
+            enum_type.drop(op.get_bind(), checkfirst=True)
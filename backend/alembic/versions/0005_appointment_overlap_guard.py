@@ -0,0 +1,103 @@
+"""Reject overlapping scheduled appointments of a doctor or a patient in the database
+
+Revision ID: 0005_appointment_overlap_guard
+Revises: 0004_outbox_events
+Create Date: 2026-10-17 00:00:04
+
+PostgreSQL gets two exclusion constraints, SQLite two triggers that abort the same inserts and
+updates; the DDL is the model's, which skips what already exists. create_all only added it when it
+created the appointments table, so a database whose appointments table predates it gets it here.
+Such a database may already hold overlapping scheduled appointments, which the constraints would
+reject, so of each overlapping group the earliest booking is kept and the later ones are cancelled.
+"""
+import logging
+from typing import Dict, List, Tuple
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.models.appointment import OVERLAP_GUARD_DDL, OVERLAP_GUARD_DROP_DDL
+
+# revision identifiers, used by Alembic.
+revision = "0005_appointment_overlap_guard"
+down_revision = "0004_outbox_events"
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+appointments = sa.table(
+    "appointments",
+    sa.column("id", sa.Integer), sa.column("doctor_id", sa.Integer), sa.column("patient_id", sa.Integer),
+    sa.column("start_time", sa.DateTime), sa.column("end_time", sa.DateTime), sa.column("status", sa.String),
+)
+
+
+def overlapping_appointments(column: str):
+    """Scheduled appointments that overlap another scheduled appointment with the same value of column."""
+    a, b = appointments.alias("a"), appointments.alias("b")
+    return (
+        sa.select(a.c.id, a.c.doctor_id, a.c.patient_id, a.c.start_time, a.c.end_time).distinct()
+        .join_from(a, b, sa.and_(b.c[column] == a.c[column], b.c.id != a.c.id))
+        .where(a.c.status == "SCHEDULED", b.c.status == "SCHEDULED",
+               a.c.start_time < b.c.end_time, a.c.end_time > b.c.start_time)
+    )
+
+
+# Offline there is nothing to read, so any scheduled appointment that overlaps an earlier booking is cancelled
+CANCEL_LATER_OVERLAPS = """
+    UPDATE appointments SET status = 'CANCELLED'
+    WHERE status = 'SCHEDULED' AND EXISTS (
+        SELECT 1 FROM appointments earlier
+        WHERE earlier.status = 'SCHEDULED' AND earlier.id < appointments.id
+        AND (earlier.doctor_id = appointments.doctor_id OR earlier.patient_id = appointments.patient_id)
+        AND earlier.start_time < appointments.end_time AND earlier.end_time > appointments.start_time
+    )
+"""
+
+
+def later_overlaps(rows) -> List[int]:
+    """
+    Goes through overlapping appointments in booking order and returns the IDs of those that
+    overlap an earlier kept appointment of their doctor or patient.
+    """
+    kept: Dict[Tuple[str, int], List[tuple]] = {}
+    cancelled = []
+    for appointment_id, doctor_id, patient_id, start_time, end_time in sorted(rows):
+        owners = [("doctor", doctor_id), ("patient", patient_id)]
+        if any(start_time < other_end and end_time > other_start
+               for owner in owners for other_start, other_end in kept.get(owner, [])):
+            cancelled.append(appointment_id)
+            continue
+        for owner in owners:
+            kept.setdefault(owner, []).append((start_time, end_time))
+    return cancelled
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect not in OVERLAP_GUARD_DDL:
+        return
+
+    if op.get_context().as_sql:
+        op.execute(CANCEL_LATER_OVERLAPS)
+    else:
+        connection = op.get_bind()
+        rows = set()
+        for column in ("doctor_id", "patient_id"):
+            rows.update(tuple(row) for row in connection.execute(overlapping_appointments(column)))
+        cancelled = later_overlaps(rows)
+        if cancelled:
+            logger.warning(
+                f"Cancelling {len(cancelled)} scheduled appointment(s) that overlap an earlier booking "
+                f"of the same doctor or patient: {', '.join(map(str, cancelled))}"
+            )
+            connection.execute(appointments.update().where(appointments.c.id.in_(cancelled)).values(status="CANCELLED"))
+
+    for statement in OVERLAP_GUARD_DDL[dialect]:
+        op.execute(statement)
+
+
+def downgrade():
+    for statement in OVERLAP_GUARD_DROP_DDL.get(op.get_bind().dialect.name, []):
+        op.execute(statement)
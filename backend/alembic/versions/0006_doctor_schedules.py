@@ -0,0 +1,68 @@
+"""Weekly working hours, breaks and date exceptions of doctors
+
+Revision ID: 0006_doctor_schedules
+Revises: 0005_appointment_overlap_guard
+Create Date: 2026-10-17 00:00:05
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "0006_doctor_schedules"
+down_revision = "0005_appointment_overlap_guard"
+branch_labels = None
+depends_on = None
+
+# Enum columns store the member names
+schedule_rule_kind = sa.Enum("WORKING", "BREAK", name="schedulerulekind")
+schedule_exception_kind = sa.Enum("UNAVAILABLE", "EXTRA_HOURS", name="scheduleexceptionkind")
+
+
+def upgrade():
+    # Databases created by init_db's create_all before migrations may have them already
+    existing = set()
+    if not op.get_context().as_sql:
+        existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if "doctor_schedules" not in existing:
+        op.create_table(
+            "doctor_schedules",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("doctor_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False, unique=True),
+            sa.Column("slot_minutes", sa.Integer(), nullable=False),
+            sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        )
+        op.create_index("ix_doctor_schedules_id", "doctor_schedules", ["id"])
+
+    if "schedule_rules" not in existing:
+        op.create_table(
+            "schedule_rules",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("schedule_id", sa.Integer(), sa.ForeignKey("doctor_schedules.id", ondelete="CASCADE"), nullable=False),
+            sa.Column("weekday", sa.Integer(), nullable=False),
+            sa.Column("kind", schedule_rule_kind, nullable=False),
+            sa.Column("start_time", sa.Time(), nullable=False),
+            sa.Column("end_time", sa.Time(), nullable=False),
+        )
+        op.create_index("ix_schedule_rules_schedule_id", "schedule_rules", ["schedule_id"])
+
+    if "schedule_exceptions" not in existing:
+        op.create_table(
+            "schedule_exceptions",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("schedule_id", sa.Integer(), sa.ForeignKey("doctor_schedules.id", ondelete="CASCADE"), nullable=False),
+            sa.Column("day", sa.Date(), nullable=False),
+            sa.Column("kind", schedule_exception_kind, nullable=False),
+            sa.Column("start_time", sa.Time(), nullable=True),
+            sa.Column("end_time", sa.Time(), nullable=True),
+            sa.Column("reason", sa.String(), nullable=True),
+        )
+        op.create_index("ix_schedule_exceptions_schedule_id_day", "schedule_exceptions", ["schedule_id", "day"])
+
+
+def downgrade():
+    for table in ("schedule_exceptions", "schedule_rules", "doctor_schedules"):
+        op.drop_table(table)
+    if op.get_bind().dialect.name == "postgresql":
+        for enum_type in (schedule_exception_kind, schedule_rule_kind):
+            enum_type.drop(op.get_bind(), checkfirst=True)
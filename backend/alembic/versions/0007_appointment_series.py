@@ -0,0 +1,111 @@
+"""Recurring appointment series, their per-occurrence exceptions and series outbox events
+
+Revision ID: 0007_appointment_series
+Revises: 0006_doctor_schedules
+Create Date: 2026-10-17 00:00:06
+
+A series books one outbox event for all of its occurrences, so outbox events get a series_id and
+their appointment_id becomes optional.
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "0007_appointment_series"
+down_revision = "0006_doctor_schedules"
+branch_labels = None
+depends_on = None
+
+# Enum columns store the member names
+recurrence_frequency = sa.Enum("DAILY", "WEEKLY", name="recurrencefrequency")
+series_exception_kind = sa.Enum("CANCELLED", "RESCHEDULED", name="seriesexceptionkind")
+
+
+def outbox_events_table() -> sa.Table:
+    """The outbox_events table as 0004_outbox_events created it."""
+    return sa.Table(
+        "outbox_events",
+        sa.MetaData(),
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("appointment_id", sa.Integer(), sa.ForeignKey("appointments.id"), nullable=False),
+        sa.Column("event_type", sa.Enum("CALENDAR_EVENT", "CONFIRMATION_EMAIL", name="outboxeventtype"), nullable=False),
+        sa.Column("payload", sa.Text(), nullable=False),
+        sa.Column("status", sa.Enum("PENDING", "PROCESSING", "DONE", "DEAD", name="outboxstatus"), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("next_attempt_at", sa.DateTime(), nullable=False),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("result", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Index("ix_outbox_events_id", "id"),
+        sa.Index("ix_outbox_events_appointment_id", "appointment_id"),
+        sa.Index("ix_outbox_events_status_next_attempt_at", "status", "next_attempt_at"),
+    )
+
+
+def upgrade():
+    # Databases created by init_db's create_all before migrations may have them already
+    existing = set()
+    outbox_columns = set()
+    if not op.get_context().as_sql:
+        inspector = sa.inspect(op.get_bind())
+        existing = set(inspector.get_table_names())
+        outbox_columns = {column["name"] for column in inspector.get_columns("outbox_events")}
+
+    if "appointment_series" not in existing:
+        op.create_table(
+            "appointment_series",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("patient_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+            sa.Column("doctor_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+            sa.Column("frequency", recurrence_frequency, nullable=False),
+            sa.Column("interval", sa.Integer(), nullable=False),
+            sa.Column("occurrences", sa.Integer(), nullable=False),
+            sa.Column("first_start", sa.DateTime(), nullable=False),
+            sa.Column("duration_minutes", sa.Integer(), nullable=False),
+            sa.Column("span_start", sa.DateTime(), nullable=False),
+            sa.Column("span_end", sa.DateTime(), nullable=False),
+            # The appointmentstatus type was created with the appointments table
+            sa.Column("status", postgresql.ENUM("SCHEDULED", "CANCELLED", "COMPLETED", name="appointmentstatus", create_type=False), nullable=False),
+            sa.Column("notes", sa.String(), nullable=True),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        )
+        op.create_index("ix_appointment_series_id", "appointment_series", ["id"])
+        op.create_index("ix_appointment_series_doctor_id_span_end", "appointment_series", ["doctor_id", "span_end"])
+        op.create_index("ix_appointment_series_patient_id_span_end", "appointment_series", ["patient_id", "span_end"])
+
+    if "appointment_series_exceptions" not in existing:
+        op.create_table(
+            "appointment_series_exceptions",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("series_id", sa.Integer(), sa.ForeignKey("appointment_series.id", ondelete="CASCADE"), nullable=False),
+            sa.Column("original_start", sa.DateTime(), nullable=False),
+            sa.Column("kind", series_exception_kind, nullable=False),
+            sa.Column("start_time", sa.DateTime(), nullable=True),
+            sa.Column("end_time", sa.DateTime(), nullable=True),
+            sa.UniqueConstraint("series_id", "original_start", name="uq_appointment_series_exceptions_occurrence"),
+        )
+
+    if "series_id" not in outbox_columns:
+        # Batch mode, since SQLite can only change a column's nullability by copying the table.
+        # Without a database to reflect it from, the table is copied as 0004_outbox_events made it
+        copy_from = outbox_events_table() if op.get_context().as_sql else None
+        with op.batch_alter_table("outbox_events", copy_from=copy_from) as batch_op:
+            batch_op.add_column(sa.Column("series_id", sa.Integer(), nullable=True))
+            batch_op.create_foreign_key("fk_outbox_events_series_id", "appointment_series", ["series_id"], ["id"])
+            batch_op.alter_column("appointment_id", existing_type=sa.Integer(), nullable=True)
+        op.create_index("ix_outbox_events_series_id", "outbox_events", ["series_id"])
+
+
+def downgrade():
+    op.drop_index("ix_outbox_events_series_id", table_name="outbox_events")
+    # Dropping the column drops its foreign key too, whatever the key was named
+    with op.batch_alter_table("outbox_events") as batch_op:
+        batch_op.drop_column("series_id")
+        batch_op.alter_column("appointment_id", existing_type=sa.Integer(), nullable=False)
+    op.drop_table("appointment_series_exceptions")
+    op.drop_table("appointment_series")
+    if op.get_bind().dialect.name == "postgresql":
+        for enum_type in (series_exception_kind, recurrence_frequency):
+            enum_type.drop(op.get_bind(), checkfirst=True)
@@ -1,4 +1,8 @@
+import json
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List
 
@@ -8,12 +12,13 @@ from app.services import llm_service
 from app.models.user import User
 from app.services import auth_service
 from app.crud import crud_prompt_history
-from app.api.v1.auth import get_db
+from app.api.v1.auth import get_async_db, get_db
+from app.db.session import SessionLocal
 
 router = APIRouter()
 
 @router.post("/prompt", response_model=PromptResponse)
-def handle_agent_prompt(
+async def handle_agent_prompt(
     prompt_data: PromptCreate,
     db: Session = Depends(get_db),
     current_user: User = Depends(auth_service.get_current_user)
@@ -21,12 +26,15 @@ def handle_agent_prompt(
     """
     Receives a user prompt, passes it to the LLM agent,
     and saves the conversation to the history. Includes robust error handling.
+    The agent's tools and the history share the request's database session, except for read-only
+    tools that run concurrently, which take pooled sessions of their own.
     """
     try:
         # Step 1: Get the agent's response
-        result_dict = llm_service.process_prompt(
+        result_dict = await llm_service.process_prompt_async(
             prompt=prompt_data.prompt_text,
-            current_user=current_user
+            current_user=current_user,
+            db=db
         )
         
         if "error" in result_dict:
@@ -47,7 +55,8 @@ def handle_agent_prompt(
             prompt_text=prompt_data.prompt_text,
             response_text=final_response
         )
-        crud_prompt_history.create_prompt_history(
+        await run_in_threadpool(
+            crud_prompt_history.create_prompt_history,
             db=db,
             history_in=history_to_create,
             user_id=current_user.id
@@ -64,13 +73,45 @@ def handle_agent_prompt(
             detail=f"An unexpected error occurred in the AI agent: {str(e)}",
         )
 
-@router.get("/history", response_model=List[PromptHistory])
-def get_user_history(
-    db: Session = Depends(get_db),
+@router.post("/prompt/stream")
+def handle_agent_prompt_stream(
+    prompt_data: PromptCreate,
     current_user: User = Depends(auth_service.get_current_user)
+):
+    """
+    Streaming variant of /prompt that sends Server-Sent Events while the agent works:
+    a status event right away, tool progress events, the answer token by token, and a final
+    done (or error) event. The conversation is saved to the history once the answer is complete.
+    """
+    def event_stream():
+        # The stream outlives the request's dependencies, so it opens its own session, which the
+        # agent's tools and the history share
+        db = SessionLocal()
+        try:
+            for event, data in llm_service.stream_prompt(prompt=prompt_data.prompt_text, current_user=current_user, db=db):
+                if event == "done" and data.get("response"):
+                    crud_prompt_history.create_prompt_history(
+                        db=db,
+                        history_in=PromptHistoryCreate(prompt_text=prompt_data.prompt_text, response_text=data["response"]),
+                        user_id=current_user.id
+                    )
+                yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+        finally:
+            db.close()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/history", response_model=List[PromptHistory])
+async def get_user_history(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(auth_service.get_current_user_async)
 ):
     """
     Retrieve all past prompt/response conversations for the currently logged-in user.
     """
-    history = crud_prompt_history.get_prompt_history_by_user(db, user_id=current_user.id)
+    history = await crud_prompt_history.get_prompt_history_by_user_async(db, user_id=current_user.id)
     return history
@@ -0,0 +1,144 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+from typing import List
+from datetime import datetime
+
+from app.crud import crud_appointment, crud_series
+from app.core.config import settings
+from app.models.user import User, UserRole
+from app.schemas.appointment import AppointmentBulkCreate, AppointmentBulkResult
+from app.schemas.series import AppointmentSeries, AppointmentSeriesCreate, SeriesExceptionCreate, SeriesOccurrence
+from app.services.recurrence import expand_series
+from app.api.v1.auth import get_db
+from app.services import auth_service
+
+router = APIRouter()
+
+def get_own_series(series_id: int, db: Session, current_user: User):
+    """Returns a series the current user is the patient or the doctor of, or raises 404."""
+    db_series = crud_series.get_series(db, series_id)
+    if db_series is None or current_user.id not in (db_series.patient_id, db_series.doctor_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Appointment series not found")
+    return db_series
+
+@router.post("/bulk", response_model=AppointmentBulkResult)
+def create_appointments_bulk(
+    batch: AppointmentBulkCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(auth_service.get_current_user)
+):
+    """
+    Create many appointments in one transaction, e.g. when a front desk imports a week of bookings.
+    - A doctor can create appointments with themselves; a patient only for themselves.
+    - Conflicts are checked for the whole batch at once, against the schedule and within the batch.
+    - Returns a result per item: the new appointment ID, or the conflict or error that kept it out.
+      Items that fail do not stop the others.
+    """
+    if not batch.appointments:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="The batch has no appointments.")
+    if len(batch.appointments) > settings.BULK_APPOINTMENTS_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"A batch is limited to {settings.BULK_APPOINTMENTS_MAX_ITEMS} appointments."
+        )
+
+    owner_field = "doctor_id" if current_user.role == UserRole.DOCTOR else "patient_id"
+    forbidden = [index for index, appointment in enumerate(batch.appointments) if getattr(appointment, owner_field) != current_user.id]
+    if forbidden:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail={"message": f"Every appointment must have {owner_field} {current_user.id}.", "indexes": forbidden}
+        )
+
+    try:
+        results = crud_appointment.create_appointments_bulk(db, batch.appointments)
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"An unexpected error occurred: {e}"
+        )
+    created = sum(1 for result in results if result["success"])
+    return {"created": created, "failed": len(results) - created, "results": results}
+
+
+@router.post("/series", response_model=AppointmentSeries, status_code=status.HTTP_201_CREATED)
+def create_appointment_series(
+    series_in: AppointmentSeriesCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(auth_service.get_current_user)
+):
+    """
+    Book a recurring appointment, such as weekly physiotherapy, as a single series.
+    - A patient can book a series for themselves; a doctor, a series with themselves.
+    - The series ends after count occurrences or on until, whichever comes first.
+    - Returns 409 with the conflict details if any occurrence clashes with the doctor's or the patient's schedule.
+    """
+    owner_id = series_in.doctor_id if current_user.role == UserRole.DOCTOR else series_in.patient_id
+    if owner_id != current_user.id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="You can only book appointment series you take part in.")
+    errors = crud_series.series_errors(series_in, max_occurrences=settings.SERIES_MAX_OCCURRENCES)
+    if errors:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=errors)
+
+    try:
+        return crud_appointment.create_appointment_series(db, series_in)
+    except crud_appointment.AppointmentConflictError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=e.to_dict())
+
+@router.get("/series", response_model=List[AppointmentSeries])
+def read_appointment_series(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(auth_service.get_current_user)
+):
+    """
+    Retrieve the appointment series of the currently logged-in user.
+    """
+    return crud_series.get_series_by_user(db, user_id=current_user.id)
+
+@router.get("/series/{series_id}/occurrences", response_model=List[SeriesOccurrence])
+def read_series_occurrences(
+    series_id: int,
+    from_time: datetime = Query(..., alias="from"),
+    to_time: datetime = Query(..., alias="to"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(auth_service.get_current_user)
+):
+    """
+    Expand the occurrences of a series that overlap a time range, with cancelled ones left out
+    and rescheduled ones at their new times.
+    """
+    db_series = get_own_series(series_id, db, current_user)
+    return [occurrence._asdict() for occurrence in expand_series(db_series, from_time.replace(tzinfo=None), to_time.replace(tzinfo=None))]
+
+@router.post("/series/{series_id}/exceptions", response_model=AppointmentSeries)
+def update_series_occurrence(
+    series_id: int,
+    exception_in: SeriesExceptionCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(auth_service.get_current_user)
+):
+    """
+    Cancel or reschedule one occurrence of a series, identified by its original start time.
+    Returns 409 with the conflict details if the new time clashes.
+    """
+    db_series = get_own_series(series_id, db, current_user)
+    errors = crud_series.series_exception_errors(db_series, exception_in)
+    if errors:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=errors)
+    try:
+        return crud_appointment.update_series_occurrence(db, db_series, exception_in)
+    except crud_appointment.AppointmentConflictError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=e.to_dict())
+
+@router.delete("/series/{series_id}", response_model=AppointmentSeries)
+def cancel_appointment_series(
+    series_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(auth_service.get_current_user)
+):
+    """
+    Cancel every occurrence of a series.
+    """
+    db_series = get_own_series(series_id, db, current_user)
+    return crud_appointment.cancel_appointment_series(db, db_series)
@@ -5,7 +5,7 @@ from sqlalchemy.exc import IntegrityError
 
 from app.schemas.user import User, UserCreate
 from app.crud import crud_user
-from app.db.session import SessionLocal
+from app.db.session import AsyncSessionLocal, SessionLocal
 from app.services import auth_service
 
 router = APIRouter()
@@ -18,6 +18,11 @@ def get_db():
     finally:
         db.close()
 
+# Dependency to get an async DB session, for async endpoints
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
 @router.post("/register", response_model=User, status_code=status.HTTP_201_CREATED)
 def register_user(user: UserCreate, db: Session = Depends(get_db)):
     """
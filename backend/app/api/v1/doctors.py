@@ -1,12 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
+from datetime import date
 
 from app import crud
+from app.crud import crud_schedule
 from app.models.user import User, UserRole
 from app.schemas.appointment import Appointment, AppointmentUpdate
-from app.api.v1.auth import get_db
-from app.services import auth_service
+from app.schemas.schedule import DoctorSchedule, DoctorScheduleUpdate
+from app.api.v1.auth import get_async_db, get_db
+from app.core.config import settings
+from app.services import auth_service, availability_service
 
 router = APIRouter()
 
@@ -22,15 +27,79 @@ def require_doctor(current_user: User = Depends(auth_service.get_current_user)):
         )
     return current_user
 
-@router.get("/appointments", response_model=List[Appointment])
-def read_doctor_appointments(
+async def require_doctor_async(current_user: User = Depends(auth_service.get_current_user_async)):
+    """
+    Async version of require_doctor, for async endpoints.
+    """
+    if current_user.role != UserRole.DOCTOR:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="This action requires doctor privileges."
+        )
+    return current_user
+
+def availability_response(request: Request, db: Session, from_date: date, to_date: Optional[date], doctor_id: Optional[int] = None) -> Response:
+    """
+    Returns the run-length-encoded availability document for a date range with its ETag,
+    or 304 Not Modified when the client already has that version (If-None-Match).
+    """
+    to_date = to_date or from_date
+    if to_date < from_date:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="'to' must not be before 'from'.")
+    if (to_date - from_date).days >= settings.AVAILABILITY_MAX_RANGE_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Date ranges are limited to {settings.AVAILABILITY_MAX_RANGE_DAYS} days."
+        )
+
+    body, etag, doctor_count = availability_service.get_availability_document(db, from_date, to_date, doctor_id=doctor_id)
+    if doctor_id is not None and doctor_count == 0:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Doctor not found")
+
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    client_tags = [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]
+    if etag in client_tags or f"W/{etag}" in client_tags:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+@router.get("/availability")
+def read_clinic_availability(
+    request: Request,
+    from_date: date = Query(..., alias="from"),
+    to_date: Optional[date] = Query(None, alias="to"),
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_doctor)
+    current_user: User = Depends(auth_service.get_current_user)
+):
+    """
+    Free slots of every doctor over an inclusive date range, computed from a single range query.
+    Each doctor's days hold runs of back-to-back slots as ["HH:MM", count] with the doctor's slot_minutes.
+    Send the returned ETag in If-None-Match to get 304 Not Modified while nothing changed.
+    """
+    return availability_response(request, db, from_date, to_date)
+
+@router.get("/{doctor_id}/availability")
+def read_doctor_availability(
+    doctor_id: int,
+    request: Request,
+    from_date: date = Query(..., alias="from"),
+    to_date: Optional[date] = Query(None, alias="to"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(auth_service.get_current_user)
+):
+    """
+    Free slots of one doctor over an inclusive date range, in the same format as /doctors/availability.
+    """
+    return availability_response(request, db, from_date, to_date, doctor_id=doctor_id)
+
+@router.get("/appointments", response_model=List[Appointment])
+async def read_doctor_appointments(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(require_doctor_async)
 ):
     """
     Retrieve all appointments for the currently logged-in doctor.
     """
-    appointments = crud.crud_appointment.get_appointments_by_user(db, user_id=current_user.id)
+    appointments = await crud.crud_appointment.get_appointments_by_user_async(db, user_id=current_user.id)
     return appointments
 
 @router.patch("/appointments/{appointment_id}", response_model=Appointment)
@@ -52,4 +121,39 @@ def update_appointment_status(
     if db_appointment.doctor_id != current_user.id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="You are not authorized to update this appointment")
 
-    return crud.crud_appointment.update_appointment(db, appointment_id=appointment_id, appointment_update=appointment_update)
+    try:
+        return crud.crud_appointment.update_appointment(db, appointment_id=appointment_id, appointment_update=appointment_update)
+    except crud.crud_appointment.AppointmentConflictError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=e.to_dict())
+
+
+@router.get("/schedule", response_model=DoctorSchedule)
+def read_doctor_schedule(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_doctor)
+):
+    """
+    Retrieve the schedule template of the currently logged-in doctor.
+    """
+    schedule = crud_schedule.get_schedule(db, doctor_id=current_user.id)
+    if not schedule:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No schedule template set; the default 09:00-17:00 daily hours in 30-minute slots apply."
+        )
+    return schedule
+
+@router.put("/schedule", response_model=DoctorSchedule)
+def update_doctor_schedule(
+    schedule_in: DoctorScheduleUpdate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_doctor)
+):
+    """
+    Set the schedule template of the currently logged-in doctor: weekly working hours and breaks,
+    the slot length, and dated exceptions. Replaces any existing template.
+    """
+    errors = crud_schedule.schedule_errors(schedule_in)
+    if errors:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=errors)
+    return crud_schedule.set_schedule(db, doctor_id=current_user.id, schedule_in=schedule_in)
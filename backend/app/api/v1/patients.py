@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 from typing import List
@@ -6,7 +7,7 @@ from typing import List
 from app.crud import crud_appointment
 from app.models.user import User
 from app.schemas.appointment import Appointment, AppointmentCreate
-from app.api.v1.auth import get_db
+from app.api.v1.auth import get_async_db, get_db
 from app.services import auth_service
 
 router = APIRouter()
@@ -21,6 +22,7 @@ def create_new_appointment(
     Create a new appointment with enhanced error handling.
     - A logged-in user can only create an appointment for themselves.
     - Checks for invalid patient or doctor IDs.
+    - Returns 409 with the conflict details if the doctor or the patient is already booked at that time.
     """
     if appointment.patient_id != current_user.id:
         raise HTTPException(
@@ -30,6 +32,8 @@ def create_new_appointment(
     
     try:
         return crud_appointment.create_appointment(db=db, appointment=appointment)
+    except crud_appointment.AppointmentConflictError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=e.to_dict())
     except IntegrityError:
         db.rollback()
         raise HTTPException(
@@ -45,12 +49,12 @@ def create_new_appointment(
 
 
 @router.get("/appointments", response_model=List[Appointment])
-def read_user_appointments(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(auth_service.get_current_user)
+async def read_user_appointments(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(auth_service.get_current_user_async)
 ):
     """
     Retrieve all appointments for the currently logged-in user.
     """
-    appointments = crud_appointment.get_appointments_by_user(db, user_id=current_user.id)
+    appointments = await crud_appointment.get_appointments_by_user_async(db, user_id=current_user.id)
     return appointments
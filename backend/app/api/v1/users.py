@@ -6,7 +6,7 @@ from app.services import auth_service
 router = APIRouter()
 
 @router.get("/me", response_model=User)
-def read_users_me(current_user: UserModel = Depends(auth_service.get_current_user)):
+async def read_users_me(current_user: UserModel = Depends(auth_service.get_current_user_async)):
     """
     Get the details of the currently logged-in user.
     """
@@ -15,6 +15,16 @@ class Settings(BaseSettings):
 
     # Database settings
     DATABASE_URL: str = os.getenv("DATABASE_URL")
+    # URL of the async engine; by default DATABASE_URL with its async driver (asyncpg or aiosqlite)
+    ASYNC_DATABASE_URL: Optional[str] = os.getenv("ASYNC_DATABASE_URL")
+    # Connection pool of each engine: connections kept open, extra connections allowed under load,
+    # seconds to wait for a free connection, seconds before a connection is replaced (below the
+    # server's idle timeout), and whether connections are tested before use
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", 5))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", 10))
+    DB_POOL_TIMEOUT_SECONDS: float = float(os.getenv("DB_POOL_TIMEOUT_SECONDS", 30))
+    DB_POOL_RECYCLE_SECONDS: int = int(os.getenv("DB_POOL_RECYCLE_SECONDS", 1800))
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
 
     # JWT Authentication settings
     SECRET_KEY: str = os.getenv("SECRET_KEY")
@@ -23,11 +33,75 @@ class Settings(BaseSettings):
     
     # Groq API Key
     GROQ_API_KEY: Optional[str] = os.getenv("GROQ_API_KEY")
-    
+    # Optional override of the Groq API URL, e.g. a local stub server for benchmarks
+    GROQ_BASE_URL: Optional[str] = os.getenv("GROQ_BASE_URL")
+
+    # Agent settings
+    # Maximum number of read-only tool calls from one LLM turn that run at the same time
+    AGENT_TOOL_CONCURRENCY: int = int(os.getenv("AGENT_TOOL_CONCURRENCY", 4))
+    # Worker threads shared by the read-only tool calls of all turns in the process
+    AGENT_TOOL_WORKERS: int = int(os.getenv("AGENT_TOOL_WORKERS", 32))
+    # Maximum number of prompts the async agent endpoint processes at the same time
+    AGENT_MAX_CONCURRENT_PROMPTS: int = int(os.getenv("AGENT_MAX_CONCURRENT_PROMPTS", 32))
+    # Estimated prompt tokens per LLM request, and the length earlier tool results are shortened to
+    AGENT_CONTEXT_TOKEN_BUDGET: int = int(os.getenv("AGENT_CONTEXT_TOKEN_BUDGET", 6000))
+    AGENT_TOOL_RESULT_MAX_CHARS: int = int(os.getenv("AGENT_TOOL_RESULT_MAX_CHARS", 400))
+    # Completion cache for opening prompts: entries kept (0 disables it) and their lifetime in seconds
+    LLM_CACHE_MAX_ENTRIES: int = int(os.getenv("LLM_CACHE_MAX_ENTRIES", 512))
+    LLM_CACHE_TTL_SECONDS: int = int(os.getenv("LLM_CACHE_TTL_SECONDS", 300))
+    # Read-through caches for the read-only agent tools: entries per cache and their lifetime in seconds
+    TOOL_CACHE_MAX_ENTRIES: int = int(os.getenv("TOOL_CACHE_MAX_ENTRIES", 2048))
+    TOOL_CACHE_TTL_SECONDS: int = int(os.getenv("TOOL_CACHE_TTL_SECONDS", 300))
+    # Slot bitmap index: (doctor, day) bitmaps kept in memory and how long before one is reloaded,
+    # which bounds how long bookings made by other workers can go unseen
+    SLOT_INDEX_MAX_ENTRIES: int = int(os.getenv("SLOT_INDEX_MAX_ENTRIES", 50000))
+    SLOT_INDEX_TTL_SECONDS: int = int(os.getenv("SLOT_INDEX_TTL_SECONDS", 300))
+    # Availability REST endpoints: longest date range per request, and how many encoded responses are
+    # kept and for how long (bounds how long bookings made by other workers can go unseen)
+    AVAILABILITY_MAX_RANGE_DAYS: int = int(os.getenv("AVAILABILITY_MAX_RANGE_DAYS", 92))
+    AVAILABILITY_CACHE_MAX_ENTRIES: int = int(os.getenv("AVAILABILITY_CACHE_MAX_ENTRIES", 1024))
+    AVAILABILITY_CACHE_TTL_SECONDS: int = int(os.getenv("AVAILABILITY_CACHE_TTL_SECONDS", 30))
+    # Upper bound on the number of appointments in one POST /appointments/bulk request
+    BULK_APPOINTMENTS_MAX_ITEMS: int = int(os.getenv("BULK_APPOINTMENTS_MAX_ITEMS", 1000))
+    # Upper bound on the number of occurrences of a recurring appointment series
+    SERIES_MAX_OCCURRENCES: int = int(os.getenv("SERIES_MAX_OCCURRENCES", 104))
+    # Earliest-slot search: days read per window (doubling each window) and how far ahead to look at most
+    EARLIEST_SLOT_WINDOW_DAYS: int = int(os.getenv("EARLIEST_SLOT_WINDOW_DAYS", 2))
+    EARLIEST_SLOT_MAX_DAYS: int = int(os.getenv("EARLIEST_SLOT_MAX_DAYS", 60))
+    # Conversation memory backend: "memory" (per process) or "sql" (shared through the database)
+    CONVERSATION_BACKEND: str = os.getenv("CONVERSATION_BACKEND", "memory")
+    # Conversation memory limits: users kept (LRU), idle expiry in seconds, messages kept per user
+    CONVERSATION_MAX_USERS: int = int(os.getenv("CONVERSATION_MAX_USERS", 1000))
+    CONVERSATION_TTL_SECONDS: int = int(os.getenv("CONVERSATION_TTL_SECONDS", 3600))
+    CONVERSATION_MAX_MESSAGES: int = int(os.getenv("CONVERSATION_MAX_MESSAGES", 50))
+
+    # Optional override of the Google Calendar API root URL, e.g. a local fake server for tests and benchmarks
+    GOOGLE_CALENDAR_API_ENDPOINT: Optional[str] = os.getenv("GOOGLE_CALENDAR_API_ENDPOINT")
+
+    # Outbox worker for booking side effects (calendar events, emails)
+    OUTBOX_BATCH_SIZE: int = int(os.getenv("OUTBOX_BATCH_SIZE", 20))
+    OUTBOX_POLL_SECONDS: float = float(os.getenv("OUTBOX_POLL_SECONDS", 2))
+    OUTBOX_MAX_ATTEMPTS: int = int(os.getenv("OUTBOX_MAX_ATTEMPTS", 6))
+    OUTBOX_BACKOFF_SECONDS: int = int(os.getenv("OUTBOX_BACKOFF_SECONDS", 30))
+    OUTBOX_LEASE_SECONDS: int = int(os.getenv("OUTBOX_LEASE_SECONDS", 300))
+
     # Mailgun API Key
     MAILGUN_API_KEY: Optional[str] = os.getenv("MAILGUN_API_KEY")
     MAILGUN_DOMAIN: Optional[str] = os.getenv("MAILGUN_DOMAIN")
     FROM_EMAIL: Optional[str] = os.getenv("FROM_EMAIL")
+    # Mailgun API root; point it at a local stub for tests and benchmarks
+    MAILGUN_API_BASE_URL: str = os.getenv("MAILGUN_API_BASE_URL", "https://api.mailgun.net/v3")
+
+    # Email dispatcher: transport is "mailgun" or "smtp"
+    EMAIL_TRANSPORT: str = os.getenv("EMAIL_TRANSPORT", "mailgun")
+    EMAIL_CONNECT_TIMEOUT_SECONDS: float = float(os.getenv("EMAIL_CONNECT_TIMEOUT_SECONDS", 3))
+    EMAIL_READ_TIMEOUT_SECONDS: float = float(os.getenv("EMAIL_READ_TIMEOUT_SECONDS", 10))
+    EMAIL_MAX_RETRIES: int = int(os.getenv("EMAIL_MAX_RETRIES", 3))
+    EMAIL_POOL_SIZE: int = int(os.getenv("EMAIL_POOL_SIZE", 10))
+    # Mailgun accepts up to 1000 recipients per batch message
+    EMAIL_BATCH_SIZE: int = int(os.getenv("EMAIL_BATCH_SIZE", 1000))
+    SMTP_HOST: str = os.getenv("SMTP_HOST", "localhost")
+    SMTP_PORT: int = int(os.getenv("SMTP_PORT", 25))
 
 
     class Config:
@@ -1,32 +1,288 @@
-from sqlalchemy.orm import Session, joinedload
-from typing import List, Optional
+from bisect import bisect_left, insort
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload, selectinload
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 from datetime import datetime, date
-from sqlalchemy import and_
+from sqlalchemy import and_, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
 
-from app.models.appointment import Appointment
+from app.models.appointment import Appointment, AppointmentStatus, DOCTOR_OVERLAP_CONSTRAINT, PATIENT_OVERLAP_CONSTRAINT
+from app.models.series import AppointmentSeries, SeriesExceptionKind
 from app.schemas.appointment import AppointmentCreate, AppointmentUpdate
-from app.models.user import User
-from app.services.google_calendar_service import create_calendar_event 
+from app.schemas.series import AppointmentSeriesCreate, SeriesExceptionCreate
+from app.models.user import User, UserRole
+from app.crud import crud_outbox, crud_series
+from app.services.cache import notify_appointment_booked, notify_appointment_released
+from app.services.recurrence import expand_series, occurrence_count
+
+class AppointmentConflictError(Exception):
+    """
+    Raised when an appointment would overlap another scheduled appointment, or an occurrence of a
+    scheduled series, of the same doctor or patient.
+    """
+    def __init__(self, conflict_with: str, doctor_id: int, patient_id: int, start_time: datetime, end_time: datetime,
+                 conflicting_appointment_id: Optional[int] = None, conflicting_series_id: Optional[int] = None):
+        self.conflict_with = conflict_with
+        self.doctor_id = doctor_id
+        self.patient_id = patient_id
+        self.start_time = start_time
+        self.end_time = end_time
+        self.conflicting_appointment_id = conflicting_appointment_id
+        self.conflicting_series_id = conflicting_series_id
+        super().__init__(self.message)
+
+    @property
+    def message(self) -> str:
+        if self.conflict_with == "doctor":
+            return "The doctor already has an appointment at that time."
+        return "You already have another appointment scheduled at that time."
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "conflict_with": self.conflict_with,
+            "message": self.message,
+            "doctor_id": self.doctor_id,
+            "patient_id": self.patient_id,
+            "start_time": self.start_time.isoformat(),
+            "end_time": self.end_time.isoformat(),
+            "conflicting_appointment_id": self.conflicting_appointment_id,
+            "conflicting_series_id": self.conflicting_series_id,
+        }
+
+def lock_schedules(db: Session, user_ids: Iterable[int]):
+    """
+    Locks the user rows of the given doctors and patients until the transaction ends, so that bookings
+    touching the same schedules run one after another. Series occurrences are not covered by the
+    database's overlap constraints, so the checks against them are only atomic with the insert under
+    this lock. PostgreSQL locks the rows with SELECT ... FOR UPDATE (in id order, to avoid deadlocks);
+    SQLite ignores FOR UPDATE, so a no-op UPDATE of the rows takes its database write lock instead.
+    """
+    user_ids = sorted(set(user_ids))
+    if db.get_bind().dialect.name == "sqlite":
+        db.execute(
+            update(User).where(User.id.in_(user_ids)).values(id=User.id).execution_options(synchronize_session=False)
+        )
+    else:
+        db.execute(select(User.id).where(User.id.in_(user_ids)).order_by(User.id).with_for_update())
+
+def find_overlapping_appointment(db: Session, column, value: int, start_time: datetime, end_time: datetime,
+                                 exclude_id: Optional[int] = None) -> Optional[Appointment]:
+    """Finds a scheduled appointment where column == value that overlaps [start_time, end_time)."""
+    query = db.query(Appointment).filter(
+        column == value,
+        Appointment.status == AppointmentStatus.SCHEDULED,
+        Appointment.start_time < end_time,
+        Appointment.end_time > start_time
+    )
+    if exclude_id is not None:
+        query = query.filter(Appointment.id != exclude_id)
+    return query.first()
+
+def find_series_conflict(db: Session, doctor_id: Optional[int], patient_id: Optional[int], start_time: datetime, end_time: datetime,
+                         exclude_occurrence: Optional[Tuple[int, datetime]] = None) -> Optional[AppointmentConflictError]:
+    """
+    Checks [start_time, end_time) against the occurrences of the doctor's and the patient's scheduled
+    series. Series are not covered by the database's overlap constraints, so bookings check them here,
+    after lock_schedules.
+    exclude_occurrence is a (series_id, original_start) to ignore, e.g. the occurrence being moved.
+    """
+    start_time, end_time = start_time.replace(tzinfo=None), end_time.replace(tzinfo=None)
+    for series in crud_series.get_series_in_range(
+        db, start_time, end_time,
+        doctor_ids=[doctor_id] if doctor_id is not None else None,
+        patient_ids=[patient_id] if patient_id is not None else None
+    ):
+        for occurrence in expand_series(series, start_time, end_time):
+            if (series.id, occurrence.original_start) == exclude_occurrence:
+                continue
+            return AppointmentConflictError(
+                "doctor" if series.doctor_id == doctor_id else "patient", doctor_id, patient_id,
+                start_time, end_time, conflicting_series_id=series.id
+            )
+    return None
+
+def overlap_conflict(db: Session, error: IntegrityError, doctor_id: int, patient_id: int, start_time: datetime,
+                     end_time: datetime, exclude_id: Optional[int] = None) -> Optional[AppointmentConflictError]:
+    """
+    Maps an overlap violation raised by the database to a structured conflict, or returns None for
+    any other integrity error. Call it after rolling back the failed transaction.
+    """
+    error_text = str(error.orig)
+    if DOCTOR_OVERLAP_CONSTRAINT in error_text:
+        conflict_with, column, value = "doctor", Appointment.doctor_id, doctor_id
+    elif PATIENT_OVERLAP_CONSTRAINT in error_text:
+        conflict_with, column, value = "patient", Appointment.patient_id, patient_id
+    else:
+        return None
+    conflicting = find_overlapping_appointment(db, column, value, start_time, end_time, exclude_id=exclude_id)
+    return AppointmentConflictError(
+        conflict_with, doctor_id, patient_id, start_time, end_time,
+        conflicting_appointment_id=conflicting.id if conflicting else None
+    )
 
 def create_appointment(db: Session, appointment: AppointmentCreate) -> Appointment:
-    """Create a new appointment in the database and push to Google Calendar."""
+    """
+    Create a new appointment in the database. The Google Calendar event and the confirmation
+    email are queued in the outbox in the same transaction and sent later by the outbox worker.
+    The insert itself is the availability check: the database rejects overlaps for the doctor and
+    the patient, which is raised as AppointmentConflictError. Recurring series are checked before the
+    insert, with the doctor's and the patient's schedules locked.
+    """
+    lock_schedules(db, [appointment.doctor_id, appointment.patient_id])
+    series_conflict = find_series_conflict(db, appointment.doctor_id, appointment.patient_id, appointment.start_time, appointment.end_time)
+    if series_conflict is not None:
+        db.rollback()
+        raise series_conflict
     db_appointment = Appointment(**appointment.dict())
     db.add(db_appointment)
+    try:
+        db.flush()
+    except IntegrityError as e:
+        db.rollback()
+        conflict = overlap_conflict(
+            db, e, appointment.doctor_id, appointment.patient_id, appointment.start_time, appointment.end_time
+        )
+        if conflict is not None:
+            raise conflict from e
+        raise
+    crud_outbox.enqueue_booking_side_effects(db, [db_appointment])
     db.commit()
     db.refresh(db_appointment)
+    if db_appointment.status == AppointmentStatus.SCHEDULED:
+        notify_appointment_booked(db_appointment.doctor_id, db_appointment.start_time, db_appointment.end_time)
+    return db_appointment
 
-    # Add appointment to Google Calendar
-    event_link = create_event(
-        summary=f"Appointment with Doctor ID {db_appointment.doctor_id}",
-        description=db_appointment.notes or "Medical Appointment",
-        start_time=db_appointment.start_time,
-        end_time=db_appointment.end_time,
-    )
+# How often a bulk insert is re-checked and retried when a concurrent booking wins one of its slots
+BULK_INSERT_ATTEMPTS = 3
 
-    # Attach calendar link to appointment object (not persisted in DB, just returned)
-    db_appointment.google_calendar_link = event_link
+def _find_clash(booked: List[Tuple[datetime, datetime, Optional[int]]], start_time: datetime, end_time: datetime) -> Optional[Tuple[datetime, datetime, Optional[int]]]:
+    """
+    Returns the interval of booked (sorted, non-overlapping (start, end, appointment_id) tuples)
+    that overlaps [start_time, end_time), if any. Only the two neighbours of start_time can overlap.
+    """
+    i = bisect_left(booked, (start_time,))
+    if i > 0 and booked[i - 1][1] > start_time:
+        return booked[i - 1]
+    if i < len(booked) and booked[i][0] < end_time:
+        return booked[i]
+    return None
 
-    return db_appointment
+def check_bulk_appointments(db: Session, appointments: List[AppointmentCreate]) -> Tuple[List[Optional[Dict[str, Any]]], List[int]]:
+    """
+    Validates a batch of new appointments with a fixed number of queries: one for the doctors and patients,
+    one set-based query for every scheduled appointment that can overlap the batch, and one for the
+    recurring series in the batch's window. Items are
+    also checked against the items before them, so the first of two clashing items wins.
+    Returns the failed items' results by position (None for items that passed) and the positions
+    of the items that can be inserted.
+    """
+    results: List[Optional[Dict[str, Any]]] = [None] * len(appointments)
+    valid = []
+    for index, appointment in enumerate(appointments):
+        if appointment.end_time <= appointment.start_time:
+            results[index] = {"index": index, "success": False, "error": "end_time must be after start_time."}
+        else:
+            valid.append(index)
+    if not valid:
+        return results, []
+
+    doctor_ids = {appointments[index].doctor_id for index in valid}
+    patient_ids = {appointments[index].patient_id for index in valid}
+    roles = dict(db.query(User.id, User.role).filter(User.id.in_(doctor_ids | patient_ids)).all())
+
+    window_start = min(appointments[index].start_time for index in valid)
+    window_end = max(appointments[index].end_time for index in valid)
+    booked: Dict[str, Dict[int, List[Tuple[datetime, datetime, Optional[int]]]]] = {"doctor": {}, "patient": {}}
+    existing = db.query(
+        Appointment.id, Appointment.doctor_id, Appointment.patient_id, Appointment.start_time, Appointment.end_time
+    ).filter(
+        Appointment.status == AppointmentStatus.SCHEDULED,
+        or_(Appointment.doctor_id.in_(doctor_ids), Appointment.patient_id.in_(patient_ids)),
+        Appointment.start_time < window_end,
+        Appointment.end_time > window_start
+    ).order_by(Appointment.start_time).all()
+    for appointment_id, doctor_id, patient_id, start_time, end_time in existing:
+        booked["doctor"].setdefault(doctor_id, []).append((start_time, end_time, appointment_id))
+        booked["patient"].setdefault(patient_id, []).append((start_time, end_time, appointment_id))
+    # Occurrences of recurring series in the window take part as if they were appointments
+    series_in_window = crud_series.get_series_in_range(db, window_start, window_end, doctor_ids=doctor_ids, patient_ids=patient_ids)
+    for series in series_in_window:
+        for occurrence in expand_series(series, window_start, window_end):
+            booked["doctor"].setdefault(series.doctor_id, []).append((occurrence.start_time, occurrence.end_time, None))
+            booked["patient"].setdefault(series.patient_id, []).append((occurrence.start_time, occurrence.end_time, None))
+    if series_in_window:
+        for intervals in list(booked["doctor"].values()) + list(booked["patient"].values()):
+            intervals.sort(key=lambda interval: interval[:2])
+
+    accepted = []
+    for index in valid:
+        appointment = appointments[index]
+        if roles.get(appointment.doctor_id) != UserRole.DOCTOR:
+            results[index] = {"index": index, "success": False, "error": f"Doctor with ID {appointment.doctor_id} not found."}
+            continue
+        if appointment.patient_id not in roles:
+            results[index] = {"index": index, "success": False, "error": f"Patient with ID {appointment.patient_id} not found."}
+            continue
+        conflict = None
+        for conflict_with, owner_id in (("doctor", appointment.doctor_id), ("patient", appointment.patient_id)):
+            clash = _find_clash(booked[conflict_with].get(owner_id, []), appointment.start_time, appointment.end_time)
+            if clash is not None:
+                conflict = AppointmentConflictError(
+                    conflict_with, appointment.doctor_id, appointment.patient_id, appointment.start_time,
+                    appointment.end_time, conflicting_appointment_id=clash[2]
+                )
+                break
+        if conflict is not None:
+            results[index] = {"index": index, "success": False, "conflict": conflict.to_dict()}
+            continue
+        accepted.append(index)
+        insort(booked["doctor"].setdefault(appointment.doctor_id, []), (appointment.start_time, appointment.end_time, None))
+        insort(booked["patient"].setdefault(appointment.patient_id, []), (appointment.start_time, appointment.end_time, None))
+    return results, accepted
+
+def create_appointments_bulk(db: Session, appointments: List[AppointmentCreate]) -> List[Dict[str, Any]]:
+    """
+    Create a batch of appointments in one transaction. The batch is checked with check_bulk_appointments,
+    the items that pass are inserted with a single executemany insert and their outbox events with
+    another, and everything is committed once.
+    Returns one result per item, in order: {"index", "success", "appointment_id"} or
+    {"index", "success": False, "conflict" | "error"}. The batch's doctors and patients are locked
+    during the check and the insert. Should a concurrent booking still take one of the slots first,
+    the database rejects the insert and the batch is re-checked.
+    """
+    # The database stores naive times, so compare and insert them without an offset
+    appointments = [
+        appointment.copy(update={
+            "start_time": appointment.start_time.replace(tzinfo=None),
+            "end_time": appointment.end_time.replace(tzinfo=None),
+        })
+        for appointment in appointments
+    ]
+    for attempt in range(BULK_INSERT_ATTEMPTS):
+        lock_schedules(db, [user_id for appointment in appointments for user_id in (appointment.doctor_id, appointment.patient_id)])
+        results, accepted = check_bulk_appointments(db, appointments)
+        if not accepted:
+            db.rollback()
+            return results
+        try:
+            appointment_ids = db.execute(
+                insert(Appointment).returning(Appointment.id, sort_by_parameter_order=True),
+                [dict(appointments[index].dict(), status=AppointmentStatus.SCHEDULED) for index in accepted]
+            ).scalars().all()
+            crud_outbox.enqueue_booking_side_effects_bulk(db, appointment_ids)
+            db.commit()
+        except IntegrityError as e:
+            db.rollback()
+            error_text = str(e.orig)
+            is_overlap = DOCTOR_OVERLAP_CONSTRAINT in error_text or PATIENT_OVERLAP_CONSTRAINT in error_text
+            if not is_overlap or attempt == BULK_INSERT_ATTEMPTS - 1:
+                raise
+            continue
+
+        for index, appointment_id in zip(accepted, appointment_ids):
+            results[index] = {"index": index, "success": True, "appointment_id": appointment_id}
+            notify_appointment_booked(appointments[index].doctor_id, appointments[index].start_time, appointments[index].end_time)
+        return results
 
 def get_appointment(db: Session, appointment_id: int) -> Optional[Appointment]:
     """Retrieve a single appointment by its ID."""
@@ -38,6 +294,18 @@ def get_appointments_by_user(db: Session, user_id: int) -> List[Appointment]:
         (Appointment.patient_id == user_id) | (Appointment.doctor_id == user_id)
     ).all()
 
+async def get_appointments_by_user_async(db: AsyncSession, user_id: int) -> List[Appointment]:
+    """
+    Retrieve all appointments for a specific user through an async session, with their patient and
+    doctor loaded up front (async sessions cannot lazy-load them later).
+    """
+    result = await db.execute(
+        select(Appointment).options(
+            selectinload(Appointment.patient), selectinload(Appointment.doctor)
+        ).filter((Appointment.patient_id == user_id) | (Appointment.doctor_id == user_id))
+    )
+    return list(result.scalars().all())
+
 def get_appointments_by_doctor_for_day(db: Session, doctor_id: int, target_date: date) -> List[Appointment]:
     """Retrieve all appointments for a specific doctor on a given day."""
     start_of_day = datetime.combine(target_date, datetime.min.time())
@@ -50,6 +318,39 @@ def get_appointments_by_doctor_for_day(db: Session, doctor_id: int, target_date:
         Appointment.start_time <= end_of_day
     ).order_by(Appointment.start_time).all()
 
+def get_booked_times_for_all_doctors(db: Session, start_date: date, end_date: date, doctor_id: Optional[int] = None,
+                                     doctor_ids: Optional[List[int]] = None) -> List[Tuple[int, str, Optional[datetime], Optional[datetime]]]:
+    """
+    Retrieve every doctor (or just doctor_id, or the doctors in doctor_ids) together with the start and end times of their scheduled appointments in a date range, in a single query.
+    Doctors without appointments in the range are returned once with start and end times of None.
+    The occurrences of their recurring series in the range follow the appointment rows.
+    """
+    range_start = datetime.combine(start_date, datetime.min.time())
+    range_end = datetime.combine(end_date, datetime.max.time())
+    query = db.query(User.id, User.full_name, Appointment.start_time, Appointment.end_time).outerjoin(
+        Appointment,
+        and_(
+            Appointment.doctor_id == User.id,
+            Appointment.status == AppointmentStatus.SCHEDULED,
+            Appointment.start_time >= range_start,
+            Appointment.start_time <= range_end
+        )
+    ).filter(
+        User.role == UserRole.DOCTOR
+    )
+    if doctor_id is not None:
+        query = query.filter(User.id == doctor_id)
+    if doctor_ids is not None:
+        query = query.filter(User.id.in_(doctor_ids))
+    rows = query.order_by(User.id, Appointment.start_time).all()
+
+    # Occurrences of recurring series are expanded for the range and added as (doctor, start, end) rows too
+    names = {row[0]: row[1] for row in rows}
+    series_intervals = crud_series.get_occurrence_intervals(db, range_start, range_end, doctor_ids=list(names))
+    for series_doctor_id, intervals in series_intervals.items():
+        rows.extend((series_doctor_id, names[series_doctor_id], start_time, end_time) for start_time, end_time in intervals)
+    return rows
+
 def count_appointments_for_doctor(db: Session, doctor_id: int, start_date: datetime, end_date: datetime) -> int:
     """Counts the number of appointments for a specific doctor within a given date range."""
     return db.query(Appointment).filter(
@@ -72,20 +373,163 @@ def search_appointments_by_notes(db: Session, doctor_id: int, start_date: dateti
     ).count()
 
 def update_appointment(db: Session, appointment_id: int, appointment_update: AppointmentUpdate) -> Optional[Appointment]:
-    """Update an existing appointment."""
+    """Update an existing appointment. Raises AppointmentConflictError if the new time overlaps another appointment."""
     db_appointment = get_appointment(db, appointment_id)
     if not db_appointment:
         return None
     
+    previous = (db_appointment.doctor_id, db_appointment.start_time, db_appointment.end_time, db_appointment.status)
     update_data = appointment_update.dict(exclude_unset=True)
     for key, value in update_data.items():
         setattr(db_appointment, key, value)
-        
+
+    current = (db_appointment.doctor_id, db_appointment.start_time, db_appointment.end_time, db_appointment.status)
+    if current != previous and current[3] == AppointmentStatus.SCHEDULED:
+        lock_schedules(db, [db_appointment.doctor_id, db_appointment.patient_id])
+        series_conflict = find_series_conflict(
+            db, db_appointment.doctor_id, db_appointment.patient_id, db_appointment.start_time, db_appointment.end_time
+        )
+        if series_conflict is not None:
+            db.rollback()
+            raise series_conflict
+
     db.add(db_appointment)
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError as e:
+        db.rollback()
+        db_appointment = get_appointment(db, appointment_id)
+        conflict = overlap_conflict(
+            db, e, db_appointment.doctor_id, db_appointment.patient_id,
+            update_data.get("start_time", db_appointment.start_time), update_data.get("end_time", db_appointment.end_time),
+            exclude_id=appointment_id
+        )
+        if conflict is not None:
+            raise conflict from e
+        raise
     db.refresh(db_appointment)
+    current = (db_appointment.doctor_id, db_appointment.start_time, db_appointment.end_time, db_appointment.status)
+    if current != previous:
+        if previous[3] == AppointmentStatus.SCHEDULED:
+            notify_appointment_released(*previous[:3])
+        if current[3] == AppointmentStatus.SCHEDULED:
+            notify_appointment_booked(*current[:3])
     return db_appointment
 
+def series_conflict(db: Session, db_series: AppointmentSeries) -> Optional[AppointmentConflictError]:
+    """
+    Checks a new series as a whole against the doctor's and the patient's appointments and other series,
+    without expanding it over its whole span: every appointment in the span is matched against the
+    series' occurrence grid with arithmetic, and only the spans shared with other series are expanded.
+    """
+    doctor_id, patient_id = db_series.doctor_id, db_series.patient_id
+    existing = db.query(Appointment).filter(
+        Appointment.status == AppointmentStatus.SCHEDULED,
+        or_(Appointment.doctor_id == doctor_id, Appointment.patient_id == patient_id),
+        Appointment.start_time < db_series.span_end,
+        Appointment.end_time > db_series.span_start
+    ).order_by(Appointment.start_time).all()
+    for appointment in existing:
+        clashes = expand_series(db_series, appointment.start_time, appointment.end_time)
+        if clashes:
+            return AppointmentConflictError(
+                "doctor" if appointment.doctor_id == doctor_id else "patient", doctor_id, patient_id,
+                clashes[0].start_time, clashes[0].end_time, conflicting_appointment_id=appointment.id
+            )
+
+    for other in crud_series.get_series_in_range(db, db_series.span_start, db_series.span_end, doctor_ids=[doctor_id], patient_ids=[patient_id]):
+        if other.id == db_series.id:
+            continue
+        shared_start, shared_end = max(other.span_start, db_series.span_start), min(other.span_end, db_series.span_end)
+        for occurrence in expand_series(db_series, shared_start, shared_end):
+            if expand_series(other, occurrence.start_time, occurrence.end_time):
+                return AppointmentConflictError(
+                    "doctor" if other.doctor_id == doctor_id else "patient", doctor_id, patient_id,
+                    occurrence.start_time, occurrence.end_time, conflicting_series_id=other.id
+                )
+    return None
+
+def create_appointment_series(db: Session, series_in: AppointmentSeriesCreate) -> AppointmentSeries:
+    """
+    Create a recurring appointment as a single series row. Its occurrences are expanded when they are
+    queried, and its calendar event (one recurring event) and confirmation email are queued once for
+    the whole series. Raises AppointmentConflictError if any occurrence clashes with the doctor's or
+    the patient's schedule, which are locked from the check until the commit. Validate series_in
+    with crud_series.series_errors first.
+    """
+    first_start = series_in.start_time.replace(tzinfo=None)
+    db_series = AppointmentSeries(
+        patient_id=series_in.patient_id, doctor_id=series_in.doctor_id, frequency=series_in.frequency,
+        interval=series_in.interval, first_start=first_start, duration_minutes=series_in.duration_minutes,
+        status=AppointmentStatus.SCHEDULED, notes=series_in.notes
+    )
+    db_series.occurrences = occurrence_count(first_start, db_series.step, count=series_in.count, until=series_in.until)
+    db_series.span_start = first_start
+    db_series.span_end = first_start + (db_series.occurrences - 1) * db_series.step + db_series.duration
+
+    lock_schedules(db, [db_series.doctor_id, db_series.patient_id])
+    conflict = series_conflict(db, db_series)
+    if conflict is not None:
+        db.rollback()
+        raise conflict
+    db.add(db_series)
+    db.flush()
+    crud_outbox.enqueue_series_side_effects(db, db_series)
+    db.commit()
+    db.refresh(db_series)
+    for occurrence in expand_series(db_series, db_series.span_start, db_series.span_end):
+        notify_appointment_booked(db_series.doctor_id, occurrence.start_time, occurrence.end_time)
+    return db_series
+
+def update_series_occurrence(db: Session, db_series: AppointmentSeries, exception_in: SeriesExceptionCreate) -> AppointmentSeries:
+    """
+    Cancel or reschedule one occurrence of a series by storing a sparse exception for it.
+    Raises AppointmentConflictError if the new time clashes. Validate exception_in with
+    crud_series.series_exception_errors first.
+    """
+    original_start = exception_in.original_start.replace(tzinfo=None)
+    previous = next((exception for exception in db_series.exceptions if exception.original_start == original_start), None)
+    if previous is None:
+        released = (original_start, original_start + db_series.duration)
+    elif previous.kind == SeriesExceptionKind.RESCHEDULED:
+        released = (previous.start_time, previous.end_time)
+    else:
+        released = None
+
+    booked = None
+    if exception_in.kind == SeriesExceptionKind.RESCHEDULED:
+        start_time = exception_in.start_time.replace(tzinfo=None)
+        booked = (start_time, start_time + db_series.duration)
+        lock_schedules(db, [db_series.doctor_id, db_series.patient_id])
+        for conflict_with, column, owner_id in (("doctor", Appointment.doctor_id, db_series.doctor_id), ("patient", Appointment.patient_id, db_series.patient_id)):
+            clash = find_overlapping_appointment(db, column, owner_id, *booked)
+            if clash is not None:
+                db.rollback()
+                raise AppointmentConflictError(conflict_with, db_series.doctor_id, db_series.patient_id, *booked, conflicting_appointment_id=clash.id)
+        conflict = find_series_conflict(db, db_series.doctor_id, db_series.patient_id, *booked, exclude_occurrence=(db_series.id, original_start))
+        if conflict is not None:
+            db.rollback()
+            raise conflict
+
+    crud_series.set_exception(db, db_series, original_start, exception_in.kind, *(booked or ()))
+    db.commit()
+    db.refresh(db_series)
+    if released is not None:
+        notify_appointment_released(db_series.doctor_id, *released)
+    if booked is not None:
+        notify_appointment_booked(db_series.doctor_id, *booked)
+    return db_series
+
+def cancel_appointment_series(db: Session, db_series: AppointmentSeries) -> AppointmentSeries:
+    """Cancel every occurrence of a series."""
+    occurrences = expand_series(db_series, db_series.span_start, db_series.span_end)
+    db_series.status = AppointmentStatus.CANCELLED
+    db.commit()
+    db.refresh(db_series)
+    for occurrence in occurrences:
+        notify_appointment_released(db_series.doctor_id, occurrence.start_time, occurrence.end_time)
+    return db_series
+
 def get_appointment_details_for_doctor(db: Session, doctor_id: int, start_date: datetime, end_date: datetime) -> List[Appointment]:
     """Gets a list of full appointment objects for a doctor within a date range, including patient info."""
     return db.query(Appointment).options(
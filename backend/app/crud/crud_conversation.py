@@ -0,0 +1,66 @@
+import json
+from datetime import datetime
+from sqlalchemy.orm import Session
+from typing import Any, Dict, List, Optional
+
+from app.models.conversation import ConversationMessage, ConversationContext
+
+def append_turn(db: Session, user_id: int, messages: List[Dict[str, Any]], context: Dict[str, Any]):
+    """
+    Append the new messages of a turn to a user's conversation and replace its context, in one transaction.
+    Existing message rows are never rewritten.
+    """
+    db.add_all([
+        ConversationMessage(user_id=user_id, role=message.get("role", ""), payload=json.dumps(message, default=str))
+        for message in messages
+    ])
+    db.merge(ConversationContext(user_id=user_id, context=json.dumps(context, default=str)))
+    db.commit()
+
+def get_recent_messages(db: Session, user_id: int, limit: int) -> List[Dict[str, Any]]:
+    """
+    Retrieve the last `limit` messages of a user's conversation, oldest first.
+    """
+    rows = db.query(ConversationMessage.payload).filter(
+        ConversationMessage.user_id == user_id
+    ).order_by(ConversationMessage.id.desc()).limit(limit).all()
+    return [json.loads(row.payload) for row in reversed(rows)]
+
+def get_first_message(db: Session, user_id: int) -> Optional[Dict[str, Any]]:
+    """
+    Retrieve the first message of a user's conversation (normally the system prompt).
+    """
+    row = db.query(ConversationMessage.payload).filter(
+        ConversationMessage.user_id == user_id
+    ).order_by(ConversationMessage.id).first()
+    return json.loads(row.payload) if row else None
+
+def get_last_message_time(db: Session, user_id: int) -> Optional[datetime]:
+    """
+    Retrieve when the newest message of a user's conversation was stored, or None if there is none.
+    """
+    row = db.query(ConversationMessage.created_at).filter(
+        ConversationMessage.user_id == user_id
+    ).order_by(ConversationMessage.id.desc()).first()
+    return row.created_at if row else None
+
+def count_messages(db: Session, user_id: int) -> int:
+    """
+    Count the messages stored for a user's conversation.
+    """
+    return db.query(ConversationMessage).filter(ConversationMessage.user_id == user_id).count()
+
+def get_context(db: Session, user_id: int) -> Dict[str, Any]:
+    """
+    Retrieve the stored conversation context of a user, or an empty dict.
+    """
+    row = db.query(ConversationContext).filter(ConversationContext.user_id == user_id).first()
+    return json.loads(row.context) if row else {}
+
+def delete_conversation(db: Session, user_id: int):
+    """
+    Delete all stored messages and context of a user's conversation.
+    """
+    db.query(ConversationMessage).filter(ConversationMessage.user_id == user_id).delete(synchronize_session=False)
+    db.query(ConversationContext).filter(ConversationContext.user_id == user_id).delete(synchronize_session=False)
+    db.commit()
@@ -0,0 +1,94 @@
+import json
+from datetime import datetime, timedelta
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from typing import List, Optional
+
+from app.models.appointment import Appointment
+from app.models.series import AppointmentSeries
+from app.models.outbox import OutboxEvent, OutboxEventType, OutboxStatus
+
+def enqueue_booking_side_effects(db: Session, appointments: List[Appointment], timezone: str = "Asia/Kolkata"):
+    """
+    Add the calendar-event and confirmation-email outbox events for newly created appointments.
+    Does not commit: the events must be committed in the same transaction as the appointments.
+    The appointments must already have ids (call db.flush() first).
+    """
+    payload = json.dumps({"timezone": timezone})
+    db.add_all([
+        OutboxEvent(appointment_id=appointment.id, event_type=event_type, payload=payload)
+        for appointment in appointments
+        for event_type in (OutboxEventType.CALENDAR_EVENT, OutboxEventType.CONFIRMATION_EMAIL)
+    ])
+
+def enqueue_booking_side_effects_bulk(db: Session, appointment_ids: List[int], timezone: str = "Asia/Kolkata"):
+    """
+    Like enqueue_booking_side_effects, for appointments inserted without ORM objects: adds all of
+    their outbox events with a single executemany insert. Does not commit.
+    """
+    if not appointment_ids:
+        return
+    payload = json.dumps({"timezone": timezone})
+    db.execute(insert(OutboxEvent), [
+        {"appointment_id": appointment_id, "event_type": event_type, "payload": payload}
+        for appointment_id in appointment_ids
+        for event_type in (OutboxEventType.CALENDAR_EVENT, OutboxEventType.CONFIRMATION_EMAIL)
+    ])
+
+def enqueue_series_side_effects(db: Session, series: AppointmentSeries, timezone: str = "Asia/Kolkata"):
+    """
+    Add the outbox events of a new appointment series: one recurring calendar event and one
+    confirmation email for the whole series. Does not commit; the series must already have an id.
+    """
+    payload = json.dumps({"timezone": timezone})
+    db.add_all([
+        OutboxEvent(series_id=series.id, event_type=event_type, payload=payload)
+        for event_type in (OutboxEventType.CALENDAR_EVENT, OutboxEventType.CONFIRMATION_EMAIL)
+    ])
+
+def claim_due_events(db: Session, limit: int, lease_seconds: int) -> List[OutboxEvent]:
+    """
+    Claim up to `limit` events that are due, marking them PROCESSING until the lease expires.
+    Events whose lease expired (a worker died mid-way) are due again. Rows locked by another
+    worker are skipped on PostgreSQL, so several workers can drain the outbox at once.
+    """
+    now = datetime.utcnow()
+    events = db.query(OutboxEvent).filter(
+        OutboxEvent.status.in_([OutboxStatus.PENDING, OutboxStatus.PROCESSING]),
+        OutboxEvent.next_attempt_at <= now
+    ).order_by(OutboxEvent.next_attempt_at).limit(limit).with_for_update(skip_locked=True).all()
+
+    for event in events:
+        event.status = OutboxStatus.PROCESSING
+        event.attempts += 1
+        event.next_attempt_at = now + timedelta(seconds=lease_seconds)
+    db.commit()
+    return events
+
+def mark_event_done(db: Session, event: OutboxEvent, result: Optional[str] = None):
+    """
+    Mark an outbox event as successfully carried out.
+    """
+    event.status = OutboxStatus.DONE
+    event.result = result
+    event.last_error = None
+    db.commit()
+
+def mark_event_failed(db: Session, event: OutboxEvent, error: str, max_attempts: int, backoff_seconds: int):
+    """
+    Record a failed attempt. The event is retried with exponential backoff, or dead-lettered
+    once it has used up max_attempts.
+    """
+    event.last_error = error
+    if event.attempts >= max_attempts:
+        event.status = OutboxStatus.DEAD
+    else:
+        event.status = OutboxStatus.PENDING
+        event.next_attempt_at = datetime.utcnow() + timedelta(seconds=backoff_seconds * 2 ** (event.attempts - 1))
+    db.commit()
+
+def get_events_for_appointment(db: Session, appointment_id: int) -> List[OutboxEvent]:
+    """
+    Retrieve the outbox events of an appointment, oldest first.
+    """
+    return db.query(OutboxEvent).filter(OutboxEvent.appointment_id == appointment_id).order_by(OutboxEvent.id).all()
@@ -1,3 +1,5 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List
 
@@ -22,3 +24,12 @@ def get_prompt_history_by_user(db: Session, user_id: int) -> List[PromptHistory]
     Retrieve all prompt history records for a specific user, ordered by most recent first.
     """
     return db.query(PromptHistory).filter(PromptHistory.user_id == user_id).order_by(PromptHistory.created_at.desc()).all()
+
+async def get_prompt_history_by_user_async(db: AsyncSession, user_id: int) -> List[PromptHistory]:
+    """
+    Retrieve all prompt history records for a specific user through an async session, ordered by most recent first.
+    """
+    result = await db.execute(
+        select(PromptHistory).filter(PromptHistory.user_id == user_id).order_by(PromptHistory.created_at.desc())
+    )
+    return list(result.scalars().all())
@@ -0,0 +1,51 @@
+from sqlalchemy.orm import Session, selectinload
+from typing import List, Optional
+
+from app.models.schedule import DoctorSchedule, ScheduleRule, ScheduleException, ScheduleExceptionKind
+from app.schemas.schedule import DoctorScheduleUpdate
+from app.services.cache import notify_doctors_change
+
+def get_schedule(db: Session, doctor_id: int) -> Optional[DoctorSchedule]:
+    """Retrieve a doctor's schedule template with its rules and exceptions."""
+    return db.query(DoctorSchedule).options(
+        selectinload(DoctorSchedule.rules), selectinload(DoctorSchedule.exceptions)
+    ).filter(DoctorSchedule.doctor_id == doctor_id).first()
+
+def get_schedules(db: Session) -> List[DoctorSchedule]:
+    """Retrieve every doctor's schedule template with its rules and exceptions, in three queries."""
+    return db.query(DoctorSchedule).options(
+        selectinload(DoctorSchedule.rules), selectinload(DoctorSchedule.exceptions)
+    ).all()
+
+def schedule_errors(schedule_in: DoctorScheduleUpdate) -> List[str]:
+    """Returns what is wrong with a schedule template, or an empty list if it is valid."""
+    errors = []
+    if not 5 <= schedule_in.slot_minutes <= 240:
+        errors.append("slot_minutes must be between 5 and 240.")
+    for rule in schedule_in.rules:
+        if not 0 <= rule.weekday <= 6:
+            errors.append(f"weekday {rule.weekday} must be between 0 (Monday) and 6 (Sunday).")
+        if rule.end_time <= rule.start_time:
+            errors.append(f"The rule on weekday {rule.weekday} must end after it starts.")
+    for exception in schedule_in.exceptions:
+        if (exception.start_time is None) != (exception.end_time is None):
+            errors.append(f"The exception on {exception.day} needs both start_time and end_time, or neither.")
+        elif exception.start_time is not None and exception.end_time <= exception.start_time:
+            errors.append(f"The exception on {exception.day} must end after it starts.")
+        elif exception.start_time is None and exception.kind == ScheduleExceptionKind.EXTRA_HOURS:
+            errors.append(f"The extra hours on {exception.day} need a start_time and end_time.")
+    return errors
+
+def set_schedule(db: Session, doctor_id: int, schedule_in: DoctorScheduleUpdate) -> DoctorSchedule:
+    """Create or replace a doctor's schedule template, including all of its rules and exceptions."""
+    db_schedule = get_schedule(db, doctor_id)
+    if db_schedule is None:
+        db_schedule = DoctorSchedule(doctor_id=doctor_id)
+        db.add(db_schedule)
+    db_schedule.slot_minutes = schedule_in.slot_minutes
+    db_schedule.rules = [ScheduleRule(**rule.dict()) for rule in schedule_in.rules]
+    db_schedule.exceptions = [ScheduleException(**exception.dict()) for exception in schedule_in.exceptions]
+    db.commit()
+    db.refresh(db_schedule)
+    notify_doctors_change()
+    return db_schedule
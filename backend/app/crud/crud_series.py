@@ -0,0 +1,99 @@
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import or_
+from typing import Dict, Iterable, List, Optional, Tuple
+from datetime import datetime
+
+from app.models.appointment import AppointmentStatus
+from app.models.series import AppointmentSeries, SeriesException, SeriesExceptionKind
+from app.schemas.series import AppointmentSeriesCreate, SeriesExceptionCreate
+from app.services.recurrence import expand_series, occurrence_index
+
+def get_series(db: Session, series_id: int) -> Optional[AppointmentSeries]:
+    """Retrieve an appointment series with its exceptions."""
+    return db.query(AppointmentSeries).options(
+        selectinload(AppointmentSeries.exceptions)
+    ).filter(AppointmentSeries.id == series_id).first()
+
+def get_series_by_user(db: Session, user_id: int) -> List[AppointmentSeries]:
+    """Retrieve all appointment series of a user (either as a patient or doctor)."""
+    return db.query(AppointmentSeries).options(
+        selectinload(AppointmentSeries.exceptions)
+    ).filter(
+        (AppointmentSeries.patient_id == user_id) | (AppointmentSeries.doctor_id == user_id)
+    ).order_by(AppointmentSeries.first_start).all()
+
+def get_series_in_range(db: Session, range_start: datetime, range_end: datetime,
+                        doctor_ids: Optional[Iterable[int]] = None,
+                        patient_ids: Optional[Iterable[int]] = None) -> List[AppointmentSeries]:
+    """
+    Retrieve the scheduled series whose span overlaps [range_start, range_end), with their exceptions.
+    With doctor_ids and/or patient_ids, only the series of those doctors or patients.
+    """
+    query = db.query(AppointmentSeries).options(
+        selectinload(AppointmentSeries.exceptions)
+    ).filter(
+        AppointmentSeries.status == AppointmentStatus.SCHEDULED,
+        AppointmentSeries.span_start < range_end,
+        AppointmentSeries.span_end > range_start
+    )
+    owners = []
+    if doctor_ids is not None:
+        owners.append(AppointmentSeries.doctor_id.in_(list(doctor_ids)))
+    if patient_ids is not None:
+        owners.append(AppointmentSeries.patient_id.in_(list(patient_ids)))
+    if owners:
+        query = query.filter(or_(*owners))
+    return query.all()
+
+def get_occurrence_intervals(db: Session, range_start: datetime, range_end: datetime,
+                             doctor_ids: Optional[Iterable[int]] = None) -> Dict[int, List[Tuple[datetime, datetime]]]:
+    """Expands the scheduled series in a range into {doctor_id: [(start_time, end_time), ...]}."""
+    intervals: Dict[int, List[Tuple[datetime, datetime]]] = {}
+    for series in get_series_in_range(db, range_start, range_end, doctor_ids=doctor_ids):
+        for occurrence in expand_series(series, range_start, range_end):
+            intervals.setdefault(series.doctor_id, []).append((occurrence.start_time, occurrence.end_time))
+    return intervals
+
+def series_errors(series_in: AppointmentSeriesCreate, max_occurrences: int) -> List[str]:
+    """Returns what is wrong with a new appointment series, or an empty list if it is valid."""
+    errors = []
+    if series_in.count is None and series_in.until is None:
+        errors.append("Give count, until or both to end the series.")
+    if series_in.count is not None and not 1 <= series_in.count <= max_occurrences:
+        errors.append(f"count must be between 1 and {max_occurrences}.")
+    if series_in.until is not None and series_in.until < series_in.start_time.date():
+        errors.append("until must not be before the first occurrence.")
+    if series_in.interval < 1:
+        errors.append("interval must be at least 1.")
+    if not 5 <= series_in.duration_minutes <= 480:
+        errors.append("duration_minutes must be between 5 and 480.")
+    return errors
+
+def series_exception_errors(series: AppointmentSeries, exception_in: SeriesExceptionCreate) -> List[str]:
+    """Returns what is wrong with cancelling or rescheduling an occurrence, or an empty list if it is valid."""
+    errors = []
+    if series.status != AppointmentStatus.SCHEDULED:
+        errors.append("The series is no longer scheduled.")
+    if occurrence_index(series, exception_in.original_start.replace(tzinfo=None)) is None:
+        errors.append(f"{exception_in.original_start.isoformat()} is not an occurrence of this series.")
+    if exception_in.kind == SeriesExceptionKind.RESCHEDULED and exception_in.start_time is None:
+        errors.append("start_time is needed to reschedule an occurrence.")
+    return errors
+
+def set_exception(db: Session, series: AppointmentSeries, original_start: datetime, kind: SeriesExceptionKind,
+                  start_time: Optional[datetime] = None, end_time: Optional[datetime] = None) -> SeriesException:
+    """
+    Cancel or reschedule one occurrence, replacing an earlier exception of the same occurrence.
+    Does not commit.
+    """
+    exception = next((exception for exception in series.exceptions if exception.original_start == original_start), None)
+    if exception is None:
+        exception = SeriesException(original_start=original_start)
+        series.exceptions.append(exception)
+    exception.kind = kind
+    exception.start_time = start_time if kind == SeriesExceptionKind.RESCHEDULED else None
+    exception.end_time = end_time if kind == SeriesExceptionKind.RESCHEDULED else None
+    if exception.start_time is not None:
+        series.span_start = min(series.span_start, exception.start_time)
+        series.span_end = max(series.span_end, exception.end_time)
+    return exception
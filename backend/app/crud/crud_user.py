@@ -1,9 +1,12 @@
 import logging
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from passlib.context import CryptContext
 from typing import List, Optional
 from app.models.user import User, UserRole
 from app.schemas.user import UserCreate
+from app.services.cache import notify_doctors_change
 
 # Set up basic logging
 logging.basicConfig(level=logging.INFO)
@@ -24,6 +27,11 @@ def get_user_by_email(db: Session, email: str) -> Optional[User]:
     """Retrieves a single user from the database by their email address."""
     return db.query(User).filter(User.email == email).first()
 
+async def get_user_by_email_async(db: AsyncSession, email: str) -> Optional[User]:
+    """Retrieves a single user by their email address through an async session."""
+    result = await db.execute(select(User).filter(User.email == email).limit(1))
+    return result.scalars().first()
+
 def get_user_by_id(db: Session, user_id: int) -> Optional[User]:
     """Retrieves a single user from the database by their ID."""
     return db.query(User).filter(User.id == user_id).first()
@@ -51,4 +59,6 @@ def create_user(db: Session, user: UserCreate) -> User:
     db.add(db_user)
     db.commit()
     db.refresh(db_user)
+    if db_user.role == UserRole.DOCTOR:
+        notify_doctors_change()
     return db_user
@@ -1,20 +1,36 @@
 import logging
+import os
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect
 from app.db.session import engine, Base
-from app.models import user, appointment # Import all models
+from app.models import user, appointment, conversation, notification, outbox, prompt_history, schedule, series # Import all models
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "alembic.ini")
+# The migration that matches the tables create_all made before migrations were introduced
+BASELINE_REVISION = "0001_baseline"
+BASELINE_TABLES = ["users", "appointments", "notifications", "prompt_history"]
+
 def init_db():
-    logger.info("Creating all database tables...")
+    logger.info("Applying database migrations...")
     try:
-        # The Base.metadata object has collected all the table definitions
-        # from our models. This command creates all of them in the database
-        # connected by the engine.
-        Base.metadata.create_all(bind=engine)
-        logger.info("Database tables created successfully.")
+        with engine.begin() as connection:
+            config = Config(ALEMBIC_INI)
+            config.attributes["connection"] = connection
+            tables = inspect(connection).get_table_names()
+            if tables and "alembic_version" not in tables:
+                # A database created by create_all: add any baseline tables it is missing, mark it
+                # as the baseline and let the later migrations add the rest on top of it
+                logger.info("Existing tables without migration history; stamping the baseline.")
+                Base.metadata.create_all(bind=connection, tables=[Base.metadata.tables[name] for name in BASELINE_TABLES])
+                command.stamp(config, BASELINE_REVISION)
+            command.upgrade(config, "head")
+        logger.info("Database migrations applied successfully.")
     except Exception as e:
-        logger.error(f"Error creating database tables: {e}")
+        logger.error(f"Error applying database migrations: {e}")
         raise
 
 if __name__ == "__main__":
@@ -0,0 +1,113 @@
+import math
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Type
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+# How many recent checkout wait times are kept for the percentiles
+WAIT_SAMPLES = 1024
+
+
+def _percentile_ms(ordered: List[float], pct: float) -> float:
+    """Nearest-rank percentile of sorted durations in seconds, in milliseconds."""
+    if not ordered:
+        return 0.0
+    return round(ordered[max(1, math.ceil(pct / 100 * len(ordered))) - 1] * 1000, 3)
+
+
+class PoolMetrics:
+    """
+    Checkout, wait-time and saturation counters of one connection pool. capacity is the most
+    connections the pool hands out at once (pool size plus overflow), or None if unlimited.
+    """
+
+    def __init__(self, capacity: Optional[int]):
+        self.capacity = capacity
+        self.checkouts = 0
+        self.checkins = 0
+        self.timeouts = 0
+        # Checkouts that found every connection in use and had to wait for one
+        self.waited_checkouts = 0
+        self.peak_in_use = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self._waits: Deque[float] = deque(maxlen=WAIT_SAMPLES)
+        self._lock = threading.Lock()
+
+    def record_checkout(self, wait_seconds: float, in_use: int, waited: bool):
+        """Counts a checkout that took wait_seconds and left in_use connections checked out."""
+        with self._lock:
+            self.checkouts += 1
+            self.waited_checkouts += waited
+            self.peak_in_use = max(self.peak_in_use, in_use)
+            self.total_wait_seconds += wait_seconds
+            self.max_wait_seconds = max(self.max_wait_seconds, wait_seconds)
+            self._waits.append(wait_seconds)
+
+    def record_checkin(self):
+        """Counts a connection returned to the pool."""
+        with self._lock:
+            self.checkins += 1
+
+    def record_timeout(self, wait_seconds: float):
+        """Counts a checkout that gave up after waiting wait_seconds for a free connection."""
+        with self._lock:
+            self.timeouts += 1
+            self.max_wait_seconds = max(self.max_wait_seconds, wait_seconds)
+
+    def stats(self, pool: QueuePool) -> Dict[str, Any]:
+        """Reports the counters together with the pool's current state."""
+        in_use = pool.checkedout()
+        with self._lock:
+            waits = sorted(self._waits)
+            return {
+                "pool_size": pool.size(),
+                "capacity": self.capacity,
+                "in_use": in_use,
+                "idle": pool.checkedin(),
+                "overflow": max(0, pool.overflow()),
+                "saturation": round(in_use / self.capacity, 3) if self.capacity else None,
+                "peak_in_use": self.peak_in_use,
+                "peak_saturation": round(self.peak_in_use / self.capacity, 3) if self.capacity else None,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "waited_checkouts": self.waited_checkouts,
+                "timeouts": self.timeouts,
+                "wait_ms": {
+                    "mean": round(self.total_wait_seconds / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                    "p50": _percentile_ms(waits, 50),
+                    "p95": _percentile_ms(waits, 95),
+                    "max": round(self.max_wait_seconds * 1000, 3),
+                },
+            }
+
+
+def metered_pool_class(base: Type[QueuePool], metrics: PoolMetrics) -> Type[QueuePool]:
+    """
+    Returns a subclass of a QueuePool class that reports every checkout, its wait for a free
+    connection and every checkin to metrics. The metrics are bound to the class, so the pool
+    SQLAlchemy recreates on dispose() keeps reporting to them.
+    """
+
+    class MeteredPool(base):
+        def _do_get(self):
+            # All pool_size + overflow connections busy means this checkout queues for one
+            waited = metrics.capacity is not None and self.checkedout() >= metrics.capacity
+            started = time.perf_counter()
+            try:
+                record = super()._do_get()
+            except PoolTimeoutError:
+                metrics.record_timeout(time.perf_counter() - started)
+                raise
+            metrics.record_checkout(time.perf_counter() - started, self.checkedout(), waited)
+            return record
+
+        def _do_return_conn(self, record):
+            super()._do_return_conn(record)
+            metrics.record_checkin()
+
+    MeteredPool.__name__ = MeteredPool.__qualname__ = f"Metered{base.__name__}"
+    return MeteredPool
@@ -1,22 +1,93 @@
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from app.core.config import settings
+from app.db.pool_metrics import PoolMetrics, metered_pool_class
+
+# Async drivers by database backend, for the async engine
+ASYNC_DRIVERS = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
+
+def to_async_url(database_url: str) -> str:
+    """Returns a database URL with the backend's async driver, e.g. postgresql+asyncpg://..."""
+    url = make_url(database_url)
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver is None:
+        raise ValueError(f"No async driver configured for {url.get_backend_name()} databases.")
+    return url.set(drivername=f"{url.get_backend_name()}+{driver}").render_as_string(hide_password=False)
+
+# Pool settings shared by both engines; each engine has a pool of its own
+POOL_SETTINGS = {
+    "pool_size": settings.DB_POOL_SIZE,
+    "max_overflow": settings.DB_MAX_OVERFLOW,
+    "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+    "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+    "pool_pre_ping": settings.DB_POOL_PRE_PING,
+}
+# Most connections a pool hands out at once; a negative overflow means no limit
+POOL_CAPACITY = settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW if settings.DB_MAX_OVERFLOW >= 0 else None
+
+# Checkout, wait-time and saturation counters of the two pools (see get_pool_stats)
+pool_metrics = PoolMetrics(capacity=POOL_CAPACITY)
+async_pool_metrics = PoolMetrics(capacity=POOL_CAPACITY)
 
 # Create the SQLAlchemy engine
 # The engine is the starting point for any SQLAlchemy application.
 # It's the low-level object that connects to the database.
 engine = create_engine(
     settings.DATABASE_URL,
-    # connect_args are needed for SQLite, but good to have for other dbs
-    # For PostgreSQL, you might not need this, but it doesn't hurt.
-    # connect_args={"check_same_thread": False} # This is for SQLite only
+    # SQLite connections are used from the agent's tool worker threads, so allow cross-thread use.
+    # PostgreSQL does not need any connect_args.
+    connect_args={"check_same_thread": False} if settings.DATABASE_URL.startswith("sqlite") else {},
+    poolclass=metered_pool_class(QueuePool, pool_metrics),
+    **POOL_SETTINGS
 )
 
 # Create a configured "Session" class
 # A session manages the connection to the database and handles transactions.
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# The async engine and session class, for endpoints that await the database instead of blocking a
+# threadpool thread. Both engines share the same database and models.
+async_engine = create_async_engine(
+    settings.ASYNC_DATABASE_URL or to_async_url(settings.DATABASE_URL),
+    poolclass=metered_pool_class(AsyncAdaptedQueuePool, async_pool_metrics),
+    **POOL_SETTINGS
+)
+# Objects stay loaded after commit, since async sessions cannot lazy-load expired attributes
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+@contextmanager
+def session_scope(db: Optional[Session] = None) -> Iterator[Session]:
+    """
+    Yields db when the caller already holds a session, so that a whole request works on one
+    connection, or else a new session that is closed afterwards. A request's session may be
+    handed to another thread (the agent runs its tools off the event loop), so its use is
+    serialized by a lock kept in the session's info.
+    """
+    if db is None:
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+        return
+    with db.info.setdefault("lock", threading.RLock()):
+        yield db
+
+def get_pool_stats() -> Dict[str, Any]:
+    """Get the checkout, wait-time and saturation metrics of the sync and async connection pools."""
+    return {
+        "sync": pool_metrics.stats(engine.pool),
+        "async": async_pool_metrics.stats(async_engine.sync_engine.pool),
+    }
+
 # Create a Base class for our models to inherit from
 # All of our database models (tables) will be created from this class.
 Base = declarative_base()
@@ -1,10 +1,13 @@
 import logging
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.api.v1.api import api_router
 from app.core.config import settings
 from app.db.initial_data import init_db
+from app.db.session import get_pool_stats
+from app.models.user import User
+from app.services import auth_service, llm_service
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -43,5 +46,29 @@ def read_root():
     """
     return {"message": "Welcome to the Doc Demo API!"}
 
+@app.get("/metrics/db-pool", tags=["Metrics"])
+def read_db_pool_metrics(current_user: User = Depends(auth_service.get_current_user)):
+    """
+    Checkout counts, checkout wait times and saturation (connections in use out of pool size plus
+    overflow) of the sync and async database connection pools. Requires a logged-in user.
+    """
+    return get_pool_stats()
+
+@app.get("/metrics/completion-cache", tags=["Metrics"])
+def read_completion_cache_metrics(current_user: User = Depends(auth_service.get_current_user)):
+    """
+    Size and hit/miss counters of the agent's cache of answers to opening prompts.
+    Requires a logged-in user.
+    """
+    return llm_service.get_completion_cache_stats()
+
+@app.get("/metrics/conversations", tags=["Metrics"])
+def read_conversation_store_metrics(current_user: User = Depends(auth_service.get_current_user)):
+    """
+    Size and eviction counters of the agent's conversation memory (LRU, TTL and message-cap evictions).
+    Requires a logged-in user.
+    """
+    return llm_service.get_conversation_store_stats()
+
 # Include the API router
 app.include_router(api_router, prefix=settings.API_V1_STR)
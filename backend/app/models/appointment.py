@@ -1,5 +1,5 @@
 import enum
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum, Index, DDL, event
 from sqlalchemy.orm import relationship
 from app.db.session import Base
 
@@ -30,5 +30,67 @@ class Appointment(Base):
     patient = relationship("User", foreign_keys=[patient_id], back_populates="appointments_as_patient")
     doctor = relationship("User", foreign_keys=[doctor_id], back_populates="appointments_as_doctor")
 
+    # Every hot query filters on one of these and a start_time range: a doctor's or a patient's
+    # schedule, and the scheduled appointments of all doctors in a date range
+    __table_args__ = (
+        Index("ix_appointments_doctor_id_start_time", "doctor_id", "start_time"),
+        Index("ix_appointments_patient_id_start_time", "patient_id", "start_time"),
+        Index("ix_appointments_status_start_time", "status", "start_time"),
+    )
+
     def __repr__(self):
         return f"<Appointment(id={self.id}, from={self.start_time}, status='{self.status}')>"
+
+
+# Overlapping scheduled appointments are rejected by the database itself, for the doctor and for the
+# patient, so the insert is the availability check and concurrent bookings cannot both succeed.
+# The constraint names double as the error messages, which crud_appointment maps to a structured conflict.
+DOCTOR_OVERLAP_CONSTRAINT = "appointments_doctor_no_overlap"
+PATIENT_OVERLAP_CONSTRAINT = "appointments_patient_no_overlap"
+# Enum columns store the member name
+_SCHEDULED = AppointmentStatus.SCHEDULED.name
+
+# The DDL of the guard, by dialect. Every statement skips what already exists, so the same DDL runs
+# when create_all makes the table and in the 0005_appointment_overlap_guard migration.
+# PostgreSQL: exclusion constraints on the half-open [start_time, end_time) range, so back-to-back slots do not clash
+_POSTGRESQL_OVERLAP_GUARD = ["CREATE EXTENSION IF NOT EXISTS btree_gist"] + [
+    f"DO $$ BEGIN IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = '{_constraint}') THEN "
+    f"ALTER TABLE appointments ADD CONSTRAINT {_constraint} "
+    f"EXCLUDE USING gist ({_column} WITH =, tsrange(start_time, end_time) WITH &&) "
+    f"WHERE (status = '{_SCHEDULED}'); END IF; END $$"
+    for _column, _constraint in (("doctor_id", DOCTOR_OVERLAP_CONSTRAINT), ("patient_id", PATIENT_OVERLAP_CONSTRAINT))
+]
+
+# SQLite has no exclusion constraints; triggers abort the same inserts and updates instead
+_SQLITE_OVERLAP_CHECKS = f"""
+    SELECT RAISE(ABORT, '{DOCTOR_OVERLAP_CONSTRAINT}') WHERE NEW.status = '{_SCHEDULED}' AND EXISTS (
+        SELECT 1 FROM appointments WHERE doctor_id = NEW.doctor_id AND status = '{_SCHEDULED}'
+        AND start_time < NEW.end_time AND end_time > NEW.start_time AND id IS NOT NEW.id
+    );
+    SELECT RAISE(ABORT, '{PATIENT_OVERLAP_CONSTRAINT}') WHERE NEW.status = '{_SCHEDULED}' AND EXISTS (
+        SELECT 1 FROM appointments WHERE patient_id = NEW.patient_id AND status = '{_SCHEDULED}'
+        AND start_time < NEW.end_time AND end_time > NEW.start_time AND id IS NOT NEW.id
+    );
+"""
+_SQLITE_OVERLAP_GUARD = [
+    f"CREATE TRIGGER IF NOT EXISTS appointments_no_overlap_insert BEFORE INSERT ON appointments BEGIN {_SQLITE_OVERLAP_CHECKS} END",
+    "CREATE TRIGGER IF NOT EXISTS appointments_no_overlap_update "
+    "BEFORE UPDATE OF doctor_id, patient_id, start_time, end_time, status ON appointments "
+    f"BEGIN {_SQLITE_OVERLAP_CHECKS} END",
+]
+
+OVERLAP_GUARD_DDL = {"postgresql": _POSTGRESQL_OVERLAP_GUARD, "sqlite": _SQLITE_OVERLAP_GUARD}
+OVERLAP_GUARD_DROP_DDL = {
+    "postgresql": [
+        f"ALTER TABLE appointments DROP CONSTRAINT IF EXISTS {_constraint}"
+        for _constraint in (DOCTOR_OVERLAP_CONSTRAINT, PATIENT_OVERLAP_CONSTRAINT)
+    ],
+    "sqlite": [
+        "DROP TRIGGER IF EXISTS appointments_no_overlap_insert",
+        "DROP TRIGGER IF EXISTS appointments_no_overlap_update",
+    ],
+}
+
+for _dialect, _statements in OVERLAP_GUARD_DDL.items():
+    for _statement in _statements:
+        event.listen(Appointment.__table__, "after_create", DDL(_statement).execute_if(dialect=_dialect))
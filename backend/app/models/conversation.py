@@ -0,0 +1,36 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index
+from sqlalchemy.sql import func
+from app.db.session import Base
+
+class ConversationMessage(Base):
+    """
+    Database model for a single message of an agent conversation.
+    Messages are append-only; the newest ones are read back through the (user_id, id) index.
+    """
+    __tablename__ = "conversation_messages"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    role = Column(String(20), nullable=False)
+    payload = Column(Text, nullable=False)  # The full chat message serialized as JSON
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_conversation_messages_user_id_id", "user_id", "id"),
+    )
+
+    def __repr__(self):
+        return f"<ConversationMessage(id={self.id}, user_id={self.user_id}, role='{self.role}')>"
+
+class ConversationContext(Base):
+    """
+    Database model for the context the agent extracted from a user's conversation (one row per user).
+    """
+    __tablename__ = "conversation_contexts"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    context = Column(Text, nullable=False)  # JSON object
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<ConversationContext(user_id={self.user_id})>"
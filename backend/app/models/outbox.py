@@ -0,0 +1,59 @@
+import enum
+from datetime import datetime
+from sqlalchemy import Column, Integer, Text, DateTime, ForeignKey, Enum, Index
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from app.db.session import Base
+
+class OutboxEventType(str, enum.Enum):
+    """
+    Enumeration for the side effects of a booking that run outside the request.
+    """
+    CALENDAR_EVENT = "calendar_event"
+    CONFIRMATION_EMAIL = "confirmation_email"
+
+class OutboxStatus(str, enum.Enum):
+    """
+    Enumeration for outbox event statuses.
+    """
+    PENDING = "pending"
+    PROCESSING = "processing"
+    DONE = "done"
+    DEAD = "dead"  # Gave up after the maximum number of attempts
+
+class OutboxEvent(Base):
+    """
+    Database model for a side effect (calendar event, email) written in the same transaction
+    as the appointment it belongs to and carried out later by the outbox worker.
+    """
+    __tablename__ = "outbox_events"
+
+    id = Column(Integer, primary_key=True, index=True)
+    # Either an appointment or a recurring appointment series
+    appointment_id = Column(Integer, ForeignKey("appointments.id"), nullable=True, index=True)
+    series_id = Column(Integer, ForeignKey("appointment_series.id"), nullable=True, index=True)
+    event_type = Column(Enum(OutboxEventType), nullable=False)
+    payload = Column(Text, nullable=False, default="{}")  # JSON object with handler options
+    status = Column(Enum(OutboxStatus), nullable=False, default=OutboxStatus.PENDING)
+    attempts = Column(Integer, nullable=False, default=0)
+    # When the event is next due; while PROCESSING, when the worker's claim expires
+    next_attempt_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    last_error = Column(Text, nullable=True)
+    result = Column(Text, nullable=True)  # e.g. the calendar event link
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    appointment = relationship("Appointment")
+    series = relationship("AppointmentSeries")
+
+    __table_args__ = (
+        Index("ix_outbox_events_status_next_attempt_at", "status", "next_attempt_at"),
+    )
+
+    @property
+    def subject_key(self):
+        """Identifies what the event is about, for keying batched side effects: the appointment ID, or "series-<id>"."""
+        return self.appointment_id if self.appointment_id is not None else f"series-{self.series_id}"
+
+    def __repr__(self):
+        return f"<OutboxEvent(id={self.id}, type='{self.event_type}', status='{self.status}')>"
@@ -0,0 +1,78 @@
+import enum
+from sqlalchemy import Column, Integer, String, Date, Time, DateTime, ForeignKey, Enum, Index
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from app.db.session import Base
+
+class ScheduleRuleKind(str, enum.Enum):
+    """
+    Enumeration for the weekly rules of a schedule template.
+    """
+    WORKING = "working"
+    BREAK = "break"
+
+class ScheduleExceptionKind(str, enum.Enum):
+    """
+    Enumeration for the dated exceptions of a schedule template.
+    """
+    UNAVAILABLE = "unavailable"  # Time off; without start and end times, the whole day
+    EXTRA_HOURS = "extra_hours"
+
+class DoctorSchedule(Base):
+    """
+    Database model for a doctor's schedule template: weekly working hours and breaks,
+    the slot length, and dated exceptions. Doctors without one work 09:00-17:00 every day in 30-minute slots.
+    """
+    __tablename__ = "doctor_schedules"
+
+    id = Column(Integer, primary_key=True, index=True)
+    doctor_id = Column(Integer, ForeignKey("users.id"), nullable=False, unique=True)
+    slot_minutes = Column(Integer, nullable=False, default=30)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    rules = relationship("ScheduleRule", back_populates="schedule", cascade="all, delete-orphan", order_by="ScheduleRule.weekday")
+    exceptions = relationship("ScheduleException", back_populates="schedule", cascade="all, delete-orphan", order_by="ScheduleException.day")
+
+    def __repr__(self):
+        return f"<DoctorSchedule(id={self.id}, doctor_id={self.doctor_id}, slot_minutes={self.slot_minutes})>"
+
+class ScheduleRule(Base):
+    """
+    Database model for a weekly working-hours block or break of a schedule template.
+    """
+    __tablename__ = "schedule_rules"
+
+    id = Column(Integer, primary_key=True)
+    schedule_id = Column(Integer, ForeignKey("doctor_schedules.id", ondelete="CASCADE"), nullable=False, index=True)
+    weekday = Column(Integer, nullable=False)  # 0 = Monday ... 6 = Sunday
+    kind = Column(Enum(ScheduleRuleKind), nullable=False, default=ScheduleRuleKind.WORKING)
+    start_time = Column(Time, nullable=False)
+    end_time = Column(Time, nullable=False)
+
+    schedule = relationship("DoctorSchedule", back_populates="rules")
+
+    def __repr__(self):
+        return f"<ScheduleRule(weekday={self.weekday}, kind='{self.kind}', {self.start_time}-{self.end_time})>"
+
+class ScheduleException(Base):
+    """
+    Database model for a dated exception to a schedule template, such as a day off or extra hours.
+    """
+    __tablename__ = "schedule_exceptions"
+
+    id = Column(Integer, primary_key=True)
+    schedule_id = Column(Integer, ForeignKey("doctor_schedules.id", ondelete="CASCADE"), nullable=False)
+    day = Column(Date, nullable=False)
+    kind = Column(Enum(ScheduleExceptionKind), nullable=False, default=ScheduleExceptionKind.UNAVAILABLE)
+    start_time = Column(Time, nullable=True)
+    end_time = Column(Time, nullable=True)
+    reason = Column(String, nullable=True)
+
+    schedule = relationship("DoctorSchedule", back_populates="exceptions")
+
+    __table_args__ = (
+        Index("ix_schedule_exceptions_schedule_id_day", "schedule_id", "day"),
+    )
+
+    def __repr__(self):
+        return f"<ScheduleException(day={self.day}, kind='{self.kind}')>"
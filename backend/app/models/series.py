@@ -0,0 +1,90 @@
+import enum
+from datetime import timedelta
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum, Index, UniqueConstraint
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from app.db.session import Base
+from app.models.appointment import AppointmentStatus
+
+class RecurrenceFrequency(str, enum.Enum):
+    """
+    Enumeration for how often the occurrences of an appointment series repeat.
+    """
+    DAILY = "daily"
+    WEEKLY = "weekly"
+
+class SeriesExceptionKind(str, enum.Enum):
+    """
+    Enumeration for the per-occurrence exceptions of an appointment series.
+    """
+    CANCELLED = "cancelled"
+    RESCHEDULED = "rescheduled"
+
+class AppointmentSeries(Base):
+    """
+    Database model for a recurring appointment, such as weekly physiotherapy, stored as a rule
+    rather than as one row per visit: occurrences are first_start + n * step for n < occurrences.
+    They are expanded when they are queried; only the occurrences that are cancelled or moved get a row.
+    """
+    __tablename__ = "appointment_series"
+
+    id = Column(Integer, primary_key=True, index=True)
+    patient_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    doctor_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    frequency = Column(Enum(RecurrenceFrequency), nullable=False, default=RecurrenceFrequency.WEEKLY)
+    interval = Column(Integer, nullable=False, default=1)  # e.g. 2 with WEEKLY = every other week
+    occurrences = Column(Integer, nullable=False)
+    first_start = Column(DateTime, nullable=False)
+    duration_minutes = Column(Integer, nullable=False, default=30)
+    # From the first start to the last end of all occurrences, rescheduled ones included,
+    # so range queries can find the series without expanding it
+    span_start = Column(DateTime, nullable=False)
+    span_end = Column(DateTime, nullable=False)
+    status = Column(Enum(AppointmentStatus), nullable=False, default=AppointmentStatus.SCHEDULED)
+    notes = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    patient = relationship("User", foreign_keys=[patient_id])
+    doctor = relationship("User", foreign_keys=[doctor_id])
+    exceptions = relationship("SeriesException", back_populates="series", cascade="all, delete-orphan", order_by="SeriesException.original_start")
+
+    __table_args__ = (
+        Index("ix_appointment_series_doctor_id_span_end", "doctor_id", "span_end"),
+        Index("ix_appointment_series_patient_id_span_end", "patient_id", "span_end"),
+    )
+
+    @property
+    def step(self) -> timedelta:
+        """Time between the starts of two consecutive occurrences."""
+        return timedelta(days=self.interval * (7 if self.frequency == RecurrenceFrequency.WEEKLY else 1))
+
+    @property
+    def duration(self) -> timedelta:
+        return timedelta(minutes=self.duration_minutes)
+
+    def __repr__(self):
+        return f"<AppointmentSeries(id={self.id}, from={self.first_start}, {self.occurrences} x {self.frequency})>"
+
+class SeriesException(Base):
+    """
+    Database model for one cancelled or rescheduled occurrence of an appointment series,
+    identified by the start it would have had.
+    """
+    __tablename__ = "appointment_series_exceptions"
+
+    id = Column(Integer, primary_key=True)
+    series_id = Column(Integer, ForeignKey("appointment_series.id", ondelete="CASCADE"), nullable=False)
+    original_start = Column(DateTime, nullable=False)
+    kind = Column(Enum(SeriesExceptionKind), nullable=False, default=SeriesExceptionKind.CANCELLED)
+    # The new times of a rescheduled occurrence
+    start_time = Column(DateTime, nullable=True)
+    end_time = Column(DateTime, nullable=True)
+
+    series = relationship("AppointmentSeries", back_populates="exceptions")
+
+    __table_args__ = (
+        UniqueConstraint("series_id", "original_start", name="uq_appointment_series_exceptions_occurrence"),
+    )
+
+    def __repr__(self):
+        return f"<SeriesException(series_id={self.series_id}, original_start={self.original_start}, kind='{self.kind}')>"
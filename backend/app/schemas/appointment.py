@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from datetime import datetime
-from typing import Optional
+from typing import Any, Dict, List, Optional
 
 from app.models.appointment import AppointmentStatus
 from app.schemas.user import User # To nest user info in appointment response
@@ -16,6 +16,24 @@ class AppointmentCreate(AppointmentBase):
     patient_id: int
     doctor_id: int
 
+# Properties to receive via API when creating many appointments at once
+class AppointmentBulkCreate(BaseModel):
+    appointments: List[AppointmentCreate]
+
+# Outcome of one item of a bulk creation, by its position in the request
+class AppointmentBulkItemResult(BaseModel):
+    index: int
+    success: bool
+    appointment_id: Optional[int] = None
+    conflict: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+# Properties to return to the client after a bulk creation
+class AppointmentBulkResult(BaseModel):
+    created: int
+    failed: int
+    results: List[AppointmentBulkItemResult]
+
 # Properties to receive via API on update
 class AppointmentUpdate(BaseModel):
     start_time: Optional[datetime] = None
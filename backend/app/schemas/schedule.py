@@ -0,0 +1,44 @@
+from pydantic import BaseModel
+from datetime import date, time
+from typing import List, Optional
+
+from app.models.schedule import ScheduleRuleKind, ScheduleExceptionKind
+
+class ScheduleRule(BaseModel):
+    """
+    A weekly working-hours block or break. weekday is 0 (Monday) to 6 (Sunday).
+    """
+    weekday: int
+    kind: ScheduleRuleKind = ScheduleRuleKind.WORKING
+    start_time: time
+    end_time: time
+
+    class Config:
+        orm_mode = True
+
+class ScheduleException(BaseModel):
+    """
+    A dated exception: time off (the whole day when no times are given) or extra hours.
+    """
+    day: date
+    kind: ScheduleExceptionKind = ScheduleExceptionKind.UNAVAILABLE
+    start_time: Optional[time] = None
+    end_time: Optional[time] = None
+    reason: Optional[str] = None
+
+    class Config:
+        orm_mode = True
+
+# Properties to receive via API when a doctor sets their schedule template
+class DoctorScheduleUpdate(BaseModel):
+    slot_minutes: int = 30
+    rules: List[ScheduleRule]
+    exceptions: List[ScheduleException] = []
+
+# Properties to return to the client
+class DoctorSchedule(DoctorScheduleUpdate):
+    id: int
+    doctor_id: int
+
+    class Config:
+        orm_mode = True
@@ -0,0 +1,60 @@
+from pydantic import BaseModel
+from datetime import date, datetime
+from typing import List, Optional
+
+from app.models.appointment import AppointmentStatus
+from app.models.series import RecurrenceFrequency, SeriesExceptionKind
+
+# Properties to receive via API when booking a recurring appointment.
+# The series ends after count occurrences or on until (inclusive), whichever comes first.
+class AppointmentSeriesCreate(BaseModel):
+    patient_id: int
+    doctor_id: int
+    start_time: datetime
+    duration_minutes: int = 30
+    frequency: RecurrenceFrequency = RecurrenceFrequency.WEEKLY
+    interval: int = 1
+    count: Optional[int] = None
+    until: Optional[date] = None
+    notes: Optional[str] = None
+
+# Properties to receive via API to cancel or reschedule one occurrence
+class SeriesExceptionCreate(BaseModel):
+    original_start: datetime
+    kind: SeriesExceptionKind = SeriesExceptionKind.CANCELLED
+    start_time: Optional[datetime] = None  # Required to reschedule
+
+class SeriesException(BaseModel):
+    original_start: datetime
+    kind: SeriesExceptionKind
+    start_time: Optional[datetime] = None
+    end_time: Optional[datetime] = None
+
+    class Config:
+        orm_mode = True
+
+# Properties to return to the client
+class AppointmentSeries(BaseModel):
+    id: int
+    patient_id: int
+    doctor_id: int
+    frequency: RecurrenceFrequency
+    interval: int
+    occurrences: int
+    first_start: datetime
+    duration_minutes: int
+    span_end: datetime
+    status: AppointmentStatus
+    notes: Optional[str] = None
+    exceptions: List[SeriesException] = []
+
+    class Config:
+        orm_mode = True
+
+# One expanded occurrence of a series
+class SeriesOccurrence(BaseModel):
+    series_id: int
+    original_start: datetime
+    start_time: datetime
+    end_time: datetime
+    rescheduled: bool
@@ -8,7 +8,7 @@ from pydantic import BaseModel
 from app.core.config import settings
 from app.crud import crud_user
 from app.models.user import User
-from app.db.session import SessionLocal
+from app.db.session import AsyncSessionLocal, SessionLocal
 
 # This scheme will be used to get the token from the request "Authorization" header
 # CORRECTED THE TOKEN URL HERE
@@ -34,32 +34,57 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
-def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
-    """
-    Dependency to get the current user from a JWT token.
-    - Decodes the token.
-    - Validates the token data.
-    - Fetches the user from the database.
-    - Raises HTTPException if the token is invalid or the user doesn't exist.
-    """
-    credentials_exception = HTTPException(
+def credentials_exception() -> HTTPException:
+    """The 401 error for a missing, invalid or unknown token."""
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+def get_token_email(token: str) -> str:
+    """
+    Decodes a JWT token and returns the email it was issued to.
+    Raises HTTPException if the token is invalid.
+    """
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         email: str = payload.get("sub")
         if email is None:
-            raise credentials_exception
+            raise credentials_exception()
         token_data = TokenData(email=email)
     except JWTError:
-        raise credentials_exception
-    
+        raise credentials_exception()
+    return token_data.email
+
+def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
+    """
+    Dependency to get the current user from a JWT token.
+    - Decodes the token.
+    - Validates the token data.
+    - Fetches the user from the database.
+    - Raises HTTPException if the token is invalid or the user doesn't exist.
+    """
+    email = get_token_email(token)
+
     db = SessionLocal()
-    user = crud_user.get_user_by_email(db, email=token_data.email)
+    user = crud_user.get_user_by_email(db, email=email)
     db.close()
 
     if user is None:
-        raise credentials_exception
+        raise credentials_exception()
+    return user
+
+async def get_current_user_async(token: str = Depends(oauth2_scheme)) -> User:
+    """
+    Async version of get_current_user for async endpoints: fetches the user through the async
+    engine, so the event loop is not blocked and no threadpool thread is used.
+    """
+    email = get_token_email(token)
+
+    async with AsyncSessionLocal() as db:
+        user = await crud_user.get_user_by_email_async(db, email=email)
+
+    if user is None:
+        raise credentials_exception()
     return user
@@ -0,0 +1,226 @@
+from bisect import bisect_left
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# A half-open [start, end) span of time
+Interval = Tuple[datetime, datetime]
+# A half-open [start, end) span within a day; an end of time.max means the end of the day
+TimeRange = Tuple[time, time]
+
+DEFAULT_SLOT_MINUTES = 30
+MINUTES_PER_DAY = 24 * 60
+
+# Internally the engine works on whole minutes counted from datetime.min, so interval arithmetic is integer arithmetic
+_EPOCH = datetime.min
+_ONE_MINUTE = timedelta(minutes=1)
+
+
+def to_minutes(moment: datetime, round_up: bool = False) -> int:
+    """Converts a datetime to minutes since datetime.min, rounding seconds down (or up)."""
+    if moment.tzinfo is not None:
+        moment = moment.replace(tzinfo=None)
+    if round_up:
+        return -((_EPOCH - moment) // _ONE_MINUTE)
+    return (moment - _EPOCH) // _ONE_MINUTE
+
+
+def from_minutes(minutes: int) -> datetime:
+    """Converts minutes since datetime.min back to a datetime."""
+    return _EPOCH + timedelta(minutes=minutes)
+
+
+def day_start_minutes(day: date) -> int:
+    """Minutes since datetime.min at the midnight starting a day."""
+    return (day.toordinal() - 1) * MINUTES_PER_DAY
+
+
+def _time_to_minutes(moment: time, is_end: bool = False) -> int:
+    if is_end and moment == time.max:
+        return MINUTES_PER_DAY
+    return moment.hour * 60 + moment.minute + (1 if is_end and (moment.second or moment.microsecond) else 0)
+
+
+def merge_intervals(intervals: Iterable[Tuple[Any, Any]]) -> List[Tuple[Any, Any]]:
+    """Sorts intervals and merges the ones that overlap or touch."""
+    merged = []
+    for start, end in sorted(intervals):
+        if end <= start:
+            continue
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def subtract_intervals(base: List[Tuple[Any, Any]], removed: List[Tuple[Any, Any]]) -> List[Tuple[Any, Any]]:
+    """
+    Returns the parts of base not covered by removed. Both lists must be sorted and merged
+    (see merge_intervals); the result is too. Runs in one sweep over both lists.
+    """
+    result = []
+    j = 0
+    for start, end in base:
+        while j < len(removed) and removed[j][1] <= start:
+            j += 1
+        k = j
+        cursor = start
+        while k < len(removed) and removed[k][0] < end:
+            if removed[k][0] > cursor:
+                result.append((cursor, removed[k][0]))
+            cursor = max(cursor, removed[k][1])
+            if cursor >= end:
+                break
+            k += 1
+        if cursor < end:
+            result.append((cursor, end))
+    return result
+
+
+class ScheduleTemplate:
+    """
+    A doctor's weekly working hours and breaks, slot length and dated exceptions, as plain values.
+    working_hours and breaks map a weekday (0 = Monday) to time ranges; unavailable and extra_hours
+    map a date to time ranges.
+    """
+
+    def __init__(self, slot_minutes: int = DEFAULT_SLOT_MINUTES,
+                 working_hours: Optional[Dict[int, List[TimeRange]]] = None,
+                 breaks: Optional[Dict[int, List[TimeRange]]] = None,
+                 unavailable: Optional[Dict[date, List[TimeRange]]] = None,
+                 extra_hours: Optional[Dict[date, List[TimeRange]]] = None):
+        self.slot_minutes = slot_minutes
+        self.working_hours = working_hours or {}
+        self.breaks = breaks or {}
+        self.unavailable = unavailable or {}
+        self.extra_hours = extra_hours or {}
+        # weekday -> bookable blocks as minutes of the day, for days without exceptions
+        self._weekly_blocks: Dict[int, List[Tuple[int, int]]] = {}
+
+    @classmethod
+    def from_model(cls, schedule: Any) -> "ScheduleTemplate":
+        """Builds a template from a DoctorSchedule row with its rules and exceptions loaded."""
+        template = cls(slot_minutes=schedule.slot_minutes)
+        for rule in schedule.rules:
+            target = template.breaks if rule.kind.value == "break" else template.working_hours
+            target.setdefault(rule.weekday, []).append((rule.start_time, rule.end_time))
+        for exception in schedule.exceptions:
+            target = template.extra_hours if exception.kind.value == "extra_hours" else template.unavailable
+            time_range = (exception.start_time or time.min, exception.end_time or time.max)
+            target.setdefault(exception.day, []).append(time_range)
+        return template
+
+    def _blocks(self, weekday: int, extra_hours: List[TimeRange], unavailable: List[TimeRange]) -> List[Tuple[int, int]]:
+        blocks = merge_intervals(
+            (_time_to_minutes(start), _time_to_minutes(end, is_end=True))
+            for start, end in self.working_hours.get(weekday, []) + extra_hours
+        )
+        removed = merge_intervals(
+            (_time_to_minutes(start), _time_to_minutes(end, is_end=True))
+            for start, end in self.breaks.get(weekday, []) + unavailable
+        )
+        return subtract_intervals(blocks, removed) if removed else blocks
+
+    def working_minutes(self, day: date) -> List[Tuple[int, int]]:
+        """Returns the bookable blocks of a day in minutes since datetime.min."""
+        weekday = day.weekday()
+        if day in self.unavailable or day in self.extra_hours:
+            blocks = self._blocks(weekday, self.extra_hours.get(day, []), self.unavailable.get(day, []))
+        else:
+            blocks = self._weekly_blocks.get(weekday)
+            if blocks is None:
+                blocks = self._weekly_blocks[weekday] = self._blocks(weekday, [], [])
+        midnight = day_start_minutes(day)
+        return [(midnight + start, midnight + end) for start, end in blocks]
+
+    def working_intervals(self, day: date) -> List[Interval]:
+        """Returns the bookable blocks of a day: working hours and extra hours, minus breaks and time off."""
+        return [(from_minutes(start), from_minutes(end)) for start, end in self.working_minutes(day)]
+
+
+# Used for doctors without a schedule template: 09:00-17:00 every day in 30-minute slots
+DEFAULT_TEMPLATE = ScheduleTemplate(working_hours={weekday: [(time(9), time(17))] for weekday in range(7)})
+
+
+def slot_starts(blocks: List[Tuple[int, int]], free: List[Tuple[int, int]], slot_minutes: int) -> List[int]:
+    """
+    Returns the starts of the slots, laid out every slot_minutes from the start of each block,
+    that lie entirely within a free interval. free must be sorted, merged and within blocks.
+    Works per free interval, so the cost follows the number of free slots rather than all slots.
+    """
+    starts: List[int] = []
+    i = 0
+    for free_start, free_end in free:
+        while blocks[i][1] <= free_start:
+            i += 1
+        anchor = blocks[i][0]
+        # First slot of the block's grid starting at or after free_start
+        first = anchor + -((anchor - free_start) // slot_minutes) * slot_minutes
+        starts.extend(range(first, free_end - slot_minutes + 1, slot_minutes))
+    return starts
+
+
+def booked_minutes(booked: Iterable[Interval]) -> List[Tuple[int, int]]:
+    """Converts booked intervals to sorted, merged minute intervals, widened to whole minutes."""
+    return merge_intervals((to_minutes(start), to_minutes(end, round_up=True)) for start, end in booked)
+
+
+def free_slots_for_day(template: ScheduleTemplate, day: date, booked: Iterable[Interval]) -> List[datetime]:
+    """Returns the start times of a day's free slots: the template's blocks minus the booked intervals."""
+    blocks = template.working_minutes(day)
+    if not blocks:
+        return []
+    free = subtract_intervals(blocks, booked_minutes(booked))
+    return [from_minutes(start) for start in slot_starts(blocks, free, template.slot_minutes)]
+
+
+def iter_free_slot_minutes(template: ScheduleTemplate, booked: List[Tuple[int, int]], start_date: date, end_date: date) -> Iterator[int]:
+    """
+    Lazily yields the free slot starts (minutes since datetime.min) of one doctor over an inclusive
+    date range in time order, computing each day only when the previous one is exhausted.
+    booked must come from booked_minutes().
+    """
+    booked_starts = [start for start, _ in booked]
+    day = start_date
+    while day <= end_date:
+        blocks = template.working_minutes(day)
+        if blocks:
+            first = max(0, bisect_left(booked_starts, blocks[0][0]) - 1)
+            last = bisect_left(booked_starts, blocks[-1][1])
+            free = subtract_intervals(blocks, booked[first:last])
+            yield from slot_starts(blocks, free, template.slot_minutes)
+        day += timedelta(days=1)
+
+
+def compute_availability(templates: Dict[int, ScheduleTemplate], booked: Dict[int, List[Interval]],
+                         start_date: date, end_date: date,
+                         default_template: ScheduleTemplate = DEFAULT_TEMPLATE) -> Dict[int, Dict[date, List[datetime]]]:
+    """
+    Computes the free slots of many doctors over an inclusive date range.
+    templates maps doctor IDs to their templates (doctors without one use default_template); booked maps
+    doctor IDs to their booked intervals. Every doctor in either mapping is included.
+    Returns {doctor_id: {day: [slot starts]}}, leaving out days without free slots.
+    """
+    days = [start_date + timedelta(days=offset) for offset in range((end_date - start_date).days + 1)]
+    availability: Dict[int, Dict[date, List[datetime]]] = {}
+    for doctor_id in sorted(set(templates) | set(booked)):
+        template = templates.get(doctor_id, default_template)
+        doctor_booked = booked_minutes(booked.get(doctor_id, []))
+        booked_starts = [start for start, _ in doctor_booked]
+        doctor_availability = {}
+        for day in days:
+            blocks = template.working_minutes(day)
+            if not blocks:
+                continue
+            # Only the booked intervals that can overlap this day's blocks take part in the subtraction
+            first = max(0, bisect_left(booked_starts, blocks[0][0]) - 1)
+            last = bisect_left(booked_starts, blocks[-1][1])
+            free = subtract_intervals(blocks, doctor_booked[first:last])
+            starts = slot_starts(blocks, free, template.slot_minutes)
+            if starts:
+                midnight = datetime.combine(day, time.min)
+                day_start = day_start_minutes(day)
+                doctor_availability[day] = [midnight + timedelta(minutes=start - day_start) for start in starts]
+        availability[doctor_id] = doctor_availability
+    return availability
@@ -0,0 +1,167 @@
+import hashlib
+import heapq
+import json
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.crud import crud_appointment, crud_schedule
+from app.db.session import session_scope
+
+from .availability_engine import (DEFAULT_TEMPLATE, ScheduleTemplate, booked_minutes, compute_availability,
+                                  from_minutes, iter_free_slot_minutes, to_minutes)
+from .cache import TTLCache, on_doctors_change, on_schedule_change
+
+# Schedule templates of all doctors, dropped when a doctor or a template changes
+template_cache = TTLCache(max_entries=1, ttl_seconds=settings.TOOL_CACHE_TTL_SECONDS)
+on_doctors_change(template_cache.clear)
+
+# Encoded availability responses by (doctor_id, from, to), dropped on every schedule change
+response_cache = TTLCache(max_entries=settings.AVAILABILITY_CACHE_MAX_ENTRIES, ttl_seconds=settings.AVAILABILITY_CACHE_TTL_SECONDS)
+on_schedule_change(response_cache.clear)
+
+
+def load_schedule_templates(db: Optional[Session] = None) -> Dict[int, ScheduleTemplate]:
+    """Reads every doctor's schedule template from the database, through db when the caller has a session."""
+    with session_scope(db) as db:
+        return {schedule.doctor_id: ScheduleTemplate.from_model(schedule) for schedule in crud_schedule.get_schedules(db)}
+
+
+def get_schedule_templates(db: Optional[Session] = None) -> Dict[int, ScheduleTemplate]:
+    """Returns the schedule templates by doctor ID."""
+    return template_cache.get_or_set("all", lambda: load_schedule_templates(db))
+
+
+def get_schedule_template(doctor_id: int, db: Optional[Session] = None) -> ScheduleTemplate:
+    """Returns a doctor's schedule template, or the default 09:00-17:00 template if they have none."""
+    return get_schedule_templates(db).get(doctor_id, DEFAULT_TEMPLATE)
+
+
+def compute_range_availability(db: Session, start_date: date, end_date: date, doctor_id: Optional[int] = None) -> Dict[int, Dict[str, Any]]:
+    """
+    Computes the free slots of every doctor (or just doctor_id) over an inclusive date range from a
+    single range query. Returns {doctor_id: {"full_name", "template", "booked", "days"}}, where booked
+    lists the scheduled (start, end) intervals read and days maps each date to its free slot starts.
+    """
+    rows = crud_appointment.get_booked_times_for_all_doctors(db, start_date=start_date, end_date=end_date, doctor_id=doctor_id)
+
+    doctors: Dict[int, Dict[str, Any]] = {}
+    for row_doctor_id, full_name, booked_start, booked_end in rows:
+        doctor = doctors.setdefault(row_doctor_id, {"full_name": full_name, "booked": []})
+        if booked_start is not None:
+            doctor["booked"].append((booked_start, booked_end))
+
+    templates = get_schedule_templates(db)
+    for row_doctor_id, doctor in doctors.items():
+        doctor["template"] = templates.get(row_doctor_id, DEFAULT_TEMPLATE)
+    availability = compute_availability(
+        {row_doctor_id: doctor["template"] for row_doctor_id, doctor in doctors.items()},
+        {row_doctor_id: doctor["booked"] for row_doctor_id, doctor in doctors.items()},
+        start_date, end_date
+    )
+    for row_doctor_id, doctor in doctors.items():
+        doctor["days"] = availability.get(row_doctor_id, {})
+    return doctors
+
+
+def find_earliest_slots(db: Session, after: datetime, count: int, doctor_filter: Optional[List[int]] = None,
+                        window_days: int = settings.EARLIEST_SLOT_WINDOW_DAYS,
+                        max_days: int = settings.EARLIEST_SLOT_MAX_DAYS) -> List[Dict[str, Any]]:
+    """
+    Returns the first count free slots starting at or after after, across all doctors (or the doctors
+    in doctor_filter), in time order: [{"doctor_id", "full_name", "start_time"}].
+    Bookings are read one bounded window at a time, one range query per window, with the window
+    doubling each time it comes up short. Within a window every doctor's free slots are produced
+    lazily, day by day, and merged with a k-way heap merge, so scanning stops as soon as count slots
+    are found instead of computing whole days for every doctor.
+    """
+    found: List[Dict[str, Any]] = []
+    if count <= 0:
+        return found
+    after_minutes = to_minutes(after, round_up=True)
+    window_start = after.date()
+    horizon = window_start + timedelta(days=max_days - 1)
+    templates = get_schedule_templates(db)
+
+    while len(found) < count and window_start <= horizon:
+        window_end = min(window_start + timedelta(days=window_days - 1), horizon)
+        rows = crud_appointment.get_booked_times_for_all_doctors(db, start_date=window_start, end_date=window_end, doctor_ids=doctor_filter)
+        names: Dict[int, str] = {}
+        booked: Dict[int, List[Tuple[datetime, datetime]]] = {}
+        for doctor_id, full_name, booked_start, booked_end in rows:
+            names[doctor_id] = full_name
+            intervals = booked.setdefault(doctor_id, [])
+            if booked_start is not None:
+                intervals.append((booked_start, booked_end))
+        if not names:
+            break
+
+        def doctor_slots(doctor_id: int) -> Iterator[Tuple[int, int]]:
+            template = templates.get(doctor_id, DEFAULT_TEMPLATE)
+            for start in iter_free_slot_minutes(template, booked_minutes(booked[doctor_id]), window_start, window_end):
+                if start >= after_minutes:
+                    yield start, doctor_id
+
+        for start, doctor_id in heapq.merge(*(doctor_slots(doctor_id) for doctor_id in sorted(names))):
+            found.append({"doctor_id": doctor_id, "full_name": names[doctor_id], "start_time": from_minutes(start)})
+            if len(found) == count:
+                break
+
+        window_start = window_end + timedelta(days=1)
+        window_days *= 2
+    return found
+
+
+def run_length_encode(slots: List[datetime], slot_minutes: int) -> List[List[Any]]:
+    """
+    Encodes sorted slot starts as [["HH:MM", count], ...]: each run starts at a time and covers
+    count back-to-back slots of slot_minutes.
+    """
+    runs: List[List[Any]] = []
+    step = timedelta(minutes=slot_minutes)
+    previous = None
+    for slot in slots:
+        if previous is not None and slot - previous == step:
+            runs[-1][1] += 1
+        else:
+            runs.append([slot.strftime("%H:%M"), 1])
+        previous = slot
+    return runs
+
+
+def build_availability_payload(db: Session, start_date: date, end_date: date, doctor_id: Optional[int] = None) -> Dict[str, Any]:
+    """Builds the run-length-encoded availability document of the REST endpoints."""
+    doctors = compute_range_availability(db, start_date, end_date, doctor_id=doctor_id)
+    return {
+        "from": start_date.isoformat(),
+        "to": end_date.isoformat(),
+        "doctors": [
+            {
+                "id": row_doctor_id,
+                "full_name": doctor["full_name"],
+                "slot_minutes": doctor["template"].slot_minutes,
+                "days": {
+                    day.isoformat(): run_length_encode(slots, doctor["template"].slot_minutes)
+                    for day, slots in doctor["days"].items()
+                },
+            }
+            for row_doctor_id, doctor in doctors.items()
+        ],
+    }
+
+
+def get_availability_document(db: Session, start_date: date, end_date: date, doctor_id: Optional[int] = None) -> Tuple[bytes, str, int]:
+    """
+    Returns (JSON body, ETag, number of doctors) of an availability document, reusing the encoded
+    response while the schedule has not changed. The ETag is a hash of the body, so it is the same
+    on every worker that computes the same availability.
+    """
+    def encode() -> Tuple[bytes, str, int]:
+        payload = build_availability_payload(db, start_date, end_date, doctor_id=doctor_id)
+        body = json.dumps(payload, separators=(",", ":")).encode()
+        etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+        return body, etag, len(payload["doctors"])
+
+    return response_cache.get_or_set((doctor_id, start_date, end_date), encode)
@@ -0,0 +1,168 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Hashable, Optional
+
+# Version stamp of the doctor/appointment data. It is bumped on every schedule change,
+# so cache keys that include it stop matching as soon as the data they were built from changes.
+# The stamp is per process; entry TTLs bound how long changes made by other workers can go unseen.
+_schedule_version = 0
+_schedule_lock = threading.Lock()
+_schedule_listeners = []
+
+
+def get_schedule_version() -> int:
+    """Returns the current version stamp of the doctor/appointment data."""
+    return _schedule_version
+
+
+def bump_schedule_version():
+    """Marks the doctor/appointment data as changed and notifies the registered caches."""
+    global _schedule_version
+    with _schedule_lock:
+        _schedule_version += 1
+    for listener in _schedule_listeners:
+        listener()
+
+
+def on_schedule_change(listener):
+    """Registers a callable to run whenever the schedule version is bumped."""
+    _schedule_listeners.append(listener)
+
+
+_appointment_listeners = []
+_doctor_listeners = []
+
+
+def on_appointment_change(listener):
+    """Registers a callable(doctor_id, day) to run when a doctor's appointments on a day change."""
+    _appointment_listeners.append(listener)
+
+
+def on_doctors_change(listener):
+    """Registers a callable to run when the set of doctors changes."""
+    _doctor_listeners.append(listener)
+
+
+def notify_appointment_change(doctor_id: int, day: date):
+    """Invalidates what was cached for a doctor's schedule on a day, and bumps the schedule version."""
+    for listener in _appointment_listeners:
+        listener(doctor_id, day)
+    bump_schedule_version()
+
+
+_booking_listeners = []
+_release_listeners = []
+
+
+def on_appointment_booked(listener):
+    """Registers a callable(doctor_id, start_time, end_time) to run when a scheduled appointment is added."""
+    _booking_listeners.append(listener)
+
+
+def on_appointment_released(listener):
+    """Registers a callable(doctor_id, start_time, end_time) to run when a scheduled appointment is cancelled or moved away."""
+    _release_listeners.append(listener)
+
+
+def notify_appointment_booked(doctor_id: int, start_time: datetime, end_time: datetime):
+    """Reports a newly scheduled appointment interval, then invalidates its day like notify_appointment_change."""
+    for listener in _booking_listeners:
+        listener(doctor_id, start_time, end_time)
+    notify_appointment_change(doctor_id, start_time.date())
+
+
+def notify_appointment_released(doctor_id: int, start_time: datetime, end_time: datetime):
+    """Reports an appointment interval that is no longer scheduled, then invalidates its day like notify_appointment_change."""
+    for listener in _release_listeners:
+        listener(doctor_id, start_time, end_time)
+    notify_appointment_change(doctor_id, start_time.date())
+
+
+def notify_doctors_change():
+    """Invalidates what was cached about the list of doctors, and bumps the schedule version."""
+    for listener in _doctor_listeners:
+        listener()
+    bump_schedule_version()
+
+
+class TTLCache:
+    """
+    Thread-safe key/value cache with a time-to-live per entry and a maximum size.
+    When full, the least recently used entry is evicted. Hit/miss/eviction counters are kept for stats().
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        # key -> (value, expires_at), ordered from least to most recently used
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Returns the cached value for key, or None if it is missing or expired."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key: Hashable, value: Any):
+        """Stores value under key, evicting the least recently used entries when full."""
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_set(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """
+        Read-through lookup: returns the cached value for key, or computes and caches it on a miss.
+        The value is not cached if the schedule version changed while it was being computed.
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+        version = get_schedule_version()
+        value = compute()
+        if get_schedule_version() == version:
+            self.set(key, value)
+        return value
+
+    def invalidate(self, key: Hashable):
+        """Removes a single entry."""
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self.invalidations += 1
+
+    def clear(self):
+        """Removes every entry."""
+        with self._lock:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Reports the cache size and its hit/miss/eviction counters."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
@@ -0,0 +1,82 @@
+import logging
+from typing import Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Every turn adds a system message with this marker in place of the previous turn's; only the newest one is sent to the LLM
+CONTEXT_SUMMARY_MARKER = "CONVERSATION CONTEXT:"
+
+
+def _field(message: Any, name: str) -> Any:
+    """Reads a field of a chat message, whether it is a plain dict or a Groq message object."""
+    if isinstance(message, dict):
+        return message.get(name)
+    return getattr(message, name, None)
+
+
+def is_context_summary(message: Any) -> bool:
+    """Returns True for the per-turn CONVERSATION CONTEXT system messages."""
+    return _field(message, "role") == "system" and CONTEXT_SUMMARY_MARKER in (_field(message, "content") or "")
+
+
+def estimate_tokens(messages: List[Any]) -> int:
+    """
+    Approximates the prompt tokens of a list of messages (about 4 characters per token,
+    plus a few tokens of framing per message). Good enough for budgeting without a tokenizer.
+    """
+    characters = 0
+    for message in messages:
+        characters += len(_field(message, "content") or "")
+        for tool_call in _field(message, "tool_calls") or []:
+            function = _field(tool_call, "function")
+            characters += len(_field(function, "name") or "") + len(_field(function, "arguments") or "")
+    return characters // 4 + 4 * len(messages)
+
+
+def _shorten_tool_result(message: Any, max_chars: int) -> Any:
+    content = _field(message, "content") or ""
+    if len(content) <= max_chars:
+        return message
+    shortened = dict(message) if isinstance(message, dict) else message.model_dump(exclude_none=True)
+    shortened["content"] = content[:max_chars] + f"... [{len(content) - max_chars} characters of an earlier tool result omitted]"
+    return shortened
+
+
+def build_request_messages(messages: List[Any], token_budget: int, tool_result_max_chars: int, user_id: Optional[int] = None) -> List[Any]:
+    """
+    Builds the message list sent to the LLM from the full conversation, without modifying it:
+    - the leading system prompt is kept unchanged as a fixed prefix
+    - only the newest CONVERSATION CONTEXT message is kept; older ones are dropped
+    - tool results from earlier turns are shortened to tool_result_max_chars
+    - if still over token_budget, the oldest earlier turns are dropped whole
+    The current turn (from the last user message on) is never trimmed.
+    """
+    if not messages:
+        return messages
+
+    tokens_before = estimate_tokens(messages)
+
+    prefix = messages[:1] if _field(messages[0], "role") == "system" and not is_context_summary(messages[0]) else []
+    body = messages[len(prefix):]
+
+    last_summary = max((i for i, message in enumerate(body) if is_context_summary(message)), default=None)
+    body = [message for i, message in enumerate(body) if not is_context_summary(message) or i == last_summary]
+
+    current_turn_start = max((i for i, message in enumerate(body) if _field(message, "role") == "user"), default=0)
+    history = [
+        _shorten_tool_result(message, tool_result_max_chars) if _field(message, "role") == "tool" else message
+        for message in body[:current_turn_start]
+    ]
+    current_turn = body[current_turn_start:]
+
+    # Drop whole earlier turns, oldest first, until the request fits the budget
+    while history and estimate_tokens(prefix + history + current_turn) > token_budget:
+        next_turn = next((i for i, message in enumerate(history) if i > 0 and _field(message, "role") == "user"), len(history))
+        history = history[next_turn:]
+
+    request_messages = prefix + history + current_turn
+    logger.info(
+        "LLM context for user %s: %d -> %d estimated tokens (%d -> %d messages, budget %d)",
+        user_id, tokens_before, estimate_tokens(request_messages), len(messages), len(request_messages), token_budget
+    )
+    return request_messages
@@ -0,0 +1,230 @@
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.crud import crud_conversation
+from app.db.session import SessionLocal
+
+
+def _message_role(message: Any) -> Optional[str]:
+    """Returns the role of a chat message, whether it is a plain dict or a Groq message object."""
+    if isinstance(message, dict):
+        return message.get("role")
+    return getattr(message, "role", None)
+
+
+def message_to_dict(message: Any) -> Dict[str, Any]:
+    """Converts a Groq message object into the plain dict form accepted by the chat completions API."""
+    if isinstance(message, dict):
+        return message
+    return message.model_dump(exclude_none=True)
+
+
+def trim_messages(messages: List[Any], max_messages: int) -> List[Any]:
+    """
+    Keeps at most max_messages of a conversation: the leading system prompt plus the newest messages.
+    Tool results left at the front without the assistant message that requested them are dropped.
+    """
+    if not messages:
+        return messages
+
+    head = messages[:1] if _message_role(messages[0]) == "system" else []
+    tail = messages[max(len(head), len(messages) - (max_messages - len(head))):]
+    # A tool result is only valid right after the assistant message that requested it
+    while tail and _message_role(tail[0]) == "tool":
+        tail = tail[1:]
+    return head + tail
+
+
+class ConversationBackend(ABC):
+    """
+    Interface for the storage behind the agent's conversation memory.
+    - load() returns a working copy of the recent messages and the context of a user.
+    - append() stores only the messages added during a turn, plus the updated context.
+    """
+
+    @abstractmethod
+    def load(self, user_id: int) -> Tuple[List[Any], Dict[str, Any]]:
+        """Returns the (messages, context) of a user, or ([], {}) if no conversation is stored."""
+
+    @abstractmethod
+    def append(self, user_id: int, new_messages: List[Any], context: Dict[str, Any]):
+        """Stores the messages added during a turn and replaces the context."""
+
+    @abstractmethod
+    def summary(self, user_id: int) -> Dict[str, Any]:
+        """Returns the context and message count of a user."""
+
+    @abstractmethod
+    def clear(self, user_id: int):
+        """Removes the conversation of a user."""
+
+    @abstractmethod
+    def stats(self) -> Dict[str, Any]:
+        """Reports the size and configuration of the store."""
+
+
+class ConversationStore(ConversationBackend):
+    """
+    Bounded in-memory store for the agent's per-user conversation state.
+    - Holds at most max_users conversations and evicts the least recently used one when full.
+    - Drops conversations that have been idle for longer than ttl_seconds.
+    - Keeps at most max_messages messages per user, always preserving the leading system prompt.
+    """
+
+    def __init__(self, max_users: int, ttl_seconds: int, max_messages: int):
+        self.max_users = max(1, max_users)
+        self.ttl_seconds = ttl_seconds
+        self.max_messages = max(2, max_messages)
+        # user_id -> (messages, context, last_access), ordered from least to most recently used
+        self._entries: "OrderedDict[int, Tuple[List[Any], Dict[str, Any], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.lru_evictions = 0
+        self.ttl_evictions = 0
+        self.trimmed_messages = 0
+
+    def _is_expired(self, last_access: float, now: float) -> bool:
+        return self.ttl_seconds > 0 and now - last_access > self.ttl_seconds
+
+    def _purge_expired(self, now: float):
+        # Entries are kept in access order, so expired ones are always at the front
+        while self._entries:
+            user_id, (_, _, last_access) = next(iter(self._entries.items()))
+            if not self._is_expired(last_access, now):
+                break
+            del self._entries[user_id]
+            self.ttl_evictions += 1
+
+    def load(self, user_id: int) -> Tuple[List[Any], Dict[str, Any]]:
+        """Returns the (messages, context) of a user, starting a fresh conversation if none is stored."""
+        now = time.monotonic()
+        with self._lock:
+            self._purge_expired(now)
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return [], {}
+            self._entries[user_id] = (entry[0], entry[1], now)
+            self._entries.move_to_end(user_id)
+            return list(entry[0]), dict(entry[1])
+
+    def append(self, user_id: int, new_messages: List[Any], context: Dict[str, Any]):
+        """Adds the messages of a turn, applying the message cap and evicting old conversations."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            messages = (entry[0] if entry else []) + list(new_messages)
+            trimmed = trim_messages(messages, self.max_messages)
+            self.trimmed_messages += len(messages) - len(trimmed)
+
+            self._entries[user_id] = (trimmed, context, now)
+            self._entries.move_to_end(user_id)
+            self._purge_expired(now)
+            while len(self._entries) > self.max_users:
+                self._entries.popitem(last=False)
+                self.lru_evictions += 1
+
+    def summary(self, user_id: int) -> Dict[str, Any]:
+        """Returns the context and message count of a user without refreshing its LRU position."""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or self._is_expired(entry[2], time.monotonic()):
+                return {'context': {}, 'message_count': 0}
+            return {'context': entry[1], 'message_count': len(entry[0])}
+
+    def clear(self, user_id: int):
+        """Removes the conversation of a user."""
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Reports the current size of the store and how many conversations/messages it has dropped."""
+        with self._lock:
+            return {
+                "backend": "memory",
+                "users": len(self._entries),
+                "messages": sum(len(messages) for messages, _, _ in self._entries.values()),
+                "max_users": self.max_users,
+                "lru_evictions": self.lru_evictions,
+                "ttl_evictions": self.ttl_evictions,
+                "trimmed_messages": self.trimmed_messages,
+            }
+
+
+class SQLConversationStore(ConversationBackend):
+    """
+    Database-backed conversation store, shared by every worker process.
+    - Each message is one append-only row; a turn inserts only its new messages.
+    - load() reads just the system prompt and the newest max_messages rows through the (user_id, id) index.
+    - A conversation idle for longer than ttl_seconds is deleted on its next load, so it starts afresh.
+    """
+
+    def __init__(self, max_messages: int, ttl_seconds: int = 0):
+        self.max_messages = max(2, max_messages)
+        self.ttl_seconds = ttl_seconds
+        self.ttl_evictions = 0
+
+    def _is_expired(self, db: Session, user_id: int) -> bool:
+        if self.ttl_seconds <= 0:
+            return False
+        last_message_time = crud_conversation.get_last_message_time(db, user_id=user_id)
+        if last_message_time is None:
+            return False
+        # SQLite hands back the stored UTC time without a timezone
+        if last_message_time.tzinfo is None:
+            last_message_time = last_message_time.replace(tzinfo=timezone.utc)
+        return (datetime.now(timezone.utc) - last_message_time).total_seconds() > self.ttl_seconds
+
+    def load(self, user_id: int) -> Tuple[List[Any], Dict[str, Any]]:
+        db = SessionLocal()
+        try:
+            if self._is_expired(db, user_id):
+                crud_conversation.delete_conversation(db, user_id=user_id)
+                self.ttl_evictions += 1
+                return [], {}
+            messages = crud_conversation.get_recent_messages(db, user_id=user_id, limit=self.max_messages)
+            if messages and _message_role(messages[0]) != "system":
+                first_message = crud_conversation.get_first_message(db, user_id=user_id)
+                if first_message and _message_role(first_message) == "system":
+                    messages = [first_message] + messages
+            context = crud_conversation.get_context(db, user_id=user_id)
+            return trim_messages(messages, self.max_messages), context
+        finally:
+            db.close()
+
+    def append(self, user_id: int, new_messages: List[Any], context: Dict[str, Any]):
+        db = SessionLocal()
+        try:
+            crud_conversation.append_turn(
+                db, user_id=user_id,
+                messages=[message_to_dict(message) for message in new_messages],
+                context=context
+            )
+        finally:
+            db.close()
+
+    def summary(self, user_id: int) -> Dict[str, Any]:
+        db = SessionLocal()
+        try:
+            if self._is_expired(db, user_id):
+                return {'context': {}, 'message_count': 0}
+            return {
+                'context': crud_conversation.get_context(db, user_id=user_id),
+                'message_count': crud_conversation.count_messages(db, user_id=user_id)
+            }
+        finally:
+            db.close()
+
+    def clear(self, user_id: int):
+        db = SessionLocal()
+        try:
+            crud_conversation.delete_conversation(db, user_id=user_id)
+        finally:
+            db.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": "sql", "max_messages": self.max_messages, "ttl_evictions": self.ttl_evictions}
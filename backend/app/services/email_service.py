@@ -1,39 +1,237 @@
+import html
+import json
+import smtplib
+import threading
+from email.mime.text import MIMEText
+from string import Template
+from typing import Dict, Hashable, List, Optional
+
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
 from app.core.config import settings
 
-def send_appointment_confirmation(patient_email: str, patient_name: str, doctor_name: str, appointment_time: str):
+CONFIRMATION_SUBJECT = "Your Appointment Confirmation"
+
+# Compiled once at import. $-placeholders are filled per recipient: locally for SMTP, or by
+# Mailgun itself from recipient-variables, so one Mailgun request can carry a whole batch.
+CONFIRMATION_TEMPLATE = Template("""
+<html>
+    <body>
+        <h3>Appointment Confirmed!</h3>
+        <p>Dear $patient_name,</p>
+        <p>This is a confirmation that your appointment with <strong>$doctor_name</strong> has been successfully booked.</p>
+        <p><strong>Time:</strong> $appointment_time</p>
+        <p>Thank you for using our service.</p>
+    </body>
+</html>
+""")
+CONFIRMATION_VARIABLES = ("patient_name", "doctor_name", "appointment_time")
+MAILGUN_CONFIRMATION_HTML = CONFIRMATION_TEMPLATE.substitute({name: f"%recipient.{name}%" for name in CONFIRMATION_VARIABLES})
+
+
+def render_template(template: Template, variables: Dict[str, str]) -> str:
+    """Fills a template with HTML-escaped variables."""
+    return template.substitute({name: html.escape(str(value)) for name, value in variables.items()})
+
+
+class MailgunTransport:
+    """
+    Sends batches through the Mailgun messages API with one pooled HTTP session and explicit
+    connect/read timeouts. Only connection errors are retried here, since the message was never
+    sent; a POST that may have reached Mailgun is left to the outbox's retries.
+    """
+
+    def __init__(self, api_key: str, domain: str, base_url: str = "https://api.mailgun.net/v3",
+                 timeout: tuple = (3, 10), max_retries: int = 3, pool_size: int = 10):
+        self.api_key = api_key
+        self.url = f"{base_url.rstrip('/')}/{domain}/messages"
+        self.timeout = timeout
+        self.session = requests.Session()
+        # The default allowed_methods are the idempotent ones, so a POST is only retried when it failed to connect
+        retry = Retry(total=max_retries, backoff_factor=0.5, allowed_methods=Retry.DEFAULT_ALLOWED_METHODS, raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def send_batch(self, sender: str, subject: str, recipients: Dict[str, Dict[str, str]]) -> Dict[str, str]:
+        """
+        Sends one message to many recipients; Mailgun fills %recipient.*% from each recipient's variables.
+        Mailgun accepts or rejects the whole message, so a failure raises and no recipient fails alone.
+        """
+        response = self.session.post(
+            self.url,
+            auth=("api", self.api_key),
+            data={
+                "from": sender,
+                "to": list(recipients),
+                "subject": subject,
+                "html": MAILGUN_CONFIRMATION_HTML,
+                "recipient-variables": json.dumps({
+                    email: {name: html.escape(str(value)) for name, value in variables.items()}
+                    for email, variables in recipients.items()
+                }),
+            },
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        return {}
+
+
+class SMTPTransport:
+    """
+    Sends batches over one SMTP connection per batch, rendering each recipient's email locally.
+    Each recipient gets a message of their own, so each one succeeds or fails on its own.
+    """
+
+    def __init__(self, host: str, port: int, timeout: float = 10):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+
+    def send_batch(self, sender: str, subject: str, recipients: Dict[str, Dict[str, str]]) -> Dict[str, str]:
+        """Returns the error of each recipient whose message was not accepted; the others were sent."""
+        failed: Dict[str, str] = {}
+        smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            for email, variables in recipients.items():
+                message = MIMEText(render_template(CONFIRMATION_TEMPLATE, variables), "html")
+                message["Subject"] = subject
+                message["From"] = sender
+                message["To"] = email
+                try:
+                    smtp.sendmail(sender, [email], message.as_string())
+                except (smtplib.SMTPException, OSError) as e:
+                    failed[email] = str(e)
+        finally:
+            # The messages are already accepted, so a failed QUIT does not fail them
+            try:
+                smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                smtp.close()
+        return failed
+
+
+class EmailDispatcher:
     """
-    Sends a confirmation email to the patient using the Mailgun API.
-    """
-    if not all([settings.MAILGUN_API_KEY, settings.MAILGUN_DOMAIN, settings.FROM_EMAIL]):
-        print("Warning: Mailgun settings are incomplete. Skipping email.")
-        return {"success": False, "message": "Email service not configured."}
-
-    try:
-        response = requests.post(
-            f"https://api.mailgun.net/v3/{settings.MAILGUN_DOMAIN}/messages",
-            auth=("api", settings.MAILGUN_API_KEY),
-            data={"from": f"Appointment Bot <{settings.FROM_EMAIL}>",
-                  "to": [patient_email],
-                  "subject": "Your Appointment Confirmation",
-                  "html": f"""
-                  <html>
-                      <body>
-                          <h3>Appointment Confirmed!</h3>
-                          <p>Dear {patient_name},</p>
-                          <p>This is a confirmation that your appointment with <strong>{doctor_name}</strong> has been successfully booked.</p>
-                          <p><strong>Time:</strong> {appointment_time}</p>
-                          <p>Thank you for using our service.</p>
-                      </body>
-                  </html>
-                  """})
-        
-        response.raise_for_status()  # Raise an exception for bad status codes (4xx or 5xx)
-        
-        print(f"Email sent to {patient_email}. Status: {response.status_code}")
-        return {"success": True, "message": "Confirmation email sent."}
-
-    except requests.exceptions.RequestException as e:
-        print(f"Error sending email via Mailgun: {e}")
-        return {"success": False, "message": str(e)}
+    Groups confirmation emails into as few transport calls as possible. The transport is
+    anything with send_batch(sender, subject, recipients), so a local stub can stand in for Mailgun.
+    send_batch raises if nothing was sent, and otherwise returns the errors of the recipients whose
+    message was not sent, by address.
+    """
+
+    def __init__(self, transport, sender: str, batch_size: int = 1000):
+        self.transport = transport
+        self.sender = sender
+        self.batch_size = max(1, batch_size)
+
+    def _chunks(self, messages: Dict[Hashable, dict]) -> List[Dict[Hashable, dict]]:
+        # recipient-variables are keyed by address, so one address can appear only once per batch
+        chunks: List[Dict[Hashable, dict]] = []
+        for key, message in messages.items():
+            chunk = next(
+                (chunk for chunk in chunks
+                 if len(chunk) < self.batch_size and all(other["to"] != message["to"] for other in chunk.values())),
+                None
+            )
+            if chunk is None:
+                chunk = {}
+                chunks.append(chunk)
+            chunk[key] = message
+        return chunks
+
+    def send_confirmations(self, messages: Dict[Hashable, dict]) -> Dict[Hashable, dict]:
+        """
+        Sends many appointment confirmations. messages maps a key (e.g. the appointment ID) to
+        {"to": email, "patient_name": ..., "doctor_name": ..., "appointment_time": ...}.
+        Returns {key: {"success": bool, "message": str}} under the same keys.
+        """
+        results: Dict[Hashable, dict] = {}
+        for chunk in self._chunks(messages):
+            recipients = {
+                message["to"]: {name: message[name] for name in CONFIRMATION_VARIABLES}
+                for message in chunk.values()
+            }
+            try:
+                failed = self.transport.send_batch(self.sender, CONFIRMATION_SUBJECT, recipients) or {}
+            except (requests.exceptions.RequestException, smtplib.SMTPException, OSError) as e:
+                print(f"Error sending confirmation emails: {e}")
+                failed = {email: str(e) for email in recipients}
+            else:
+                print(f"Confirmation email sent to {len(recipients) - len(failed)} of {len(recipients)} recipient(s).")
+            # Only the messages that were not sent fail, so the outbox does not send the others again
+            for key, message in chunk.items():
+                if message["to"] in failed:
+                    results[key] = {"success": False, "message": failed[message["to"]]}
+                else:
+                    results[key] = {"success": True, "message": "Confirmation email sent."}
+        return results
+
+
+_dispatcher: Optional[EmailDispatcher] = None
+_dispatcher_lock = threading.Lock()
+
+
+def build_transport():
+    """Builds the transport selected by EMAIL_TRANSPORT, or None if it is not configured."""
+    if settings.EMAIL_TRANSPORT == "smtp":
+        return SMTPTransport(settings.SMTP_HOST, settings.SMTP_PORT, timeout=settings.EMAIL_READ_TIMEOUT_SECONDS)
+    if not all([settings.MAILGUN_API_KEY, settings.MAILGUN_DOMAIN]):
+        return None
+    return MailgunTransport(
+        settings.MAILGUN_API_KEY, settings.MAILGUN_DOMAIN, base_url=settings.MAILGUN_API_BASE_URL,
+        timeout=(settings.EMAIL_CONNECT_TIMEOUT_SECONDS, settings.EMAIL_READ_TIMEOUT_SECONDS),
+        max_retries=settings.EMAIL_MAX_RETRIES, pool_size=settings.EMAIL_POOL_SIZE
+    )
+
+
+def get_email_dispatcher() -> Optional[EmailDispatcher]:
+    """Returns the process-wide dispatcher, or None if email is not configured."""
+    global _dispatcher
+    if _dispatcher is None and settings.FROM_EMAIL:
+        with _dispatcher_lock:
+            if _dispatcher is None:
+                transport = build_transport()
+                if transport is not None:
+                    _dispatcher = EmailDispatcher(
+                        transport, f"Appointment Bot <{settings.FROM_EMAIL}>", batch_size=settings.EMAIL_BATCH_SIZE
+                    )
+    return _dispatcher
 
+
+def set_email_transport(transport, sender: Optional[str] = None):
+    """Replaces the process-wide dispatcher's transport, e.g. with a local stub in tests and benchmarks."""
+    global _dispatcher
+    with _dispatcher_lock:
+        _dispatcher = EmailDispatcher(
+            transport, sender or f"Appointment Bot <{settings.FROM_EMAIL or 'noreply@localhost'}>",
+            batch_size=settings.EMAIL_BATCH_SIZE
+        )
+
+
+def send_appointment_confirmations(messages: Dict[Hashable, dict]) -> Dict[Hashable, dict]:
+    """
+    Sends many confirmation emails in batches. See EmailDispatcher.send_confirmations.
+    Without email settings nothing is sent, and every message is reported as skipped rather than
+    failed, so the outbox does not retry it until it gives up.
+    """
+    dispatcher = get_email_dispatcher()
+    if dispatcher is None:
+        print("Warning: Email settings are incomplete. Skipping email.")
+        return {key: {"success": True, "skipped": True, "message": "Email service not configured."} for key in messages}
+    return dispatcher.send_confirmations(messages)
+
+
+def send_appointment_confirmation(patient_email: str, patient_name: str, doctor_name: str, appointment_time: str):
+    """
+    Sends a confirmation email to the patient.
+    """
+    return send_appointment_confirmations({
+        patient_email: {
+            "to": patient_email,
+            "patient_name": patient_name,
+            "doctor_name": doctor_name,
+            "appointment_time": appointment_time,
+        }
+    })[patient_email]
@@ -1,43 +1,108 @@
 import os
+import json
 import datetime
+import threading
+import httplib2
+from typing import Any, Dict, Hashable, List, Optional
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
+from google_auth_httplib2 import AuthorizedHttp
+from googleapiclient.discovery import build_from_document
+from googleapiclient.discovery_cache import get_static_doc
+from app.core.config import settings
 
 # Define the scope for the Google Calendar API.
 SCOPES = ['https://www.googleapis.com/auth/calendar']
 CREDENTIALS_FILE = 'credentials.json'
 TOKEN_FILE = 'token.json'
+CALENDAR_TIMEOUT_SECONDS = 10
+# Google Calendar accepts at most 50 requests per batch
+CALENDAR_BATCH_LIMIT = 50
+
+# Process-wide Calendar client state. The service object is built once; credentials are
+# refreshed under a lock; each thread gets its own authorized HTTP connection, since httplib2 is not thread-safe.
+_credentials = None
+_credentials_lock = threading.Lock()
+_last_saved_token = None
+_service = None
+_service_lock = threading.Lock()
+_thread_local = threading.local()
+
+def _save_credentials(creds: Credentials):
+    """Writes the token file, but only when the token actually changed."""
+    global _last_saved_token
+    token_json = creds.to_json()
+    if token_json == _last_saved_token:
+        return
+    with open(TOKEN_FILE, 'w') as token:
+        token.write(token_json)
+    _last_saved_token = token_json
+
+def get_credentials() -> Credentials:
+    """
+    Returns the process-wide credentials, loading them from token.json the first time and
+    refreshing them (once, under a lock) when they have expired.
+    """
+    global _credentials, _last_saved_token
+    with _credentials_lock:
+        if _credentials is None and os.path.exists(TOKEN_FILE):
+            with open(TOKEN_FILE) as token:
+                _last_saved_token = token.read()
+            _credentials = Credentials.from_authorized_user_info(json.loads(_last_saved_token), SCOPES)
+
+        if not _credentials or not _credentials.valid:
+            if _credentials and _credentials.expired and _credentials.refresh_token:
+                _credentials.refresh(Request())
+            else:
+                flow = InstalledAppFlow.from_client_secrets_file(CREDENTIALS_FILE, SCOPES)
+                _credentials = flow.run_local_server(port=0)
+            _save_credentials(_credentials)
+
+        return _credentials
+
+def load_discovery_document(api_endpoint: Optional[str] = None) -> dict:
+    """
+    Returns the Calendar v3 discovery document bundled with google-api-python-client.
+    api_endpoint replaces its root URL, e.g. to send requests to a local fake server.
+    """
+    discovery_doc = json.loads(get_static_doc('calendar', 'v3'))
+    if api_endpoint:
+        discovery_doc['rootUrl'] = api_endpoint.rstrip('/') + '/'
+    return discovery_doc
 
 def get_calendar_service():
     """
-    Authenticates with the Google Calendar API and returns a service object.
+    Returns the process-wide Google Calendar service object. It is built once from the bundled
+    discovery document, so no discovery request is ever made.
     """
-    creds = None
-    if os.path.exists(TOKEN_FILE):
-        creds = Credentials.from_authorized_user_file(TOKEN_FILE, SCOPES)
-    
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            creds.refresh(Request())
-        else:
-            flow = InstalledAppFlow.from_client_secrets_file(CREDENTIALS_FILE, SCOPES)
-            creds = flow.run_local_server(port=0)
-        
-        with open(TOKEN_FILE, 'w') as token:
-            token.write(creds.to_json())
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                discovery_doc = load_discovery_document(settings.GOOGLE_CALENDAR_API_ENDPOINT)
+                _service = build_from_document(discovery_doc, credentials=get_credentials())
+    return _service
 
-    service = build('calendar', 'v3', credentials=creds)
-    return service
+def get_authorized_http() -> AuthorizedHttp:
+    """
+    Returns this thread's authorized HTTP connection, with credentials refreshed if needed.
+    Pass it to execute() so concurrent requests never share an httplib2 connection.
+    """
+    credentials = get_credentials()
+    http = getattr(_thread_local, 'http', None)
+    if http is None or http.credentials is not credentials:
+        http = AuthorizedHttp(credentials, http=httplib2.Http(timeout=CALENDAR_TIMEOUT_SECONDS))
+        _thread_local.http = http
+    return http
 
-def create_calendar_event(summary: str, start_time: datetime.datetime, end_time: datetime.datetime, attendees: list, timezone: str = "UTC"):
+def build_event_body(summary: str, start_time: datetime.datetime, end_time: datetime.datetime, attendees: list, timezone: str = "UTC",
+                     recurrence: Optional[List[str]] = None) -> dict:
     """
-    Creates a new event on the user's primary Google Calendar with a specific timezone.
+    Builds the Calendar API body of an appointment event. recurrence holds RRULE/EXDATE lines
+    to make it a recurring event; start_time and end_time are then those of the first occurrence.
     """
-    service = get_calendar_service()
-    
-    event = {
+    body = {
         'summary': summary,
         'start': {
             'dateTime': start_time.isoformat(),
@@ -56,11 +121,65 @@ def create_calendar_event(summary: str, start_time: datetime.datetime, end_time:
             ],
         },
     }
+    if recurrence:
+        body['recurrence'] = recurrence
+    return body
+
+def create_calendar_event(summary: str, start_time: datetime.datetime, end_time: datetime.datetime, attendees: list, timezone: str = "UTC"):
+    """
+    Creates a new event on the user's primary Google Calendar with a specific timezone.
+    """
+    event = build_event_body(summary, start_time, end_time, attendees, timezone)
 
     try:
-        created_event = service.events().insert(calendarId='primary', body=event).execute()
+        service = get_calendar_service()
+        created_event = service.events().insert(calendarId='primary', body=event).execute(http=get_authorized_http())
         print(f"Event created: {created_event.get('htmlLink')}")
         return {"success": True, "link": created_event.get('htmlLink')}
     except Exception as e:
         print(f"An error occurred: {e}")
         return {"success": False, "error": str(e)}
+
+def run_calendar_batch(operations: List[Dict[str, Any]], service=None, http=None) -> Dict[Hashable, dict]:
+    """
+    Sends event inserts as Calendar batch requests of up to 50 operations each,
+    instead of one HTTP round trip per event.
+    Each operation is {"key": ..., "body": {...}}.
+    Returns {key: {"success": True, "event_id": ..., "link": ...} or {"success": False, "error": ...}}.
+    service and http default to the process-wide client; pass your own to target a fake endpoint.
+    """
+    service = service or get_calendar_service()
+    results: Dict[Hashable, dict] = {}
+
+    def record_result(request_id, response, exception):
+        key = request_ids[request_id]
+        if exception is not None:
+            results[key] = {"success": False, "error": str(exception)}
+        else:
+            results[key] = {"success": True, "event_id": response.get('id'), "link": response.get('htmlLink')}
+
+    for chunk_start in range(0, len(operations), CALENDAR_BATCH_LIMIT):
+        chunk = operations[chunk_start:chunk_start + CALENDAR_BATCH_LIMIT]
+        request_ids = {}
+        batch = service.new_batch_http_request(callback=record_result)
+        for index, operation in enumerate(chunk):
+            request_id = str(index)
+            request_ids[request_id] = operation["key"]
+            request = service.events().insert(calendarId='primary', body=operation["body"])
+            batch.add(request, request_id=request_id)
+
+        try:
+            batch.execute(http=http or get_authorized_http())
+        except Exception as e:
+            print(f"Calendar batch request failed: {e}")
+            for operation in chunk:
+                results.setdefault(operation["key"], {"success": False, "error": str(e)})
+
+    return results
+
+def create_calendar_events_batch(events: Dict[Hashable, dict], service=None, http=None) -> Dict[Hashable, dict]:
+    """
+    Inserts many events with batch requests. events maps a key (e.g. the appointment ID) to an event
+    body from build_event_body(); the results are returned under the same keys.
+    """
+    return run_calendar_batch([{"key": key, "body": body} for key, body in events.items()], service=service, http=http)
@@ -1,57 +1,106 @@
 import json
-from groq import Groq
+import asyncio
+from groq import Groq, AsyncGroq
 from app.core.config import settings
-from app.crud import crud_user, crud_appointment
-from app.db.session import SessionLocal
+from app.crud import crud_user, crud_appointment, crud_outbox, crud_series
+from app.db.session import session_scope
 from app.models.user import User, UserRole
 from app.models.appointment import Appointment
+from app.models.outbox import OutboxEventType
 from app.schemas.appointment import AppointmentCreate
+from app.schemas.series import AppointmentSeriesCreate
 from datetime import datetime, timedelta, date
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor, Future, wait
+from types import SimpleNamespace
+from sqlalchemy.orm import Session
 import pytz
 import re
+import threading
 
-from .google_calendar_service import create_calendar_event
-from .email_service import send_appointment_confirmation
+from .context_budget import build_request_messages, is_context_summary
+from .cache import TTLCache, get_schedule_version, on_schedule_change, on_doctors_change
+from .slot_index import build_slot_index, load_scheduled_intervals, template_day_mask
+from .availability_engine import free_slots_for_day
+from .availability_service import compute_range_availability, find_earliest_slots as search_earliest_slots, get_schedule_template
+from .conversation_store import ConversationBackend, ConversationStore, SQLConversationStore
 
 client = None
+async_client = None
 if settings.GROQ_API_KEY:
-    client = Groq(api_key=settings.GROQ_API_KEY)
+    client = Groq(api_key=settings.GROQ_API_KEY, base_url=settings.GROQ_BASE_URL)
+    async_client = AsyncGroq(api_key=settings.GROQ_API_KEY, base_url=settings.GROQ_BASE_URL)
 else:
     print("Warning: GROQ_API_KEY not found in environment variables.")
 
-# --- Enhanced In-Memory Cache for Conversation History ---
-conversation_history: Dict[int, List[Dict[str, Any]]] = {}
-conversation_context: Dict[int, Dict[str, Any]] = {}  # Store extracted context
+# --- Conversation History and extracted context ---
+# CONVERSATION_BACKEND=sql shares conversations between worker processes through the database
+if settings.CONVERSATION_BACKEND == "sql":
+    conversation_store: ConversationBackend = SQLConversationStore(
+        max_messages=settings.CONVERSATION_MAX_MESSAGES,
+        ttl_seconds=settings.CONVERSATION_TTL_SECONDS
+    )
+else:
+    conversation_store: ConversationBackend = ConversationStore(
+        max_users=settings.CONVERSATION_MAX_USERS,
+        ttl_seconds=settings.CONVERSATION_TTL_SECONDS,
+        max_messages=settings.CONVERSATION_MAX_MESSAGES
+    )
+
+# --- Read-through caches for the read-only tools ---
+# Doctor lookups are dropped when a doctor registers. Free slots come from a per-(doctor, day) bitmap
+# index that is updated in place as appointments are booked, moved and cancelled.
+doctor_cache = TTLCache(max_entries=settings.TOOL_CACHE_MAX_ENTRIES, ttl_seconds=settings.TOOL_CACHE_TTL_SECONDS)
+on_doctors_change(doctor_cache.clear)
+availability_index = build_slot_index(max_entries=settings.SLOT_INDEX_MAX_ENTRIES, ttl_seconds=settings.SLOT_INDEX_TTL_SECONDS)
+
+# --- Clocks ---
+# Users talk in India time; appointments and the slot grid are stored in naive UTC
+LOCAL_TIMEZONE = 'Asia/Kolkata'
+
+def local_to_utc(value: datetime) -> datetime:
+    """Converts a naive India time (or any aware time) to the naive UTC appointments are stored in."""
+    if value.tzinfo is None:
+        value = pytz.timezone(LOCAL_TIMEZONE).localize(value)
+    return value.astimezone(pytz.UTC).replace(tzinfo=None)
+
+def utc_to_local(value: datetime) -> datetime:
+    """Converts a stored naive UTC time to naive India time."""
+    return pytz.UTC.localize(value).astimezone(pytz.timezone(LOCAL_TIMEZONE)).replace(tzinfo=None)
+
+def get_tool_cache_stats() -> Dict[str, Any]:
+    """Get the size and hit/miss counters of the tool-result caches."""
+    return {"doctors": doctor_cache.stats(), "slots": availability_index.stats()}
 
 # --- Agent Tools Definition ---
 
-def find_all_doctors():
-    """Finds all doctors in the system. Use this when the user asks for a recommendation."""
-    db = SessionLocal()
-    try:
+def load_all_doctors(db: Optional[Session] = None):
+    """Reads all doctors from the database for find_all_doctors."""
+    with session_scope(db) as db:
         doctors = crud_user.get_users_by_role(db, role=UserRole.DOCTOR)
         if not doctors:
             return json.dumps({"error": "No doctors found in the system."})
         return json.dumps([{"id": doc.id, "full_name": doc.full_name} for doc in doctors])
-    finally:
-        db.close()
 
-def find_doctor_by_name(doctor_name: str):
-    """Finds a single doctor by their name."""
-    db = SessionLocal()
-    try:
+def find_all_doctors(db: Optional[Session] = None):
+    """Finds all doctors in the system. Use this when the user asks for a recommendation."""
+    return doctor_cache.get_or_set("all_doctors", lambda: load_all_doctors(db))
+
+def load_doctor_by_name(doctor_name: str, db: Optional[Session] = None):
+    """Reads a single doctor by name from the database for find_doctor_by_name."""
+    with session_scope(db) as db:
         doctor = crud_user.get_doctor_by_name(db, name=doctor_name)
         if not doctor:
             return json.dumps({"error": f"No doctor found with a name like '{doctor_name}'."})
         return json.dumps({"id": doctor.id, "full_name": doctor.full_name})
-    finally:
-        db.close()
 
-def check_patient_availability(patient_id: int, start_time: str):
+def find_doctor_by_name(doctor_name: str, db: Optional[Session] = None):
+    """Finds a single doctor by their name."""
+    return doctor_cache.get_or_set(("by_name", doctor_name.strip().lower()), lambda: load_doctor_by_name(doctor_name, db))
+
+def check_patient_availability(patient_id: int, start_time: str, db: Optional[Session] = None):
     """Checks if the patient already has an appointment at the requested time."""
-    db = SessionLocal()
-    try:
+    with session_scope(db) as db:
         target_dt = datetime.fromisoformat(start_time.replace("Z", "+00:00"))
         time_window_end = target_dt + timedelta(minutes=29)
         
@@ -61,97 +110,222 @@ def check_patient_availability(patient_id: int, start_time: str):
             Appointment.end_time > target_dt
         ).first()
         
-        if conflicting_appointment:
+        if conflicting_appointment or crud_appointment.find_series_conflict(db, None, patient_id, target_dt, time_window_end):
             return json.dumps({"is_available": False, "reason": "You already have another appointment scheduled at that time."})
         return json.dumps({"is_available": True})
-    finally:
-        db.close()
 
-def get_available_slots(doctor_id: int, date_str: str):
+def get_available_slots(doctor_id: int, date_str: str, db: Optional[Session] = None):
     """
     Checks a specific doctor's schedule for a given date and returns all their available slots.
     """
-    db = SessionLocal()
-    try:
-        target_date = datetime.strptime(date_str, "%Y-%m-%d").date()
-        existing_appointments = crud_appointment.get_appointments_by_doctor_for_day(db, doctor_id=doctor_id, target_date=target_date)
-        booked_slots = {appt.start_time.time() for appt in existing_appointments}
-        available_slots = []
-        current_slot = datetime.combine(target_date, datetime.min.time().replace(hour=9))
-        end_of_workday = datetime.combine(target_date, datetime.min.time().replace(hour=17))
-        while current_slot < end_of_workday:
-            if current_slot.time() not in booked_slots:
-                available_slots.append(current_slot.strftime("%H:%M"))
-            current_slot += timedelta(minutes=30)
-        if not available_slots:
-            return json.dumps({"message": f"No available slots found for Dr. ID {doctor_id} on {date_str}."})
-        return json.dumps({"available_slots": available_slots})
-    finally:
-        db.close()
+    target_date = datetime.strptime(date_str, "%Y-%m-%d").date()
+    template = get_schedule_template(doctor_id, db)
+    bookable_mask = template_day_mask(template, target_date)
+    if bookable_mask is not None:
+        available_slots = availability_index.free_slots(doctor_id, target_date, bookable_mask, db=db)
+    else:
+        # Slots off the half-hour grid go through the interval engine
+        booked = load_scheduled_intervals(doctor_id, target_date, db)
+        available_slots = [slot.strftime("%H:%M") for slot in free_slots_for_day(template, target_date, booked)]
+    if not available_slots:
+        return json.dumps({"message": f"No available slots found for Dr. ID {doctor_id} on {target_date:%Y-%m-%d}."})
+    return json.dumps({"available_slots": available_slots})
+
+def get_all_doctors_availability(start_date: str, end_date: str = None, db: Optional[Session] = None):
+    """
+    Returns the available slots of every doctor for a date or an inclusive date range,
+    using a single database query regardless of how many doctors there are. Each doctor's
+    schedule template is applied by the interval availability engine.
+    """
+    range_start = datetime.strptime(start_date, "%Y-%m-%d").date()
+    range_end = datetime.strptime(end_date, "%Y-%m-%d").date() if end_date else range_start
+    if range_end < range_start:
+        return json.dumps({"error": "end_date must not be before start_date."})
+    if (range_end - range_start).days >= MAX_AVAILABILITY_RANGE_DAYS:
+        return json.dumps({"error": f"Date ranges are limited to {MAX_AVAILABILITY_RANGE_DAYS} days."})
+
+    index_version = availability_index.version()
+    with session_scope(db) as db:
+        doctors = compute_range_availability(db, range_start, range_end)
+    if not doctors:
+        return json.dumps({"error": "No doctors found in the system."})
+
+    # Every day of the range was just read, so the slot index is filled without further queries
+    days = [range_start + timedelta(days=offset) for offset in range((range_end - range_start).days + 1)]
+    result = []
+    for doctor_id, doctor in doctors.items():
+        by_day: Dict[date, List[Tuple[datetime, datetime]]] = {}
+        for interval in doctor["booked"]:
+            by_day.setdefault(interval[0].date(), []).append(interval)
+        for day in days:
+            availability_index.prime(doctor_id, day, by_day.get(day, []), index_version)
+
+        available_slots = {
+            day.strftime("%Y-%m-%d"): [slot.strftime("%H:%M") for slot in slots]
+            for day, slots in doctor["days"].items()
+        }
+        if available_slots:
+            result.append({"id": doctor_id, "full_name": doctor["full_name"], "available_slots": available_slots})
 
-def book_appointment(patient_id: int, doctor_id: int, start_time: str, notes: str):
-    """Books an appointment, creates a Google Calendar event, and sends a confirmation email."""
-    db = SessionLocal()
+    if not result:
+        return json.dumps({"message": f"No doctor has available slots between {range_start} and {range_end}."})
+    return json.dumps({"doctors": result})
+
+def find_earliest_slots(after: str = None, count: int = 3, doctor_ids: List[int] = None, db: Optional[Session] = None):
+    """
+    Returns the next free slots across all doctors (or only doctor_ids) in time order, starting
+    at after (an India 'YYYY-MM-DDTHH:MM' time, default now). Scans forward only until count
+    slots are found, so it answers "whoever is free soonest" without reading whole date ranges.
+    Each slot has its UTC start_time_utc, which book_appointment takes, and its India local_time.
+    """
     try:
-        appointment_start_time = datetime.fromisoformat(start_time.replace("Z", "+00:00"))
-        appointment_end_time = appointment_start_time + timedelta(minutes=30)
-        appointment_schema = AppointmentCreate(
-            patient_id=patient_id, doctor_id=doctor_id, start_time=appointment_start_time,
-            end_time=appointment_end_time, notes=notes
-        )
-        crud_appointment.create_appointment(db, appointment=appointment_schema)
-        
-        patient = crud_user.get_user_by_id(db, user_id=patient_id)
-        doctor = crud_user.get_user_by_id(db, user_id=doctor_id)
-        
-        if not patient or not doctor:
-            return json.dumps({"success": False, "message": "Could not find patient or doctor."})
+        if after:
+            start = local_to_utc(datetime.fromisoformat(after.replace("Z", "+00:00")))
+        else:
+            start = datetime.now(pytz.UTC).replace(tzinfo=None)
+        count = max(1, min(int(count or 3), MAX_EARLIEST_SLOTS))
+    except ValueError:
+        return json.dumps({"error": "after must be a date and time in 'YYYY-MM-DDTHH:MM' format."})
+
+    with session_scope(db) as db:
+        slots = search_earliest_slots(db, start, count, doctor_filter=doctor_ids or None)
+    if not slots:
+        return json.dumps({"message": f"No free slots found in the {settings.EARLIEST_SLOT_MAX_DAYS} days after {utc_to_local(start):%Y-%m-%d %H:%M} India time."})
+    return json.dumps({"slots": [
+        {"doctor_id": slot["doctor_id"], "full_name": slot["full_name"],
+         "start_time_utc": slot["start_time"].strftime("%Y-%m-%dT%H:%M:00Z"),
+         "local_time": utc_to_local(slot["start_time"]).strftime("%Y-%m-%d %H:%M")}
+        for slot in slots
+    ]})
+
+def book_appointment(patient_id: int, doctor_id: int, start_time: str, notes: str, db: Optional[Session] = None):
+    """
+    Books an appointment. The Google Calendar event and the confirmation email are queued in the
+    outbox with the appointment and sent by the outbox worker, so this returns as soon as the booking is committed.
+    Overlaps with the doctor's or the patient's other appointments are rejected by the insert itself
+    and returned as a structured conflict.
+    """
+    with session_scope(db) as db:
+        try:
+            patient = crud_user.get_user_by_id(db, user_id=patient_id)
+            doctor = crud_user.get_user_by_id(db, user_id=doctor_id)
+            if not patient or not doctor:
+                return json.dumps({"success": False, "message": "Could not find patient or doctor."})
+
+            appointment_start_time = datetime.fromisoformat(start_time.replace("Z", "+00:00"))
+            appointment_end_time = appointment_start_time + timedelta(minutes=get_schedule_template(doctor_id, db).slot_minutes)
+            appointment_schema = AppointmentCreate(
+                patient_id=patient_id, doctor_id=doctor_id, start_time=appointment_start_time,
+                end_time=appointment_end_time, notes=notes
+            )
+            try:
+                db_appointment = crud_appointment.create_appointment(db, appointment=appointment_schema)
+            except crud_appointment.AppointmentConflictError as conflict:
+                return json.dumps({"success": False, "message": conflict.message, "conflict": conflict.to_dict()})
 
-        summary = f"Appointment: {patient.full_name} with {doctor.full_name}"
-        attendees = [patient.email, doctor.email]
-        
-        calendar_result = create_calendar_event(
-            summary=summary, start_time=appointment_start_time, end_time=appointment_end_time,
-            attendees=attendees, timezone="Asia/Kolkata"
-        )
-        
-        send_appointment_confirmation(
-            patient_email=patient.email, patient_name=patient.full_name,
-            doctor_name=doctor.full_name, appointment_time=appointment_start_time.strftime("%A, %B %d, %Y at %I:%M %p")
-        )
-        
-        if calendar_result.get("success"):
-            calendar_link = calendar_result.get('link')
-            # Format with markdown link syntax - many chat UIs support this
             return json.dumps({
-                "success": True, 
-                "message": f"Great! Your appointment is confirmed. You can [view the event here]({calendar_link})."
+                "success": True,
+                "appointment_id": db_appointment.id,
+                "message": f"Great! Your appointment with {doctor.full_name} is confirmed. A calendar invite and a confirmation email are on their way."
             })
-        else:
+        except Exception as e:
+            db.rollback()
+            return json.dumps({"success": False, "message": f"Failed to book appointment: {str(e)}"})
+
+def book_recurring_appointment(patient_id: int, doctor_id: int, start_time: str, count: int, frequency: str = "weekly", notes: str = "",
+                               db: Optional[Session] = None):
+    """
+    Books a recurring appointment (e.g. weekly physiotherapy) as one series: a single insert, one
+    recurring calendar event and one confirmation email, however many visits it has.
+    A clash of any occurrence with the doctor's or the patient's schedule is returned as a conflict.
+    """
+    with session_scope(db) as db:
+        try:
+            doctor = crud_user.get_user_by_id(db, user_id=doctor_id)
+            if not doctor:
+                return json.dumps({"success": False, "message": "Could not find the doctor."})
+
+            series_in = AppointmentSeriesCreate(
+                patient_id=patient_id, doctor_id=doctor_id,
+                start_time=datetime.fromisoformat(start_time.replace("Z", "+00:00")),
+                duration_minutes=get_schedule_template(doctor_id, db).slot_minutes,
+                frequency=frequency.lower(), count=count, notes=notes
+            )
+            errors = crud_series.series_errors(series_in, max_occurrences=settings.SERIES_MAX_OCCURRENCES)
+            if errors:
+                return json.dumps({"success": False, "message": " ".join(errors)})
+            try:
+                db_series = crud_appointment.create_appointment_series(db, series_in)
+            except crud_appointment.AppointmentConflictError as conflict:
+                return json.dumps({"success": False, "message": f"{conflict.message} ({conflict.start_time:%Y-%m-%d %H:%M})", "conflict": conflict.to_dict()})
+
             return json.dumps({
-                "success": True, 
-                "message": f"Appointment booked and email sent, but we couldn't create a calendar event: {calendar_result.get('error')}"
+                "success": True,
+                "series_id": db_series.id,
+                "message": f"Great! {db_series.occurrences} {frequency.lower()} appointments with {doctor.full_name} are booked, starting {db_series.first_start:%Y-%m-%d %H:%M}. A calendar invite and a confirmation email are on their way."
             })
-    except Exception as e:
-        return json.dumps({"success": False, "message": f"Failed to book appointment: {str(e)}"})
-    finally:
-        db.close()
+        except Exception as e:
+            db.rollback()
+            return json.dumps({"success": False, "message": f"Failed to book the recurring appointment: {str(e)}"})
+
+def get_booking_status(patient_id: int, appointment_id: int, db: Optional[Session] = None):
+    """Reports whether the calendar event and confirmation email of one of the patient's bookings have been sent."""
+    with session_scope(db) as db:
+        appointment = crud_appointment.get_appointment(db, appointment_id=appointment_id)
+        if not appointment or appointment.patient_id != patient_id:
+            return json.dumps({"error": f"No appointment with ID {appointment_id} found for you."})
+
+        status_report = {"appointment_id": appointment_id}
+        for event in crud_outbox.get_events_for_appointment(db, appointment_id=appointment_id):
+            status_report[event.event_type.value] = event.status.value
+            if event.event_type == OutboxEventType.CALENDAR_EVENT and event.result:
+                status_report["calendar_link"] = event.result
+        return json.dumps(status_report)
 
 # --- Tool Mapping and Execution ---
+LLM_MODEL = "llama3-8b-8192"
+
+# Upper bound on the number of days get_all_doctors_availability covers in one call
+MAX_AVAILABILITY_RANGE_DAYS = 14
+
+# Upper bound on the number of slots find_earliest_slots returns in one call
+MAX_EARLIEST_SLOTS = 10
+
 available_tools = {
     "find_all_doctors": find_all_doctors,
     "find_doctor_by_name": find_doctor_by_name,
     "check_patient_availability": check_patient_availability,
     "get_available_slots": get_available_slots,
+    "get_all_doctors_availability": get_all_doctors_availability,
+    "find_earliest_slots": find_earliest_slots,
     "book_appointment": book_appointment,
+    "book_recurring_appointment": book_recurring_appointment,
+    "get_booking_status": get_booking_status,
 }
 
+# Tools with side effects (DB writes, calendar events, emails) never run concurrently
+SERIAL_TOOLS = {"book_appointment", "book_recurring_appointment"}
+
+# Limits how many prompts the async pipeline works on at the same time
+prompt_semaphore = asyncio.Semaphore(max(1, settings.AGENT_MAX_CONCURRENT_PROMPTS))
+
+# Worker pool shared by the read-only tool calls of every turn in the process. Each turn is
+# limited to AGENT_TOOL_CONCURRENCY of these workers at a time, so one turn cannot hold up the rest
+tool_executor = ThreadPoolExecutor(
+    max_workers=max(1, settings.AGENT_TOOL_WORKERS),
+    thread_name_prefix="agent-tool"
+)
+
 tools = [
     {"type": "function", "function": {"name": "find_all_doctors", "description": "Get a list of all available doctors. Use for general recommendations."}},
     {"type": "function", "function": {"name": "find_doctor_by_name", "description": "Get the ID of a specific doctor by their name.", "parameters": {"type": "object", "properties": {"doctor_name": {"type": "string"}}, "required": ["doctor_name"]}}},
     {"type": "function", "function": {"name": "check_patient_availability", "description": "Check if the patient already has a conflicting appointment at a specific time.", "parameters": {"type": "object", "properties": {"patient_id": {"type": "integer"}, "start_time": {"type": "string", "description": "The time to check in UTC ISO 8601 format."}}, "required": ["patient_id", "start_time"]}}},
     {"type": "function", "function": {"name": "get_available_slots", "description": "Check a specific doctor's schedule for all available slots on a given date.", "parameters": {"type": "object", "properties": {"doctor_id": {"type": "integer"}, "date_str": {"type": "string", "description": "The date in 'YYYY-MM-DD' format."}}, "required": ["doctor_id", "date_str"]}}},
+    {"type": "function", "function": {"name": "get_all_doctors_availability", "description": "Get the available slots of ALL doctors for a date or a date range in one call. Use for any question about which doctors are available.", "parameters": {"type": "object", "properties": {"start_date": {"type": "string", "description": "The first date in 'YYYY-MM-DD' format."}, "end_date": {"type": "string", "description": "Optional last date (inclusive) in 'YYYY-MM-DD' format. Omit for a single day."}}, "required": ["start_date"]}}},
+    {"type": "function", "function": {"name": "find_earliest_slots", "description": "Get the soonest free slots across ALL doctors (or the given doctors) in time order. Use when the user wants whoever is free first or the next available appointment. Each slot has start_time_utc, to pass to book_appointment, and local_time, the India time to show the user.", "parameters": {"type": "object", "properties": {"after": {"type": "string", "description": "Optional India start time in 'YYYY-MM-DDTHH:MM' format. Omit for now."}, "count": {"type": "integer", "description": "How many slots to return (default 3)."}, "doctor_ids": {"type": "array", "items": {"type": "integer"}, "description": "Optional doctor IDs to limit the search to."}}}}},
     {"type": "function", "function": {"name": "book_appointment", "description": "Books a medical appointment.", "parameters": {"type": "object", "properties": {"patient_id": {"type": "integer"}, "doctor_id": {"type": "integer"}, "start_time": {"type": "string", "description": "The start time in UTC ISO 8601 format."}, "notes": {"type": "string"}}, "required": ["patient_id", "doctor_id", "start_time", "notes"]}}},
+    {"type": "function", "function": {"name": "book_recurring_appointment", "description": "Books a recurring appointment, such as weekly follow-up care, as one series.", "parameters": {"type": "object", "properties": {"patient_id": {"type": "integer"}, "doctor_id": {"type": "integer"}, "start_time": {"type": "string", "description": "The start time of the first visit in UTC ISO 8601 format."}, "count": {"type": "integer", "description": "The number of visits."}, "frequency": {"type": "string", "enum": ["daily", "weekly"]}, "notes": {"type": "string"}}, "required": ["patient_id", "doctor_id", "start_time", "count"]}}},
+    {"type": "function", "function": {"name": "get_booking_status", "description": "Check whether the calendar invite and confirmation email of a booked appointment have been sent.", "parameters": {"type": "object", "properties": {"appointment_id": {"type": "integer"}}, "required": ["appointment_id"]}}},
 ]
 
 def parse_time_from_text(text: str, current_datetime: datetime) -> Dict[str, Any]:
@@ -243,8 +417,9 @@ def extract_booking_intent(text: str) -> Dict[str, Any]:
     is_availability_query = any(keyword in text_lower for keyword in availability_keywords)
     is_question = any(keyword in text_lower for keyword in question_keywords) and not is_booking_command
     
-    # Extract doctor name
-    doctor_pattern = r'(?:dr\.?\s*|doctor\s+)([a-z]+(?:\s+[a-z]+)?)'
+    # Extract doctor name: only the word after "Dr."/"doctor", so "Dr. Rao tomorrow" yields "Rao";
+    # doctors are looked up by a substring of their full name
+    doctor_pattern = r'(?:dr\.?\s*|doctor\s+)([a-z]+)'
     doctor_match = re.search(doctor_pattern, text_lower)
     doctor_name = doctor_match.group(1).strip().title() if doctor_match else None
     
@@ -256,56 +431,308 @@ def extract_booking_intent(text: str) -> Dict[str, Any]:
         'intent': 'book' if is_booking_command else 'availability' if is_availability_query else 'query' if is_question else 'unclear'
     }
 
-def find_closest_slots(available_slots: List[str], requested_time: str, count: int = 3) -> List[str]:
+# --- Deterministic Fast Path ---
+# Prompts with a clear intent are answered by running the tools directly, without any LLM round trip
+DATE_KEYWORDS = ['today', 'tomorrow', 'next week', 'monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+fast_path_stats = {"prompts": 0, "hits": 0}
+fast_path_lock = threading.Lock()
+
+def has_explicit_date(text: str) -> bool:
+    """Returns True if the text names a date that parse_time_from_text resolves (rather than defaulting to today)."""
+    text_lower = text.lower()
+    return any(keyword in text_lower for keyword in DATE_KEYWORDS)
+
+def format_slot_date(date_str: str) -> str:
+    """Formats a 'YYYY-MM-DD' date for templated answers, e.g. 'Friday, October 17'."""
+    return datetime.strptime(date_str, "%Y-%m-%d").strftime("%A, %B %d")
+
+def requested_slot(time_info: Dict[str, Any]) -> Tuple[str, str]:
     """
-    Finds the closest available time slots to the requested time.
+    Returns the (date, 'HH:MM') of a parsed time on the clock appointments are stored and the slot
+    grid is laid out in (UTC), so a slot is checked and booked at the same instant.
     """
-    if not available_slots:
-        return []
-        
+    start_time = datetime.fromisoformat(time_info['datetime_utc'])
+    return start_time.strftime('%Y-%m-%d'), start_time.strftime('%H:%M')
+
+def local_day_utc_dates(date_str: str) -> List[str]:
+    """Returns the UTC dates the India day date_str overlaps, in order."""
+    day_start = local_to_utc(datetime.strptime(date_str, '%Y-%m-%d'))
+    day_end = local_to_utc(datetime.strptime(date_str, '%Y-%m-%d') + timedelta(days=1)) - timedelta(minutes=1)
+    return sorted({day_start.strftime('%Y-%m-%d'), day_end.strftime('%Y-%m-%d')})
+
+def local_day_slots(slots_by_utc_date: Dict[str, List[str]], date_str: str) -> List[str]:
+    """Returns the India 'HH:MM' times of the UTC grid slots, given by UTC date, that fall on the India day date_str."""
+    local_slots = []
+    for utc_date, times in sorted(slots_by_utc_date.items()):
+        for time_str in times:
+            local_start = utc_to_local(datetime.strptime(f"{utc_date} {time_str}", '%Y-%m-%d %H:%M'))
+            if local_start.strftime('%Y-%m-%d') == date_str:
+                local_slots.append(local_start.strftime('%H:%M'))
+    return local_slots
+
+def answer_with_fast_path(prompt: str, current_user: User, context: Dict[str, Any], current_time: datetime,
+                          db: Optional[Session] = None) -> Optional[str]:
+    """
+    Rule-based router in front of the LLM loop. Handles:
+    - availability questions for a known date, for all doctors or for one named doctor
+    - "book Dr. X <date> at <time>" when the doctor, the slot and the patient are all free
+    Open slots are read for the UTC window of the user's India day and shown in India time, the
+    clock a follow-up like "book 9am" is parsed in.
+    Its lookups run one after another, so they and the booking all use the request's session db.
+    Returns a templated answer, or None when the prompt is ambiguous and must go to the LLM.
+    """
+    if current_user.role != UserRole.PATIENT or not has_explicit_date(prompt):
+        return None
+
+    intent_info = extract_booking_intent(prompt)
+    time_info = parse_time_from_text(prompt, current_time)
+    date_str = time_info['date_str']
+    doctor_name = intent_info.get('doctor_name')
+    utc_dates = local_day_utc_dates(date_str)
+
+    if intent_info['intent'] == 'availability' and not doctor_name and not time_info.get('success'):
+        availability = json.loads(get_all_doctors_availability(utc_dates[0], utc_dates[-1], db=db))
+        if "doctors" in availability:
+            lines = [
+                f"- {doctor['full_name']}: {', '.join(slots)}"
+                for doctor, slots in ((doctor, local_day_slots(doctor['available_slots'], date_str)) for doctor in availability["doctors"])
+                if slots
+            ]
+            if lines:
+                return f"Here are the doctors with open slots on {format_slot_date(date_str)} (India time):\n" + "\n".join(lines)
+        if "doctors" in availability or "message" in availability:
+            return f"No doctor has open slots on {format_slot_date(date_str)}. Would you like me to check another day?"
+        return None
+
+    if intent_info['intent'] not in ('availability', 'book') or not doctor_name:
+        return None
+
+    doctor = json.loads(find_doctor_by_name(doctor_name, db=db))
+    if "id" not in doctor:
+        return None
+    context['last_doctor_id'] = doctor['id']
+
+    if not time_info.get('success'):
+        if intent_info['intent'] != 'availability':
+            return None
+        slots = local_day_slots({
+            utc_date: json.loads(get_available_slots(doctor['id'], utc_date, db=db)).get('available_slots', [])
+            for utc_date in utc_dates
+        }, date_str)
+        context['last_available_slots'] = slots
+        if not slots:
+            return None
+        return f"{doctor['full_name']} has these open slots on {format_slot_date(date_str)} (India time): {', '.join(slots)}"
+
+    # A requested time is looked up on the slot grid's own date, which may differ from the local one
+    slot_date, slot_time = requested_slot(time_info)
+    slots = json.loads(get_available_slots(doctor['id'], slot_date, db=db)).get('available_slots', [])
+    if slot_time not in slots:
+        return None
+    if intent_info['intent'] == 'availability':
+        return f"Yes, {doctor['full_name']} is free at {time_info['time_str']} on {format_slot_date(date_str)}. Would you like me to book it?"
+
+    # Booking: only when the time is unambiguous. The insert rejects a conflict on either side.
+    booking = json.loads(book_appointment(current_user.id, doctor['id'], time_info['datetime_utc'], prompt, db=db))
+    if booking.get('conflict'):
+        return f"{booking['message']} Would you like a different time with {doctor['full_name']}?"
+    if not booking.get('success'):
+        return None
+    context.clear()
+    context['last_appointment_id'] = booking.get('appointment_id')
+    return booking['message']
+
+def try_fast_path(prompt: str, current_user: User, context: Dict[str, Any], current_time: datetime,
+                  db: Optional[Session] = None) -> Optional[str]:
+    """Runs the fast-path router and counts the result. Any error falls back to the LLM."""
+    try:
+        answer = answer_with_fast_path(prompt, current_user, context, current_time, db)
+    except Exception as e:
+        print(f"Fast path failed, falling back to the LLM: {e}")
+        answer = None
+    finally:
+        release_connection(db)
+
+    with fast_path_lock:
+        fast_path_stats["prompts"] += 1
+        if answer:
+            fast_path_stats["hits"] += 1
+    return answer
+
+def get_fast_path_stats() -> Dict[str, Any]:
+    """Get how many prompts were answered by the fast path instead of the LLM."""
+    with fast_path_lock:
+        prompts, hits = fast_path_stats["prompts"], fast_path_stats["hits"]
+    return {"prompts": prompts, "hits": hits, "hit_rate": hits / prompts if prompts else 0.0}
+
+# --- Completion Cache ---
+# Final answers to opening prompts, keyed on the normalized prompt, intent, resolved date and schedule version
+UNCACHEABLE_TOOLS = SERIAL_TOOLS | {"check_patient_availability", "get_booking_status", "find_earliest_slots"}
+completion_cache = TTLCache(max_entries=settings.LLM_CACHE_MAX_ENTRIES, ttl_seconds=settings.LLM_CACHE_TTL_SECONDS)
+on_schedule_change(completion_cache.clear)
+
+def normalize_prompt(prompt: str) -> str:
+    """Lowercases a prompt and strips punctuation and repeated whitespace."""
+    return " ".join(re.sub(r"[^a-z0-9:\s]", " ", prompt.lower()).split())
+
+def lookup_completion(prompt: str, current_user: User, current_time: datetime, stored_message_count: int) -> Tuple[Optional[tuple], Optional[str]]:
+    """
+    Returns (cache_key, cached_answer) for a prompt. Only the opening prompt of a conversation is
+    cacheable, since later answers depend on the conversation so far; other prompts get (None, None).
+    """
+    if stored_message_count or settings.LLM_CACHE_MAX_ENTRIES <= 0:
+        return None, None
+
+    intent_info = extract_booking_intent(prompt)
+    time_info = parse_time_from_text(prompt, current_time)
+    cache_key = (
+        current_user.role, normalize_prompt(prompt), intent_info['intent'],
+        time_info['date_str'], time_info.get('time_str'), get_schedule_version()
+    )
+    return cache_key, completion_cache.get(cache_key)
+
+def remember_completion(cache_key: Optional[tuple], turn_messages: List[Any], answer: Optional[str]):
+    """Caches the answer of a turn unless it used a tool with side effects or patient-specific results."""
+    if not cache_key or not answer:
+        return
+    for message in turn_messages:
+        if isinstance(message, dict) and message.get("role") == "tool" and message.get("name") in UNCACHEABLE_TOOLS:
+            return
+    completion_cache.set(cache_key, answer)
+
+def get_completion_cache_stats() -> Dict[str, Any]:
+    """Get the size and hit/miss counters of the completion cache."""
+    return completion_cache.stats()
+
+def release_connection(db: Optional[Session]):
+    """
+    Ends the open transaction of the request's session, if any, so that its connection goes back
+    to the pool while the LLM works. The session checks a connection out again on its next query.
+    """
+    if db is not None:
+        with session_scope(db):
+            db.rollback()
+
+def run_tool_call(tool_call, current_user: User, db: Optional[Session] = None) -> str:
+    """
+    Executes a single tool call and returns the tool's JSON response. The tool uses the session db,
+    or opens a short-lived one of its own when db is None.
+    Errors are returned as a JSON payload so the LLM can see what went wrong.
+    """
+    function_name = tool_call.function.name
+    function_to_call = available_tools[function_name]
     try:
-        requested_minutes = int(requested_time.split(':')[0]) * 60 + int(requested_time.split(':')[1])
+        function_args = json.loads(tool_call.function.arguments)
         
-        slots_with_distance = []
-        for slot in available_slots:
-            slot_minutes = int(slot.split(':')[0]) * 60 + int(slot.split(':')[1])
-            distance = abs(slot_minutes - requested_minutes)
-            slots_with_distance.append((slot, distance))
+        # Auto-inject patient_id for relevant functions
+        if function_name in ['book_appointment', 'check_patient_availability', 'get_booking_status']:
+            function_args['patient_id'] = current_user.id
+        function_args['db'] = db
         
-        # Sort by distance and return closest slots
-        slots_with_distance.sort(key=lambda x: x[1])
-        return [slot[0] for slot in slots_with_distance[:count]]
-    except:
-        return available_slots[:count]
+        return function_to_call(**function_args)
+    except Exception as e:
+        return json.dumps({"error": f"Tool execution failed: {str(e)}"})
+
+def reads_concurrently(tool_calls) -> bool:
+    """Whether the read-only tool calls of a turn run side by side, which they only do if there are several."""
+    read_only = [
+        tool_call for tool_call in tool_calls
+        if tool_call.function.name in available_tools and tool_call.function.name not in SERIAL_TOOLS
+    ]
+    return len(read_only) > 1 and settings.AGENT_TOOL_CONCURRENCY > 1
 
-def process_prompt(prompt: str, current_user: User):
+def execute_tool_calls(tool_calls, current_user: User, db: Optional[Session] = None) -> List[Tuple[Any, str]]:
     """
-    Enhanced agentic workflow with perfect conversational memory and intelligent decision making.
+    Runs all tool calls from one LLM turn and returns (tool_call, response) pairs in their original order.
+    Tools in SERIAL_TOOLS wait for every earlier call to finish and then run on the calling thread,
+    on the request's session db. When a turn has several read-only tools, up to AGENT_TOOL_CONCURRENCY
+    of them run at once on the shared worker pool, each on a short-lived pooled session, since one
+    session cannot serve them side by side: such a turn holds up to that many connections at once
+    in exchange for not running its lookups one after another. A turn's only read-only tool runs on
+    the calling thread on the request's session, like the serial tools.
     """
-    if not client:
-        return {"error": "Groq client is not configured."}
+    concurrent_reads = reads_concurrently(tool_calls)
+    turn_slots = threading.BoundedSemaphore(max(1, settings.AGENT_TOOL_CONCURRENCY))
+    results = []
+    for tool_call in tool_calls:
+        function_name = tool_call.function.name
+        if function_name not in available_tools:
+            continue
 
-    current_time = datetime.now(pytz.UTC)
-    user_id = current_user.id
-    
-    # Initialize conversation history and context if needed
-    if user_id not in conversation_history:
-        conversation_history[user_id] = []
-        conversation_context[user_id] = {}
-    
-    messages = conversation_history[user_id]
-    context = conversation_context[user_id]
+        if function_name in SERIAL_TOOLS or not concurrent_reads:
+            wait([pending for _, pending in results if isinstance(pending, Future)])
+            results.append((tool_call, run_tool_call(tool_call, current_user, db)))
+        else:
+            # Waits for one of this turn's slots; the worker gives it back when the tool finishes
+            turn_slots.acquire()
+            pending = tool_executor.submit(run_tool_call, tool_call, current_user)
+            pending.add_done_callback(lambda _: turn_slots.release())
+            results.append((tool_call, pending))
 
-    # Add system message only once at the start
-    if not messages:
-        if current_user.role == UserRole.DOCTOR:
-            # Doctor-specific logic would go here
-            pass
-        else:  # Patient
-            system_prompt = f"""You are an intelligent medical appointment assistant. You are conversational, direct, and decisive.
+    responses = [
+        (tool_call, pending.result() if isinstance(pending, Future) else pending)
+        for tool_call, pending in results
+    ]
+    release_connection(db)
+    return responses
+
+async def execute_tool_calls_async(tool_calls, current_user: User, db: Optional[Session] = None) -> List[Tuple[Any, str]]:
+    """
+    Async counterpart of execute_tool_calls. Concurrent read-only tools are offloaded to the shared
+    worker pool and the others to their own thread, so the event loop is never blocked; the
+    concurrency, ordering, serialization and session rules are the same.
+    """
+    concurrent_reads = reads_concurrently(tool_calls)
+    loop = asyncio.get_running_loop()
+    turn_slots = asyncio.Semaphore(max(1, settings.AGENT_TOOL_CONCURRENCY))
+
+    async def run_read_only(tool_call):
+        async with turn_slots:
+            return await loop.run_in_executor(tool_executor, run_tool_call, tool_call, current_user)
+
+    results = []
+    for tool_call in tool_calls:
+        function_name = tool_call.function.name
+        if function_name not in available_tools:
+            continue
+
+        if function_name in SERIAL_TOOLS or not concurrent_reads:
+            await asyncio.gather(*(pending for _, pending in results if isinstance(pending, asyncio.Task)))
+            results.append((tool_call, await asyncio.to_thread(run_tool_call, tool_call, current_user, db)))
+        else:
+            results.append((tool_call, asyncio.create_task(run_read_only(tool_call))))
+
+    responses = [
+        (tool_call, await pending if isinstance(pending, asyncio.Task) else pending)
+        for tool_call, pending in results
+    ]
+    await asyncio.to_thread(release_connection, db)
+    return responses
+
+def budget_messages(messages: List[Any], user_id: int) -> List[Any]:
+    """Returns the view of the conversation sent to the LLM, trimmed to AGENT_CONTEXT_TOKEN_BUDGET."""
+    return build_request_messages(
+        messages,
+        token_budget=settings.AGENT_CONTEXT_TOKEN_BUDGET,
+        tool_result_max_chars=settings.AGENT_TOOL_RESULT_MAX_CHARS,
+        user_id=user_id
+    )
+
+def prepare_turn(prompt: str, current_user: User, messages: List[Any], context: Dict[str, Any], current_time: datetime):
+    """
+    Adds the system prompt, the user's prompt and the extracted conversation context to the
+    messages of a turn, updating context in place. The system prompt states the current time, so
+    a stored conversation gets a fresh one in place of the prompt it started with; likewise the
+    previous turn's conversation context is replaced rather than kept.
+    """
+    if current_user.role == UserRole.DOCTOR:
+        # Doctor-specific logic would go here
+        pass
+    else:  # Patient
+        system_prompt = f"""You are an intelligent medical appointment assistant. You are conversational, direct, and decisive.
 
 CRITICAL RULES:
-- Patient ID is ALWAYS {user_id}
+- Patient ID is ALWAYS {current_user.id}
 - Current time: {current_time.isoformat()} (UTC)
 - Current India time: {current_time.astimezone(pytz.timezone('Asia/Kolkata')).strftime('%Y-%m-%d %H:%M')}
 - User timezone: Asia/Kolkata
@@ -315,23 +742,29 @@ CRITICAL RULES:
   * "today" = current date
   * "tomorrow" = current date + 1 day
   * "next [weekday]" = next occurrence of that weekday
-- When asked about doctor availability for a date, ALWAYS:
-  1. Use find_all_doctors() to get all doctors
-  2. For each doctor, use get_available_slots() to check their schedule
-  3. Present doctors who have available slots
+- When asked about doctor availability for a date or date range, ALWAYS:
+  1. Call get_all_doctors_availability() ONCE with the date (or start_date and end_date)
+  2. Present doctors who have available slots
+- Only use get_available_slots() when the user asks about one specific doctor
+- When the user wants the next available appointment or whoever is free soonest, call find_earliest_slots() ONCE instead of checking dates one by one
 
 WORKFLOW FOR AVAILABILITY QUERIES:
-- "doctors available tomorrow" → Get all doctors, check each one's availability for tomorrow's date
+- "doctors available tomorrow" → Call get_all_doctors_availability() with tomorrow's date
 - Don't ask for clarification on obvious date references
 - Present results showing which doctors have openings and their available times
 
 WORKFLOW FOR BOOKING:
 1. Extract complete booking info (doctor, date, time)
-2. Check patient availability first using check_patient_availability
-3. If patient free, book immediately
-4. If requested time unavailable, suggest 3 closest alternatives"""
+2. Book immediately with book_appointment; it rejects times that clash with the patient's or the doctor's other appointments
+3. If the booking returns a conflict, or the requested time is unavailable, suggest 3 alternatives from find_earliest_slots() with after set to the requested time
+4. The calendar invite and email are sent in the background; use get_booking_status if the user asks about them
+5. For repeated visits (e.g. "every Monday for 6 weeks"), book them all at once with book_recurring_appointment"""
 
-            messages.append({"role": "system", "content": system_prompt})
+        system_message = {"role": "system", "content": system_prompt}
+        if messages and isinstance(messages[0], dict) and messages[0].get("role") == "system":
+            messages[0] = system_message
+        elif not messages:
+            messages.append(system_message)
     
     # Add user message
     messages.append({"role": "user", "content": prompt})
@@ -340,18 +773,6 @@ WORKFLOW FOR BOOKING:
     time_info = parse_time_from_text(prompt, current_time)
     intent_info = extract_booking_intent(prompt)
     
-    # Update conversation context
-    if intent_info.get('doctor_name'):
-        context['last_doctor'] = intent_info['doctor_name']
-    if time_info.get('success'):
-        context['last_requested_time'] = time_info
-        context['last_date'] = time_info['date_str']
-        context['last_time'] = time_info['time_str']
-    
-    # Enhanced context extraction and storage
-    time_info = parse_time_from_text(prompt, current_time)
-    intent_info = extract_booking_intent(prompt)
-    
     # Update conversation context
     if intent_info.get('doctor_name'):
         context['last_doctor'] = intent_info['doctor_name']
@@ -375,24 +796,93 @@ CONVERSATION CONTEXT:
 - Tomorrow's date: {tomorrow_date}
 - Last requested date: {context.get('last_date', 'None')}
 - Last requested time: {context.get('last_time', 'None')}
+- Last booked appointment ID: {context.get('last_appointment_id', 'None')}
 - Time parsed successfully: {time_info.get('success', False)}
 
 SMART DATE UNDERSTANDING:
 - If user says "tomorrow", use date: {tomorrow_date}
 - If user says "today", use date: {today_date}
-- For availability queries about a date, get ALL doctors first, then check each doctor's schedule
+- For availability queries about a date, call get_all_doctors_availability() once for that date
 
 Use this context to understand the user's request and take appropriate action."""
 
+    # The newest summary replaces the stored one, so summaries don't fill the conversation's message cap
+    messages[:] = [message for message in messages if not is_context_summary(message)]
     messages.append({"role": "system", "content": context_summary})
+
+def record_tool_results(results: List[Tuple[Any, str]], messages: List[Any], context: Dict[str, Any]):
+    """
+    Appends executed tool results to messages, in the original tool_call order,
+    and updates the conversation context from them.
+    """
+    for tool_call, function_response in results:
+        function_name = tool_call.function.name
+
+        # Parse response to update context
+        try:
+            response_data = json.loads(function_response)
+
+            # Update context based on tool results
+            if function_name == 'find_doctor_by_name' and 'id' in response_data:
+                context['last_doctor_id'] = response_data['id']
+            elif function_name == 'get_available_slots' and 'available_slots' in response_data:
+                context['last_available_slots'] = response_data['available_slots']
+            elif function_name == 'book_appointment':
+                # Clear context after successful booking, keeping the booking for status questions
+                context.clear()
+                if response_data.get('appointment_id'):
+                    context['last_appointment_id'] = response_data['appointment_id']
+        except json.JSONDecodeError:
+            pass
+
+        messages.append({
+            "tool_call_id": tool_call.id,
+            "role": "tool",
+            "name": function_name,
+            "content": function_response
+        })
+
+def apply_tool_results(tool_calls, current_user: User, messages: List[Any], context: Dict[str, Any], db: Optional[Session] = None):
+    """Executes the tool calls of one LLM turn and records their results."""
+    record_tool_results(execute_tool_calls(tool_calls, current_user, db), messages, context)
+
+def process_prompt(prompt: str, current_user: User, db: Optional[Session] = None):
+    """
+    Enhanced agentic workflow with perfect conversational memory and intelligent decision making.
+    Tools use the request's session db when one is given, except for read-only tools that run
+    concurrently, which take short-lived pooled sessions of their own (see execute_tool_calls).
+    """
+    if not client:
+        return {"error": "Groq client is not configured."}
+
+    current_time = datetime.now(pytz.UTC)
+    user_id = current_user.id
+    
+    # Load conversation history and context (a fresh conversation if none is stored)
+    messages, context = conversation_store.load(user_id)
+    stored_message_count = len(messages)
+
+    prepare_turn(prompt, current_user, messages, context, current_time)
+
+    fast_answer = try_fast_path(prompt, current_user, context, current_time, db)
+    if fast_answer:
+        messages.append({"role": "assistant", "content": fast_answer})
+        conversation_store.append(user_id, messages[stored_message_count:], context)
+        return {"response": fast_answer}
+
+    cache_key, cached_answer = lookup_completion(prompt, current_user, current_time, stored_message_count)
+    if cached_answer:
+        messages.append({"role": "assistant", "content": cached_answer})
+        conversation_store.append(user_id, messages[stored_message_count:], context)
+        return {"response": cached_answer}
     
     # Tool execution loop with enhanced logic
     max_iterations = 6
     for iteration in range(max_iterations):
         try:
             chat_completion = client.chat.completions.create(
-                messages=messages,
-                model="llama3-8b-8192",
+                messages=budget_messages(messages, user_id),
+                model=LLM_MODEL,
                 tools=tools,
                 tool_choice="auto",
                 temperature=0.1  # Lower temperature for more consistent responses
@@ -404,100 +894,256 @@ Use this context to understand the user's request and take appropriate action.""
             if not tool_calls:
                 # No more tool calls, return final response
                 messages.append(response_message)
-                conversation_history[user_id] = messages
-                conversation_context[user_id] = context
+                conversation_store.append(user_id, messages[stored_message_count:], context)
+                remember_completion(cache_key, messages[stored_message_count:], response_message.content)
                 return {"response": response_message.content}
 
             messages.append(response_message)
             
             # Process tool calls
-            for tool_call in tool_calls:
-                function_name = tool_call.function.name
-                function_to_call = available_tools.get(function_name)
-                
-                if not function_to_call:
-                    continue
-                    
-                try:
-                    function_args = json.loads(tool_call.function.arguments)
-                    
-                    # Auto-inject patient_id for relevant functions
-                    if function_name in ['book_appointment', 'check_patient_availability']:
-                        function_args['patient_id'] = current_user.id
-                    
-                    # Execute the function
-                    function_response = function_to_call(**function_args)
-                    
-                    # Parse response to update context
-                    try:
-                        response_data = json.loads(function_response)
-                        
-                        # Update context based on tool results
-                        if function_name == 'find_doctor_by_name' and 'id' in response_data:
-                            context['last_doctor_id'] = response_data['id']
-                        elif function_name == 'get_available_slots' and 'available_slots' in response_data:
-                            context['last_available_slots'] = response_data['available_slots']
-                        elif function_name == 'book_appointment':
-                            # Clear context after successful booking
-                            context.clear()
-                    except json.JSONDecodeError:
-                        pass
-                    
-                    messages.append({
-                        "tool_call_id": tool_call.id,
-                        "role": "tool",
-                        "name": function_name,
-                        "content": function_response
-                    })
-                    
-                except Exception as e:
-                    error_message = json.dumps({"error": f"Tool execution failed: {str(e)}"})
-                    messages.append({
-                        "tool_call_id": tool_call.id,
-                        "role": "tool",
-                        "name": function_name,
-                        "content": error_message
-                    })
+            apply_tool_results(tool_calls, current_user, messages, context, db)
         
         except Exception as e:
             # Handle API errors gracefully
-            conversation_history[user_id] = messages
-            conversation_context[user_id] = context
+            conversation_store.append(user_id, messages[stored_message_count:], context)
             return {"error": f"API error: {str(e)}"}
     
     # If we hit max iterations, get final response
     try:
         final_completion = client.chat.completions.create(
-            model="llama3-8b-8192",
-            messages=messages,
+            model=LLM_MODEL,
+            messages=budget_messages(messages, user_id),
             temperature=0.1
         )
         final_response = final_completion.choices[0].message
         messages.append(final_response)
-        conversation_history[user_id] = messages
-        conversation_context[user_id] = context
+        conversation_store.append(user_id, messages[stored_message_count:], context)
+        remember_completion(cache_key, messages[stored_message_count:], final_response.content)
         return {"response": final_response.content}
     except Exception as e:
         return {"error": f"Final completion failed: {str(e)}"}
 
-def clear_conversation_history(user_id: int):
-    """Clear conversation history for a specific user."""
-    if user_id in conversation_history:
-        del conversation_history[user_id]
-    if user_id in conversation_context:
-        del conversation_context[user_id]
+async def process_prompt_async(prompt: str, current_user: User, db: Optional[Session] = None):
+    """
+    Async variant of process_prompt for async endpoints. Uses the AsyncGroq client and offloads
+    blocking tools and storage to worker threads. At most AGENT_MAX_CONCURRENT_PROMPTS prompts run at once.
+    Tools use the request's session db when one is given, as in process_prompt.
+    """
+    if not async_client:
+        return {"error": "Groq client is not configured."}
 
-def get_conversation_summary(user_id: int) -> Dict[str, Any]:
-    """Get a summary of the current conversation context."""
-    return {
-        'context': conversation_context.get(user_id, {}),
-        'message_count': len(conversation_history.get(user_id, []))
-    }
+    async with prompt_semaphore:
+        current_time = datetime.now(pytz.UTC)
+        user_id = current_user.id
+
+        messages, context = await asyncio.to_thread(conversation_store.load, user_id)
+        stored_message_count = len(messages)
+
+        prepare_turn(prompt, current_user, messages, context, current_time)
+
+        fast_answer = await asyncio.to_thread(try_fast_path, prompt, current_user, context, current_time, db)
+        if fast_answer:
+            messages.append({"role": "assistant", "content": fast_answer})
+            await asyncio.to_thread(conversation_store.append, user_id, messages[stored_message_count:], context)
+            return {"response": fast_answer}
+
+        cache_key, cached_answer = lookup_completion(prompt, current_user, current_time, stored_message_count)
+        if cached_answer:
+            messages.append({"role": "assistant", "content": cached_answer})
+            await asyncio.to_thread(conversation_store.append, user_id, messages[stored_message_count:], context)
+            return {"response": cached_answer}
+
+        max_iterations = 6
+        for iteration in range(max_iterations):
+            try:
+                chat_completion = await async_client.chat.completions.create(
+                    messages=budget_messages(messages, user_id),
+                    model=LLM_MODEL,
+                    tools=tools,
+                    tool_choice="auto",
+                    temperature=0.1
+                )
+
+                response_message = chat_completion.choices[0].message
+                tool_calls = response_message.tool_calls
+
+                if not tool_calls:
+                    messages.append(response_message)
+                    await asyncio.to_thread(conversation_store.append, user_id, messages[stored_message_count:], context)
+                    remember_completion(cache_key, messages[stored_message_count:], response_message.content)
+                    return {"response": response_message.content}
+
+                messages.append(response_message)
+                record_tool_results(await execute_tool_calls_async(tool_calls, current_user, db), messages, context)
+
+            except Exception as e:
+                await asyncio.to_thread(conversation_store.append, user_id, messages[stored_message_count:], context)
+                return {"error": f"API error: {str(e)}"}
+
+        # If we hit max iterations, get final response
+        try:
+            final_completion = await async_client.chat.completions.create(
+                model=LLM_MODEL,
+                messages=budget_messages(messages, user_id),
+                temperature=0.1
+            )
+            final_response = final_completion.choices[0].message
+            messages.append(final_response)
+            await asyncio.to_thread(conversation_store.append, user_id, messages[stored_message_count:], context)
+            remember_completion(cache_key, messages[stored_message_count:], final_response.content)
+            return {"response": final_response.content}
+        except Exception as e:
+            return {"error": f"Final completion failed: {str(e)}"}
+
+def describe_tool_call(function_name: str, arguments: str, context: Dict[str, Any]) -> str:
+    """Returns a short, user-facing description of what a tool call is doing."""
+    try:
+        function_args = json.loads(arguments or "{}")
+    except json.JSONDecodeError:
+        function_args = {}
 
+    if function_name == "find_all_doctors":
+        return "Looking up our doctors"
+    if function_name == "find_doctor_by_name":
+        return f"Looking up Dr. {function_args.get('doctor_name', '')}".strip()
+    if function_name == "get_available_slots":
+        doctor_name = context.get('last_doctor') if context.get('last_doctor_id') == function_args.get('doctor_id') else None
+        whose = f"Dr. {doctor_name}'s" if doctor_name else "the doctor's"
+        return f"Checking {whose} schedule for {function_args.get('date_str', 'that day')}"
+    if function_name == "get_all_doctors_availability":
+        return f"Checking every doctor's schedule for {function_args.get('start_date', 'that day')}"
+    if function_name == "find_earliest_slots":
+        return "Finding the earliest open appointments"
+    if function_name == "check_patient_availability":
+        return "Checking your existing appointments"
+    if function_name == "book_appointment":
+        return "Booking your appointment"
+    if function_name == "book_recurring_appointment":
+        return "Booking your recurring appointments"
+    if function_name == "get_booking_status":
+        return "Checking your booking confirmation"
+    return "Working on your request"
 
+def stream_completion(messages: List[Any], with_tools: bool):
+    """
+    Runs one streaming chat completion, yielding ("token", ...) events for the content as it arrives.
+    Returns the full content and the tool calls reassembled from the streamed deltas.
+    """
+    request = {"messages": messages, "model": LLM_MODEL, "temperature": 0.1, "stream": True}
+    if with_tools:
+        request.update(tools=tools, tool_choice="auto")
+
+    content_parts = []
+    streamed_tool_calls: Dict[int, Dict[str, str]] = {}
+    for chunk in client.chat.completions.create(**request):
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta
+        if delta.content:
+            content_parts.append(delta.content)
+            yield "token", {"text": delta.content}
+        for tool_call_delta in delta.tool_calls or []:
+            streamed = streamed_tool_calls.setdefault(tool_call_delta.index, {"id": "", "name": "", "arguments": ""})
+            if tool_call_delta.id:
+                streamed["id"] = tool_call_delta.id
+            if tool_call_delta.function:
+                if tool_call_delta.function.name:
+                    streamed["name"] = tool_call_delta.function.name
+                if tool_call_delta.function.arguments:
+                    streamed["arguments"] += tool_call_delta.function.arguments
+
+    tool_calls = [
+        SimpleNamespace(
+            id=streamed["id"], type="function",
+            function=SimpleNamespace(name=streamed["name"], arguments=streamed["arguments"] or "{}")
+        )
+        for _, streamed in sorted(streamed_tool_calls.items())
+    ]
+    return "".join(content_parts), tool_calls
+
+def stream_prompt(prompt: str, current_user: User, db: Optional[Session] = None):
+    """
+    Streaming variant of process_prompt. Yields (event, data) pairs:
+    - ("status", ...) immediately, before the first LLM call
+    - ("tool", ...) with a progress message before each tool call runs
+    - ("token", ...) for each piece of the answer as Groq streams it
+    - ("done", {"response": ...}) or ("error", {"detail": ...}) at the end
+    The tools use the session db when one is given.
+    """
+    if not client:
+        yield "error", {"detail": "Groq client is not configured."}
+        return
+
+    yield "status", {"message": "Working on your request"}
+
+    current_time = datetime.now(pytz.UTC)
+    user_id = current_user.id
+    messages, context = conversation_store.load(user_id)
+    stored_message_count = len(messages)
 
+    prepare_turn(prompt, current_user, messages, context, current_time)
 
+    max_iterations = 6
+    try:
+        fast_answer = try_fast_path(prompt, current_user, context, current_time, db)
+        if fast_answer:
+            messages.append({"role": "assistant", "content": fast_answer})
+            conversation_store.append(user_id, messages[stored_message_count:], context)
+            yield "token", {"text": fast_answer}
+            yield "done", {"response": fast_answer}
+            return
+
+        cache_key, cached_answer = lookup_completion(prompt, current_user, current_time, stored_message_count)
+        if cached_answer:
+            messages.append({"role": "assistant", "content": cached_answer})
+            conversation_store.append(user_id, messages[stored_message_count:], context)
+            yield "token", {"text": cached_answer}
+            yield "done", {"response": cached_answer}
+            return
+
+        for iteration in range(max_iterations):
+            content, tool_calls = yield from stream_completion(budget_messages(messages, user_id), with_tools=True)
+
+            if not tool_calls:
+                messages.append({"role": "assistant", "content": content})
+                conversation_store.append(user_id, messages[stored_message_count:], context)
+                remember_completion(cache_key, messages[stored_message_count:], content)
+                yield "done", {"response": content}
+                return
+
+            messages.append({
+                "role": "assistant",
+                "content": content or None,
+                "tool_calls": [
+                    {"id": tool_call.id, "type": "function", "function": {"name": tool_call.function.name, "arguments": tool_call.function.arguments}}
+                    for tool_call in tool_calls
+                ]
+            })
+            for tool_call in tool_calls:
+                yield "tool", {
+                    "name": tool_call.function.name,
+                    "message": describe_tool_call(tool_call.function.name, tool_call.function.arguments, context)
+                }
+            apply_tool_results(tool_calls, current_user, messages, context, db)
 
+        # If we hit max iterations, stream a final response without tools
+        content, _ = yield from stream_completion(budget_messages(messages, user_id), with_tools=False)
+        messages.append({"role": "assistant", "content": content})
+        conversation_store.append(user_id, messages[stored_message_count:], context)
+        remember_completion(cache_key, messages[stored_message_count:], content)
+        yield "done", {"response": content}
+    except Exception as e:
+        conversation_store.append(user_id, messages[stored_message_count:], context)
+        yield "error", {"detail": f"API error: {str(e)}"}
 
+def clear_conversation_history(user_id: int):
+    """Clear conversation history for a specific user."""
+    conversation_store.clear(user_id)
 
+def get_conversation_summary(user_id: int) -> Dict[str, Any]:
+    """Get a summary of the current conversation context."""
+    return conversation_store.summary(user_id)
 
+def get_conversation_store_stats() -> Dict[str, Any]:
+    """Get the size and eviction counters of the conversation store."""
+    return conversation_store.stats()
@@ -0,0 +1,162 @@
+import json
+import logging
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import pytz
+
+from app.core.config import settings
+from app.crud import crud_outbox
+from app.db.session import SessionLocal
+from app.models.outbox import OutboxEvent, OutboxEventType
+from app.models.series import RecurrenceFrequency, SeriesExceptionKind
+
+from .google_calendar_service import build_event_body, create_calendar_events_batch
+from .email_service import send_appointment_confirmations
+from .recurrence import rrule
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Run the worker as its own process next to the API workers:
+#     python -m app.services.outbox_worker
+
+def in_timezone(value: datetime, timezone: str) -> datetime:
+    """Converts a stored appointment time (UTC, naive when read back from SQLite) to the given timezone."""
+    if value.tzinfo is None:
+        value = pytz.UTC.localize(value)
+    return value.astimezone(pytz.timezone(timezone))
+
+def calendar_event_body(event: OutboxEvent) -> dict:
+    """
+    Builds the Google Calendar event body of a booked appointment, or the single recurring
+    event of an appointment series (occurrences cancelled before it is sent are excluded).
+    Times are given in the event's timezone, which is also the timezone of the EXDATE lines.
+    """
+    options = json.loads(event.payload or "{}")
+    timezone = options.get("timezone", "UTC")
+    if event.series is not None:
+        series = event.series
+        excluded = [
+            f"EXDATE;TZID={timezone}:{in_timezone(exception.original_start, timezone):%Y%m%dT%H%M%S}"
+            for exception in series.exceptions if exception.kind == SeriesExceptionKind.CANCELLED
+        ]
+        return build_event_body(
+            summary=f"Appointment series: {series.patient.full_name} with {series.doctor.full_name}",
+            start_time=in_timezone(series.first_start, timezone),
+            end_time=in_timezone(series.first_start + series.duration, timezone),
+            attendees=[series.patient.email, series.doctor.email],
+            timezone=timezone,
+            recurrence=[rrule(series)] + excluded
+        )
+    appointment = event.appointment
+    return build_event_body(
+        summary=f"Appointment: {appointment.patient.full_name} with {appointment.doctor.full_name}",
+        start_time=in_timezone(appointment.start_time, timezone),
+        end_time=in_timezone(appointment.end_time, timezone),
+        attendees=[appointment.patient.email, appointment.doctor.email],
+        timezone=timezone
+    )
+
+def send_calendar_events(events: List[OutboxEvent]) -> Dict[Any, dict]:
+    """
+    Creates the Google Calendar events of many booked appointments and series with batch requests.
+    Returns the calendar result of each outbox event, keyed by the event's subject_key.
+    """
+    return create_calendar_events_batch({event.subject_key: calendar_event_body(event) for event in events})
+
+def confirmation_email(event: OutboxEvent) -> dict:
+    """Builds the confirmation email of a booked appointment or appointment series, in the event's timezone."""
+    timezone = json.loads(event.payload or "{}").get("timezone", "UTC")
+    if event.series is not None:
+        series = event.series
+        first_start = in_timezone(series.first_start, timezone)
+        if series.frequency == RecurrenceFrequency.WEEKLY:
+            every = f"{first_start:%A}" if series.interval == 1 else f"{series.interval} weeks on {first_start:%A}"
+        else:
+            every = "day" if series.interval == 1 else f"{series.interval} days"
+        return {
+            "to": series.patient.email,
+            "patient_name": series.patient.full_name,
+            "doctor_name": series.doctor.full_name,
+            "appointment_time": f"every {every} at {first_start:%I:%M %p %Z}, {series.occurrences} visits starting {first_start:%B %d, %Y}",
+        }
+    appointment = event.appointment
+    return {
+        "to": appointment.patient.email,
+        "patient_name": appointment.patient.full_name,
+        "doctor_name": appointment.doctor.full_name,
+        "appointment_time": in_timezone(appointment.start_time, timezone).strftime("%A, %B %d, %Y at %I:%M %p %Z"),
+    }
+
+def send_confirmation_emails(events: List[OutboxEvent]) -> Dict[Any, dict]:
+    """
+    Sends the confirmation emails of many booked appointments and series in as few batches as possible.
+    Returns the email result of each outbox event, keyed by the event's subject_key.
+    """
+    return send_appointment_confirmations({event.subject_key: confirmation_email(event) for event in events})
+
+# Event types whose claimed events are sent together; each sender returns {subject_key: result}
+BATCH_SENDERS = {
+    OutboxEventType.CALENDAR_EVENT: send_calendar_events,
+    OutboxEventType.CONFIRMATION_EMAIL: send_confirmation_emails,
+}
+
+def finish_event(db, event: OutboxEvent, result: Optional[str] = None, error: Optional[str] = None):
+    """Marks a processed outbox event done, or failed with the given error."""
+    if error is None:
+        crud_outbox.mark_event_done(db, event, result=result)
+        return
+    db.rollback()
+    logger.warning(f"Outbox event {event.id} ({event.event_type.value}) failed on attempt {event.attempts}: {error}")
+    crud_outbox.mark_event_failed(
+        db, event, error=error,
+        max_attempts=settings.OUTBOX_MAX_ATTEMPTS, backoff_seconds=settings.OUTBOX_BACKOFF_SECONDS
+    )
+
+def process_due_events(batch_size: int = None) -> int:
+    """
+    Claims one batch of due outbox events and carries them out.
+    Claimed calendar events, and claimed confirmation emails, are each sent together in batch
+    requests rather than one request per event. Every event type has a sender in BATCH_SENDERS.
+    Returns the number of events processed, so callers can poll faster while there is a backlog.
+    """
+    db = SessionLocal()
+    try:
+        events = crud_outbox.claim_due_events(
+            db, limit=batch_size or settings.OUTBOX_BATCH_SIZE, lease_seconds=settings.OUTBOX_LEASE_SECONDS
+        )
+
+        for event_type, send_batch in BATCH_SENDERS.items():
+            batch = [event for event in events if event.event_type == event_type]
+            if not batch:
+                continue
+            try:
+                batch_results = send_batch(batch)
+            except Exception as e:
+                batch_results = {event.subject_key: {"success": False, "error": str(e)} for event in batch}
+            for event in batch:
+                batch_result = batch_results.get(event.subject_key, {"success": False, "error": "No result was returned."})
+                if batch_result.get("success"):
+                    finish_event(db, event, result=batch_result.get("link"))
+                else:
+                    finish_event(db, event, error=batch_result.get("error") or batch_result.get("message") or "Side effect failed.")
+        return len(events)
+    finally:
+        db.close()
+
+def run_worker():
+    """Polls the outbox forever, draining due events in batches."""
+    logger.info("Outbox worker started.")
+    while True:
+        try:
+            processed = process_due_events()
+        except Exception as e:
+            logger.error(f"Error while draining the outbox: {e}")
+            processed = 0
+        if not processed:
+            time.sleep(settings.OUTBOX_POLL_SECONDS)
+
+if __name__ == "__main__":
+    run_worker()
@@ -0,0 +1,71 @@
+from datetime import date, datetime, time, timedelta
+from typing import Any, Iterator, List, NamedTuple, Optional
+
+# Expands appointment series (see app.models.series) into occurrences. Occurrence n starts at
+# first_start + n * step, so the occurrences that touch a time range are found with arithmetic
+# instead of walking the series from its start, and a series is never expanded beyond the range asked for.
+
+
+class Occurrence(NamedTuple):
+    series_id: Optional[int]
+    original_start: datetime  # Identifies the occurrence, even after it was rescheduled
+    start_time: datetime
+    end_time: datetime
+    rescheduled: bool
+
+
+def occurrence_count(first_start: datetime, step: timedelta, count: Optional[int] = None, until: Optional[date] = None) -> int:
+    """Number of occurrences of a series given a count, a last day (inclusive), or both (whichever ends first)."""
+    counts = []
+    if count is not None:
+        counts.append(count)
+    if until is not None:
+        counts.append(max(0, (datetime.combine(until, time.max) - first_start) // step + 1))
+    return min(counts) if counts else 0
+
+
+def occurrence_index(series: Any, original_start: datetime) -> Optional[int]:
+    """Returns n if original_start is the start of occurrence n of the series, else None."""
+    offset = original_start - series.first_start
+    if offset < timedelta(0) or offset % series.step:
+        return None
+    index = offset // series.step
+    return index if index < series.occurrences else None
+
+
+def original_starts(series: Any, range_start: datetime, range_end: datetime) -> Iterator[datetime]:
+    """
+    Lazily yields the original starts of the occurrences that overlap [range_start, range_end),
+    ignoring exceptions. Jumps straight to the first one instead of walking from first_start.
+    """
+    step, duration = series.step, series.duration
+    # Occurrence n overlaps the range when first_start + n * step + duration > range_start
+    index = max(0, (range_start - duration - series.first_start) // step + 1)
+    start = series.first_start + index * step
+    while index < series.occurrences and start < range_end:
+        yield start
+        index += 1
+        start += step
+
+
+def expand_series(series: Any, range_start: datetime, range_end: datetime) -> List[Occurrence]:
+    """
+    Returns the occurrences of a series that overlap [range_start, range_end), in time order:
+    cancelled occurrences are left out and rescheduled ones appear at their new times.
+    """
+    exceptions = {exception.original_start: exception for exception in series.exceptions}
+    occurrences = [
+        Occurrence(series.id, start, start, start + series.duration, False)
+        for start in original_starts(series, range_start, range_end)
+        if start not in exceptions
+    ]
+    for exception in exceptions.values():
+        if exception.start_time is not None and exception.start_time < range_end and exception.end_time > range_start:
+            occurrences.append(Occurrence(series.id, exception.original_start, exception.start_time, exception.end_time, True))
+    occurrences.sort(key=lambda occurrence: occurrence.start_time)
+    return occurrences
+
+
+def rrule(series: Any) -> str:
+    """The iCalendar RRULE of a series, as used by Google Calendar's recurrence field."""
+    return f"RRULE:FREQ={series.frequency.name};INTERVAL={series.interval};COUNT={series.occurrences}"
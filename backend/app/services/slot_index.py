@@ -0,0 +1,254 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.crud import crud_appointment, crud_series
+from app.db.session import session_scope
+from app.models.appointment import AppointmentStatus
+
+from .availability_engine import ScheduleTemplate, day_start_minutes
+from .cache import on_appointment_booked, on_appointment_released
+
+# A day is 48 half-hour slots; bit i of a bitmap is the slot starting i * 30 minutes after midnight
+SLOT_MINUTES = 30
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+FULL_DAY_MASK = (1 << SLOTS_PER_DAY) - 1
+
+
+def slot_range_mask(first_slot: int, end_slot: int) -> int:
+    """Bitmap with the slots first_slot..end_slot-1 set."""
+    first_slot, end_slot = max(0, first_slot), min(SLOTS_PER_DAY, end_slot)
+    if end_slot <= first_slot:
+        return 0
+    return ((1 << (end_slot - first_slot)) - 1) << first_slot
+
+
+# Bookable slots of the 09:00-17:00 workday
+WORKDAY_MASK = slot_range_mask(9 * 60 // SLOT_MINUTES, 17 * 60 // SLOT_MINUTES)
+
+
+def template_day_mask(template: ScheduleTemplate, day: date) -> Optional[int]:
+    """
+    Bitmap of the bookable slots of a schedule template's day, or None when the template's slots
+    do not fall on the index's half-hour grid (those days go through the interval engine instead).
+    """
+    if template.slot_minutes != SLOT_MINUTES:
+        return None
+    midnight = day_start_minutes(day)
+    mask = 0
+    for start, end in template.working_minutes(day):
+        if (start - midnight) % SLOT_MINUTES:
+            return None
+        mask |= slot_range_mask((start - midnight) // SLOT_MINUTES, (end - midnight) // SLOT_MINUTES)
+    return mask
+
+
+def _minutes_into_day(moment: datetime) -> float:
+    return moment.hour * 60 + moment.minute + (moment.second + moment.microsecond / 1e6) / 60
+
+
+def interval_masks(day: date, start_time: datetime, end_time: datetime) -> Tuple[int, int]:
+    """
+    Returns (touched, covered) bitmaps of an appointment on a day: the slots it overlaps at all,
+    and the slots it fully covers. Parts of the interval on other days are ignored.
+    """
+    if end_time.date() < day or start_time.date() > day:
+        return 0, 0
+    start_minute = _minutes_into_day(start_time) if start_time.date() == day else 0
+    end_minute = _minutes_into_day(end_time) if end_time.date() == day else 24 * 60
+    touched = slot_range_mask(math.floor(start_minute / SLOT_MINUTES), math.ceil(end_minute / SLOT_MINUTES))
+    covered = slot_range_mask(math.ceil(start_minute / SLOT_MINUTES), math.floor(end_minute / SLOT_MINUTES))
+    return touched, covered
+
+
+def booked_mask(day: date, intervals: Iterable[Tuple[datetime, datetime]]) -> int:
+    """Bitmap of the slots of a day overlapped by any of the (start_time, end_time) intervals."""
+    mask = 0
+    for start_time, end_time in intervals:
+        mask |= interval_masks(day, start_time, end_time)[0]
+    return mask
+
+
+def slot_labels(free_mask: int) -> List[str]:
+    """Turns a bitmap of free slots into "HH:MM" start times, earliest first."""
+    labels = []
+    while free_mask:
+        lowest = free_mask & -free_mask
+        slot = lowest.bit_length() - 1
+        labels.append(f"{slot * SLOT_MINUTES // 60:02d}:{slot * SLOT_MINUTES % 60:02d}")
+        free_mask ^= lowest
+    return labels
+
+
+class SlotIndex:
+    """
+    In-memory availability index holding one bitmap of booked slots per (doctor, day).
+
+    A bitmap is loaded lazily the first time its day is asked about, and then kept up to date
+    incrementally as appointments are booked, moved and cancelled, so free-slot queries are bitwise
+    operations without a database hit. Entries expire after ttl_seconds so that bookings made by
+    other worker processes are picked up, and the least recently used entries are evicted when full.
+
+    Every booking change of a (doctor, day) gets a version, whether or not its bitmap is loaded. A
+    bitmap read from the database is only stored if its day did not change while it was read, since
+    the rows read may predate the change; otherwise it is returned once and read again on next use.
+    """
+
+    def __init__(self, loader: Callable[[int, date, Optional[Session]], List[Tuple[datetime, datetime]]], max_entries: int, ttl_seconds: int):
+        self.loader = loader
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        # (doctor_id, day) -> (booked bitmap, expires_at), ordered from least to most recently used
+        self._entries: "OrderedDict[Tuple[int, date], Tuple[int, float]]" = OrderedDict()
+        # (doctor_id, day) -> version of its last booking change, oldest first; bounded like the
+        # entries, with the newest version dropped from it standing in for every dropped key
+        self._changes: "OrderedDict[Tuple[int, date], int]" = OrderedDict()
+        self._version = 0
+        self._forgotten_version = 0
+        self._lock = threading.Lock()
+        self.loads = 0
+        self.discarded_loads = 0
+        self.hits = 0
+        self.incremental_updates = 0
+        self.invalidations = 0
+
+    def _store(self, key: Tuple[int, date], mask: int):
+        self._entries[key] = (mask, time.monotonic() + self.ttl_seconds)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _record_change(self, key: Tuple[int, date]):
+        self._version += 1
+        self._changes[key] = self._version
+        self._changes.move_to_end(key)
+        while len(self._changes) > self.max_entries:
+            self._forgotten_version = self._changes.popitem(last=False)[1]
+
+    def _changed_since(self, key: Tuple[int, date], version: int) -> bool:
+        return self._changes.get(key, self._forgotten_version) > version
+
+    def version(self) -> int:
+        """Returns the current change version; take it before reading intervals to pass to prime()."""
+        with self._lock:
+            return self._version
+
+    def prime(self, doctor_id: int, day: date, intervals: Iterable[Tuple[datetime, datetime]], version: int):
+        """
+        Stores the bitmap of a day whose scheduled appointments were already read, e.g. by a bulk query
+        started at version. Nothing is stored if the day changed since then.
+        """
+        key = (doctor_id, day)
+        mask = booked_mask(day, intervals)
+        with self._lock:
+            if self._changed_since(key, version):
+                self.discarded_loads += 1
+                return
+            self._store(key, mask)
+
+    def booked(self, doctor_id: int, day: date, db: Optional[Session] = None) -> int:
+        """
+        Returns the booked bitmap of a doctor's day, loading it on first use or after expiry
+        (through db when the caller has a session).
+        """
+        key = (doctor_id, day)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            version = self._version
+
+        mask = booked_mask(day, self.loader(doctor_id, day, db))
+        with self._lock:
+            self.loads += 1
+            if self._changed_since(key, version):
+                # A booking or cancellation committed while loading may be missing from the rows read
+                self.discarded_loads += 1
+            else:
+                self._store(key, mask)
+        return mask
+
+    def free_slots(self, doctor_id: int, day: date, bookable_mask: int = WORKDAY_MASK, db: Optional[Session] = None) -> List[str]:
+        """Returns the free "HH:MM" slots of a doctor's day."""
+        return slot_labels(bookable_mask & ~self.booked(doctor_id, day, db))
+
+    def _days(self, start_time: datetime, end_time: datetime) -> List[date]:
+        return [start_time.date() + timedelta(days=offset) for offset in range((end_time.date() - start_time.date()).days + 1)]
+
+    def add_appointment(self, doctor_id: int, start_time: datetime, end_time: datetime):
+        """Marks a newly scheduled appointment in the loaded bitmaps of its days."""
+        with self._lock:
+            for day in self._days(start_time, end_time):
+                self._record_change((doctor_id, day))
+                entry = self._entries.get((doctor_id, day))
+                if entry is not None:
+                    self._entries[(doctor_id, day)] = (entry[0] | interval_masks(day, start_time, end_time)[0], entry[1])
+                    self.incremental_updates += 1
+
+    def remove_appointment(self, doctor_id: int, start_time: datetime, end_time: datetime):
+        """
+        Frees a cancelled or moved appointment in the loaded bitmaps of its days. Slots the appointment
+        fully covered cannot hold any other appointment and are cleared in place; if it only partly
+        covered a slot, which another appointment may share, the day is reloaded on next use instead.
+        """
+        with self._lock:
+            for day in self._days(start_time, end_time):
+                key = (doctor_id, day)
+                self._record_change(key)
+                entry = self._entries.get(key)
+                if entry is None:
+                    continue
+                touched, covered = interval_masks(day, start_time, end_time)
+                if touched == covered:
+                    self._entries[key] = (entry[0] & ~covered, entry[1])
+                    self.incremental_updates += 1
+                else:
+                    del self._entries[key]
+                    self.invalidations += 1
+
+    def clear(self):
+        """Drops every bitmap."""
+        with self._lock:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Reports the index size and its load/hit/update counters."""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "loads": self.loads,
+                "discarded_loads": self.discarded_loads,
+                "hits": self.hits,
+                "incremental_updates": self.incremental_updates,
+                "invalidations": self.invalidations,
+            }
+
+
+def load_scheduled_intervals(doctor_id: int, day: date, db: Optional[Session] = None) -> List[Tuple[datetime, datetime]]:
+    """Reads the (start_time, end_time) of a doctor's scheduled appointments and series occurrences on a day."""
+    with session_scope(db) as db:
+        intervals = [
+            (appointment.start_time, appointment.end_time)
+            for appointment in crud_appointment.get_appointments_by_doctor_for_day(db, doctor_id=doctor_id, target_date=day)
+            if appointment.status == AppointmentStatus.SCHEDULED
+        ]
+        day_start = datetime.combine(day, datetime.min.time())
+        series_intervals = crud_series.get_occurrence_intervals(db, day_start, day_start + timedelta(days=1), doctor_ids=[doctor_id])
+        return intervals + series_intervals.get(doctor_id, [])
+
+
+def build_slot_index(max_entries: int, ttl_seconds: int) -> SlotIndex:
+    """Creates a SlotIndex backed by the database and subscribes it to appointment changes."""
+    index = SlotIndex(load_scheduled_intervals, max_entries=max_entries, ttl_seconds=ttl_seconds)
+    on_appointment_booked(index.add_appointment)
+    on_appointment_released(index.remove_appointment)
+    return index
@@ -0,0 +1,235 @@
+"""
+Offline replay benchmark for the agent endpoint.
+
+Starts the stub LLM server, points the backend at it and at a fresh SQLite database, seeds the
+doctors and patients of a scenario file, then drives POST /api/v1/agent/prompt through every
+scripted multi-turn scenario. Reports p50/p95/p99 latency, LLM round trips, tool calls and
+DB queries and connection pool checkouts per prompt. Turns with an expect_booking entry also check
+the appointment the prompt stored, at the patient's India time. Thresholds make the run exit
+non-zero, so regressions fail CI:
+
+    python -m benchmarks.agent_replay --iterations 20 --llm-latency-ms 150 --max-p95-ms 800
+"""
+import argparse
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from benchmarks.stub_llm_server import StubLLM, load_transcripts, start_stub_server
+
+DEFAULT_SCENARIOS = os.path.join(os.path.dirname(__file__), "scenarios", "agent_scenarios.json")
+BENCH_PASSWORD = "bench-password"
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of values."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(samples: List[Dict[str, float]]) -> Dict[str, Any]:
+    latencies = [sample["latency_ms"] for sample in samples]
+    prompts = len(samples) or 1
+    return {
+        "prompts": len(samples),
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50), 2),
+            "p95": round(percentile(latencies, 95), 2),
+            "p99": round(percentile(latencies, 99), 2),
+            "max": round(max(latencies, default=0.0), 2),
+        },
+        "llm_round_trips_per_prompt": round(sum(sample["llm_requests"] for sample in samples) / prompts, 2),
+        "tool_calls_per_prompt": round(sum(sample["tool_calls"] for sample in samples) / prompts, 2),
+        "db_queries_per_prompt": round(sum(sample["db_queries"] for sample in samples) / prompts, 2),
+        "db_checkouts_per_prompt": round(sum(sample["db_checkouts"] for sample in samples) / prompts, 2),
+        "errors": sum(1 for sample in samples if sample["status"] != 200),
+    }
+
+
+def reset_appointments(db, patient_id: int):
+    """Cancels a patient's scheduled appointments, so every replay of a scenario starts from free schedules."""
+    from app.crud import crud_appointment
+    from app.models.appointment import AppointmentStatus
+    from app.schemas.appointment import AppointmentUpdate
+
+    for appointment in crud_appointment.get_appointments_by_user(db, user_id=patient_id):
+        if appointment.status == AppointmentStatus.SCHEDULED:
+            crud_appointment.update_appointment(db, appointment.id, AppointmentUpdate(status=AppointmentStatus.CANCELLED))
+
+
+def check_booking(db, patient_id: int, expected: Dict[str, Any], started: datetime) -> Optional[str]:
+    """
+    Returns why the patient's scheduled appointments with the expected doctor do not match the
+    expectation, or None if they do. The expectation is an India date (days_ahead of when the prompt
+    was sent) and time, or an india_time of null when nothing may be booked with that doctor.
+    """
+    import pytz
+
+    from app.crud import crud_appointment
+    from app.models.appointment import AppointmentStatus
+
+    india_tz = pytz.timezone("Asia/Kolkata")
+    booked = []
+    for appointment in crud_appointment.get_appointments_by_user(db, user_id=patient_id):
+        if appointment.status != AppointmentStatus.SCHEDULED or appointment.doctor.full_name != expected["doctor"]:
+            continue
+        # Appointments are stored in UTC
+        start_time = appointment.start_time if appointment.start_time.tzinfo else pytz.UTC.localize(appointment.start_time)
+        booked.append(start_time.astimezone(india_tz).strftime("%Y-%m-%d %H:%M"))
+
+    if expected.get("india_time") is None:
+        return f"expected no appointment with {expected['doctor']}, found {booked}" if booked else None
+    wanted = f"{started.astimezone(india_tz).date() + timedelta(days=expected['days_ahead'])} {expected['india_time']}"
+    if wanted in booked:
+        return None
+    return f"expected {expected['doctor']} at {wanted} India time, found {booked or 'no appointment'}"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Replay scripted agent conversations against a stub LLM.")
+    parser.add_argument("--scenarios", default=DEFAULT_SCENARIOS)
+    parser.add_argument("--iterations", type=int, default=10, help="How many times every scenario is replayed")
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0, help="Latency the stub adds to each completion")
+    parser.add_argument("--cold", action="store_true", help="Clear the completion and tool caches before every scenario")
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    parser.add_argument("--max-p95-ms", type=float, help="Fail if the p95 prompt latency is above this")
+    parser.add_argument("--max-llm-round-trips", type=float, help="Fail if the mean LLM round trips per prompt is above this")
+    parser.add_argument("--max-db-queries", type=float, help="Fail if the mean DB queries per prompt is above this")
+    parser.add_argument("--max-db-checkouts", type=float, help="Fail if the mean connection pool checkouts per prompt is above this")
+    args = parser.parse_args()
+
+    stub = StubLLM(load_transcripts(args.scenarios), latency_ms=args.llm_latency_ms)
+    server = start_stub_server(stub)
+    database_path = os.path.join(tempfile.mkdtemp(prefix="agent-replay-"), "bench.db")
+
+    # The app reads its settings at import time, so configure the environment first
+    os.environ["DATABASE_URL"] = f"sqlite:///{database_path}"
+    os.environ["GROQ_API_KEY"] = "stub"
+    os.environ["GROQ_BASE_URL"] = f"http://127.0.0.1:{server.server_port}"
+    os.environ.setdefault("SECRET_KEY", "agent-replay-secret")
+
+    from fastapi.testclient import TestClient
+    from sqlalchemy import event
+
+    from app.main import app
+    from app.db.session import engine, SessionLocal, get_pool_stats, pool_metrics
+    from app.crud import crud_user
+    from app.models.user import UserRole
+    from app.schemas.user import UserCreate
+    from app.services import llm_service
+
+    db_queries = {"count": 0}
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def count_query(*_):
+        db_queries["count"] += 1
+
+    with open(args.scenarios) as scenario_file:
+        scenario_set = json.load(scenario_file)
+
+    samples = []
+    booking_mismatches = []
+    with TestClient(app) as client:
+        # Doctors are seeded first so they get ids 1..n, which the recorded tool calls refer to
+        db = SessionLocal()
+        try:
+            for role, people in ((UserRole.DOCTOR, scenario_set["doctors"]), (UserRole.PATIENT, scenario_set["patients"])):
+                for person in people:
+                    crud_user.create_user(db, UserCreate(email=person["email"], full_name=person["full_name"], password=BENCH_PASSWORD, role=role))
+        finally:
+            db.close()
+
+        tokens = {}
+        for patient in scenario_set["patients"]:
+            login = client.post("/api/v1/auth/login", data={"username": patient["email"], "password": BENCH_PASSWORD})
+            tokens[patient["email"]] = login.json()["access_token"]
+
+        for _ in range(args.iterations):
+            for scenario in scenario_set["scenarios"]:
+                headers = {"Authorization": f"Bearer {tokens[scenario['patient']]}"}
+                user_id = client.get("/api/v1/users/me", headers=headers).json()["id"]
+                llm_service.clear_conversation_history(user_id)
+                db = SessionLocal()
+                try:
+                    reset_appointments(db, user_id)
+                finally:
+                    db.close()
+                if args.cold:
+                    llm_service.completion_cache.clear()
+                    llm_service.doctor_cache.clear()
+                    llm_service.availability_index.clear()
+
+                for turn in scenario["turns"]:
+                    before, queries_before, checkouts_before = stub.snapshot(), db_queries["count"], pool_metrics.checkouts
+                    sent_at = datetime.now().astimezone()
+                    started = time.perf_counter()
+                    response = client.post("/api/v1/agent/prompt", json={"prompt_text": turn["prompt"]}, headers=headers)
+                    latency_ms = (time.perf_counter() - started) * 1000
+                    after = stub.snapshot()
+                    if "expect_booking" in turn:
+                        db = SessionLocal()
+                        try:
+                            mismatch = check_booking(db, user_id, turn["expect_booking"], sent_at)
+                        finally:
+                            db.close()
+                        if mismatch:
+                            booking_mismatches.append(f"{scenario['name']}: {mismatch}")
+                    samples.append({
+                        "scenario": scenario["name"],
+                        "status": response.status_code,
+                        "latency_ms": latency_ms,
+                        "llm_requests": after["requests"] - before["requests"],
+                        "tool_calls": after["tool_calls"] - before["tool_calls"],
+                        "db_queries": db_queries["count"] - queries_before,
+                        "db_checkouts": pool_metrics.checkouts - checkouts_before,
+                    })
+
+    server.shutdown()
+
+    report = {
+        "overall": summarize(samples),
+        "by_scenario": {
+            scenario["name"]: summarize([sample for sample in samples if sample["scenario"] == scenario["name"]])
+            for scenario in scenario_set["scenarios"]
+        },
+        "unmatched_llm_requests": stub.snapshot()["unmatched"],
+        "booking_mismatches": booking_mismatches,
+        "fast_path": llm_service.get_fast_path_stats(),
+        "completion_cache": llm_service.get_completion_cache_stats(),
+        "tool_caches": llm_service.get_tool_cache_stats(),
+        "db_pool": get_pool_stats()["sync"],
+    }
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(report, output_file, indent=2)
+
+    overall = report["overall"]
+    failures = []
+    if args.max_p95_ms is not None and overall["latency_ms"]["p95"] > args.max_p95_ms:
+        failures.append(f"p95 latency {overall['latency_ms']['p95']}ms > {args.max_p95_ms}ms")
+    if args.max_llm_round_trips is not None and overall["llm_round_trips_per_prompt"] > args.max_llm_round_trips:
+        failures.append(f"LLM round trips per prompt {overall['llm_round_trips_per_prompt']} > {args.max_llm_round_trips}")
+    if args.max_db_queries is not None and overall["db_queries_per_prompt"] > args.max_db_queries:
+        failures.append(f"DB queries per prompt {overall['db_queries_per_prompt']} > {args.max_db_queries}")
+    if args.max_db_checkouts is not None and overall["db_checkouts_per_prompt"] > args.max_db_checkouts:
+        failures.append(f"DB checkouts per prompt {overall['db_checkouts_per_prompt']} > {args.max_db_checkouts}")
+    if overall["errors"]:
+        failures.append(f"{overall['errors']} prompts returned an error status")
+    failures.extend(f"wrong booking in {mismatch}" for mismatch in booking_mismatches)
+
+    for failure in failures:
+        print(f"REGRESSION: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,244 @@
+"""
+Appointment index benchmark.
+
+Seeds the appointments table with millions of rows (hundreds of doctors booked back to back over
+several years, with a mix of statuses), then runs the hot appointment queries - a doctor's day,
+a patient's clash check, the scheduled appointments of all doctors in a range, a user's
+appointments and the doctor overlap check - at the baseline migration and again after the
+composite index migration. Prints the query plans and median timings of both:
+
+    python -m benchmarks.appointment_indexes --rows 2000000 --repeat 25
+
+Uses a fresh SQLite database unless DATABASE_URL is already set (e.g. to a PostgreSQL test database,
+where EXPLAIN plans are reported instead of SQLite's EXPLAIN QUERY PLAN). Fails if a query still
+scans the whole table once the indexes exist.
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+BENCH_PASSWORD_HASH = "not-a-real-hash"
+SLOT_MINUTES = 30
+SLOTS_PER_DAY = 16  # 09:00-17:00
+# The composite index migration; the ones after it are not part of what is measured
+INDEX_REVISION = "0002_appointment_query_indexes"
+
+# The hot queries of crud_appointment, llm_service and the overlap check, as plain SQL
+QUERIES = {
+    "doctor_day": (
+        "SELECT id, patient_id, start_time, end_time, status FROM appointments "
+        "WHERE doctor_id = :doctor_id AND start_time >= :day_start AND start_time <= :day_end ORDER BY start_time"
+    ),
+    "patient_clash": (
+        "SELECT id FROM appointments "
+        "WHERE patient_id = :patient_id AND start_time <= :slot_end AND end_time > :slot_start LIMIT 1"
+    ),
+    "scheduled_in_range": (
+        "SELECT doctor_id, start_time, end_time FROM appointments "
+        "WHERE status = 'SCHEDULED' AND start_time >= :day_start AND start_time <= :day_end"
+    ),
+    "user_appointments": (
+        "SELECT id, start_time FROM appointments WHERE patient_id = :patient_id OR doctor_id = :patient_id"
+    ),
+    "doctor_overlap": (
+        "SELECT id FROM appointments WHERE doctor_id = :doctor_id AND status = 'SCHEDULED' "
+        "AND start_time < :slot_end AND end_time > :slot_start LIMIT 1"
+    ),
+}
+
+
+@contextmanager
+def without_overlap_checks(connection):
+    """
+    Drops the overlap triggers (SQLite) or exclusion constraints (PostgreSQL) while seeding and puts them
+    back afterwards; they would otherwise check every seeded row against the whole table.
+    """
+    from sqlalchemy import text
+
+    if connection.dialect.name == "sqlite":
+        triggers = connection.execute(text("SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'appointments'")).all()
+        for name, _ in triggers:
+            connection.execute(text(f"DROP TRIGGER {name}"))
+        yield
+        for _, sql in triggers:
+            connection.execute(text(sql))
+    else:
+        constraints = connection.execute(text(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = 'appointments'::regclass AND contype = 'x'"
+        )).all()
+        for name, _ in constraints:
+            connection.execute(text(f"ALTER TABLE appointments DROP CONSTRAINT {name}"))
+        yield
+        for name, definition in constraints:
+            connection.execute(text(f"ALTER TABLE appointments ADD CONSTRAINT {name} {definition}"))
+
+
+def seed(engine, rows: int, doctors: int, patients: int, first_day: datetime, rng: random.Random) -> int:
+    """
+    Inserts the users and `rows` appointments in chunks, and returns the number of days they cover.
+    At every slot each doctor sees a different patient, so the data satisfies the overlap constraints
+    for doctors and patients alike.
+    """
+    from sqlalchemy import insert
+
+    from app.models.appointment import Appointment
+    from app.models.user import User
+
+    with engine.begin() as connection:
+        connection.execute(insert(User.__table__), [
+            {"id": user_id, "full_name": f"User {user_id}", "email": f"user{user_id}@example.com",
+             "hashed_password": BENCH_PASSWORD_HASH, "role": "DOCTOR" if user_id <= doctors else "PATIENT", "is_active": True}
+            for user_id in range(1, doctors + patients + 1)
+        ])
+
+    statuses = ["SCHEDULED"] * 17 + ["CANCELLED"] * 2 + ["COMPLETED"]
+    chunk: List[dict] = []
+    slot = 0
+    with engine.begin() as connection, without_overlap_checks(connection):
+        while slot * doctors < rows:
+            day, slot_of_day = divmod(slot, SLOTS_PER_DAY)
+            start_time = first_day + timedelta(days=day, minutes=SLOT_MINUTES * slot_of_day)
+            for doctor_offset in range(min(doctors, rows - slot * doctors)):
+                chunk.append({
+                    "doctor_id": doctor_offset + 1,
+                    "patient_id": doctors + 1 + (slot * doctors + doctor_offset) % patients,
+                    "start_time": start_time,
+                    "end_time": start_time + timedelta(minutes=SLOT_MINUTES),
+                    "status": rng.choice(statuses),
+                })
+            slot += 1
+            if len(chunk) >= 50_000:
+                connection.execute(insert(Appointment.__table__), chunk)
+                chunk = []
+        if chunk:
+            connection.execute(insert(Appointment.__table__), chunk)
+    return (slot - 1) // SLOTS_PER_DAY + 1
+
+
+def explain(connection, sql: str, params: dict) -> List[str]:
+    """Returns the query plan as lines of text."""
+    from sqlalchemy import text
+
+    if connection.dialect.name == "sqlite":
+        return [row[-1] for row in connection.execute(text("EXPLAIN QUERY PLAN " + sql), params)]
+    return [row[0] for row in connection.execute(text("EXPLAIN " + sql), params)]
+
+
+def scans_table(plan: List[str]) -> bool:
+    """Whether a plan reads the whole appointments table."""
+    return any(line.strip().startswith("SCAN appointments") or "Seq Scan on appointments" in line for line in plan)
+
+
+def run_queries(engine, params_list: List[dict]) -> Dict[str, dict]:
+    """Times every query over the same parameter sets and reports its plan and median time."""
+    from sqlalchemy import text
+
+    results = {}
+    with engine.connect() as connection:
+        for name, sql in QUERIES.items():
+            statement = text(sql)
+            timings = []
+            for params in params_list:
+                started = time.perf_counter()
+                connection.execute(statement, params).all()
+                timings.append(time.perf_counter() - started)
+            results[name] = {
+                "median_ms": round(statistics.median(timings) * 1000, 3),
+                "plan": explain(connection, sql, params_list[0]),
+            }
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compare the hot appointment queries before and after the composite indexes.")
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--doctors", type=int, default=500)
+    parser.add_argument("--patients", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=25, help="Timed runs of each query, with different parameters")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    if args.patients < args.doctors:
+        parser.error("--patients must be at least --doctors")
+
+    if "DATABASE_URL" not in os.environ:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='appointment-indexes-'), 'bench.db')}"
+    os.environ.setdefault("SECRET_KEY", "appointment-indexes-secret")
+
+    from alembic import command
+    from alembic.config import Config
+    from sqlalchemy import text
+
+    from app.db.initial_data import ALEMBIC_INI, BASELINE_REVISION
+    from app.db.session import engine
+
+    config = Config(ALEMBIC_INI)
+    command.upgrade(config, BASELINE_REVISION)
+
+    rng = random.Random(args.seed)
+    first_day = datetime.combine(datetime.now().date() - timedelta(days=365), datetime.min.time().replace(hour=9))
+    started = time.perf_counter()
+    days = seed(engine, args.rows, args.doctors, args.patients, first_day, rng)
+    seed_seconds = time.perf_counter() - started
+
+    params_list = []
+    for _ in range(args.repeat):
+        day = first_day + timedelta(days=rng.randrange(days))
+        slot_start = day + timedelta(minutes=SLOT_MINUTES * rng.randrange(SLOTS_PER_DAY))
+        params_list.append({
+            "doctor_id": rng.randint(1, args.doctors),
+            "patient_id": rng.randint(args.doctors + 1, args.doctors + args.patients),
+            "day_start": day.replace(hour=0),
+            "day_end": day.replace(hour=23, minute=59, second=59),
+            "slot_start": slot_start,
+            "slot_end": slot_start + timedelta(minutes=SLOT_MINUTES),
+        })
+
+    with engine.begin() as connection:
+        connection.execute(text("ANALYZE"))
+    before = run_queries(engine, params_list)
+
+    started = time.perf_counter()
+    command.upgrade(config, INDEX_REVISION)
+    with engine.begin() as connection:
+        connection.execute(text("ANALYZE"))
+    index_seconds = time.perf_counter() - started
+    after = run_queries(engine, params_list)
+
+    report = {
+        "database": engine.dialect.name,
+        "rows": args.rows,
+        "doctors": args.doctors,
+        "patients": args.patients,
+        "days": days,
+        "seed_seconds": round(seed_seconds, 1),
+        "index_migration_seconds": round(index_seconds, 1),
+        "queries": {
+            name: {
+                "before_ms": before[name]["median_ms"],
+                "after_ms": after[name]["median_ms"],
+                "speedup": round(before[name]["median_ms"] / after[name]["median_ms"], 1) if after[name]["median_ms"] else None,
+                "plan_before": before[name]["plan"],
+                "plan_after": after[name]["plan"],
+            }
+            for name in QUERIES
+        },
+    }
+    print(json.dumps(report, indent=2))
+
+    failures = [name for name in QUERIES if scans_table(after[name]["plan"])]
+    for name in failures:
+        print(f"FAILED: {name} still scans the appointments table", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,220 @@
+"""
+Async endpoint benchmark.
+
+Seeds doctors, patients, appointments and prompt history, then drives the async-native read
+endpoints (GET /users/me, /patients/appointments, /doctors/appointments and /agent/history) and
+their sync counterparts - the same queries on a threadpool thread through get_db and
+get_current_user - with many concurrent clients. Reports requests per second and latency
+percentiles of both paths:
+
+    python -m benchmarks.async_endpoints --users 200 --requests 4000 --concurrency 64
+
+Uses a fresh SQLite database unless DATABASE_URL is already set (e.g. to a PostgreSQL test database).
+Fails if any request errors or if the two paths return different bodies.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+BENCH_PASSWORD = "bench-password"
+ENDPOINTS = ["/users/me", "/patients/appointments", "/doctors/appointments", "/agent/history"]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of values."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def build_sync_app():
+    """An app serving the same endpoints the sync way, as they were before the async engine."""
+    from fastapi import Depends, FastAPI
+    from sqlalchemy.orm import Session
+
+    from app.api.v1.auth import get_db
+    from app.api.v1.doctors import require_doctor
+    from app.crud import crud_appointment, crud_prompt_history
+    from app.models.user import User as UserModel
+    from app.schemas.appointment import Appointment
+    from app.schemas.prompt_history import PromptHistory
+    from app.schemas.user import User
+    from app.services import auth_service
+
+    sync_app = FastAPI()
+
+    @sync_app.get("/users/me", response_model=User)
+    def read_users_me(current_user: UserModel = Depends(auth_service.get_current_user)):
+        return current_user
+
+    @sync_app.get("/patients/appointments", response_model=List[Appointment])
+    def read_user_appointments(db: Session = Depends(get_db), current_user: UserModel = Depends(auth_service.get_current_user)):
+        return crud_appointment.get_appointments_by_user(db, user_id=current_user.id)
+
+    @sync_app.get("/doctors/appointments", response_model=List[Appointment])
+    def read_doctor_appointments(db: Session = Depends(get_db), current_user: UserModel = Depends(require_doctor)):
+        return crud_appointment.get_appointments_by_user(db, user_id=current_user.id)
+
+    @sync_app.get("/agent/history", response_model=List[PromptHistory])
+    def get_user_history(db: Session = Depends(get_db), current_user: UserModel = Depends(auth_service.get_current_user)):
+        return crud_prompt_history.get_prompt_history_by_user(db, user_id=current_user.id)
+
+    return sync_app
+
+
+async def drive(asgi_app, prefix: str, plan: List[Dict[str, str]], concurrency: int) -> Dict[str, Any]:
+    """Sends every planned request with `concurrency` clients at a time; returns timings, statuses and bodies."""
+    import httpx
+
+    latencies: Dict[str, List[float]] = {endpoint: [] for endpoint in ENDPOINTS}
+    errors = 0
+    bodies: Dict[Any, Any] = {}
+    queue = iter(enumerate(plan))
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=asgi_app), base_url="http://bench") as client:
+        async def worker():
+            nonlocal errors
+            for index, request in queue:
+                started = time.perf_counter()
+                response = await client.get(prefix + request["endpoint"], headers={"Authorization": f"Bearer {request['token']}"})
+                latencies[request["endpoint"]].append((time.perf_counter() - started) * 1000)
+                if response.status_code != 200:
+                    errors += 1
+                bodies[(request["endpoint"], request["token"])] = response.json()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "seconds": round(elapsed, 3),
+        "requests_per_second": round(len(plan) / elapsed, 1) if elapsed else None,
+        "errors": errors,
+        "latency_ms": {
+            endpoint: {"p50": round(percentile(values, 50), 2), "p95": round(percentile(values, 95), 2)}
+            for endpoint, values in latencies.items()
+        },
+        "bodies": bodies,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compare the async read endpoints with the sync path under concurrency.")
+    parser.add_argument("--users", type=int, default=100, help="Patients to seed; a tenth as many doctors are seeded")
+    parser.add_argument("--appointments", type=int, default=20, help="Appointments per patient")
+    parser.add_argument("--history", type=int, default=20, help="Prompt history records per patient")
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per path")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--min-speedup", type=float, help="Fail if async throughput is below this multiple of sync throughput")
+    args = parser.parse_args()
+
+    if "DATABASE_URL" not in os.environ:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='async-endpoints-'), 'bench.db')}"
+    os.environ.setdefault("SECRET_KEY", "async-endpoints-secret")
+
+    from sqlalchemy import insert
+
+    from app.core.config import settings
+    from app.crud import crud_user
+    from app.db.initial_data import init_db
+    from app.db.session import SessionLocal
+    from app.main import app
+    from app.models.appointment import Appointment
+    from app.models.prompt_history import PromptHistory
+    from app.models.user import User, UserRole
+    from app.services import auth_service
+
+    init_db()
+    doctors = max(1, args.users // 10)
+    db = SessionLocal()
+    try:
+        # Registration hashes passwords, which is slow and not what is measured, so one hash is reused
+        hashed_password = crud_user.get_password_hash(BENCH_PASSWORD)
+        emails = [f"doctor{i}@example.com" for i in range(doctors)] + [f"patient{i}@example.com" for i in range(args.users)]
+        users = [
+            User(email=email, full_name=email.split("@")[0], hashed_password=hashed_password,
+                 role=UserRole.DOCTOR if email.startswith("doctor") else UserRole.PATIENT, is_active=True)
+            for email in emails
+        ]
+        db.add_all(users)
+        db.commit()
+        doctor_ids = [user.id for user in users[:doctors]]
+        patient_ids = [user.id for user in users[doctors:]]
+
+        # Patients are split into groups of one per doctor, and the groups take turns, so no doctor
+        # or patient is booked twice in a slot and the rows pass the overlap checks
+        first_slot = datetime.combine(datetime.now().date() + timedelta(days=1), datetime.min.time().replace(hour=9))
+        groups = math.ceil(len(patient_ids) / doctors)
+        appointments = []
+        for index, patient_id in enumerate(patient_ids):
+            group, doctor_index = divmod(index, doctors)
+            for k in range(args.appointments):
+                start_time = first_slot + timedelta(minutes=30 * (k * groups + group))
+                appointments.append({"patient_id": patient_id, "doctor_id": doctor_ids[doctor_index],
+                                     "start_time": start_time, "end_time": start_time + timedelta(minutes=30)})
+        if appointments:
+            db.execute(insert(Appointment), appointments)
+        # Distinct timestamps, so both paths return the history in the same order
+        history = [
+            {"user_id": patient_id, "prompt_text": f"Question {i}", "response_text": f"Answer {i}",
+             "created_at": first_slot - timedelta(days=1, minutes=i)}
+            for patient_id in patient_ids for i in range(args.history)
+        ]
+        if history:
+            db.execute(insert(PromptHistory), history)
+        db.commit()
+    finally:
+        db.close()
+
+    tokens = {email: auth_service.create_access_token({"sub": email}) for email in emails}
+    doctor_tokens = [tokens[email] for email in emails[:doctors]]
+    patient_tokens = [tokens[email] for email in emails[doctors:]]
+    plan = []
+    for i in range(args.requests):
+        endpoint = ENDPOINTS[i % len(ENDPOINTS)]
+        token_pool = doctor_tokens if endpoint == "/doctors/appointments" else patient_tokens
+        plan.append({"endpoint": endpoint, "token": token_pool[(i // len(ENDPOINTS)) % len(token_pool)]})
+
+    sync_result = asyncio.run(drive(build_sync_app(), "", plan, args.concurrency))
+    async_result = asyncio.run(drive(app, settings.API_V1_STR, plan, args.concurrency))
+
+    mismatched = sum(1 for key, body in sync_result.pop("bodies").items() if async_result["bodies"].get(key) != body)
+    async_result.pop("bodies")
+    speedup = (
+        round(async_result["requests_per_second"] / sync_result["requests_per_second"], 2)
+        if sync_result["requests_per_second"] and async_result["requests_per_second"] else None
+    )
+    report = {
+        "database": settings.DATABASE_URL.split(":", 1)[0],
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "sync": sync_result,
+        "async": async_result,
+        "throughput_speedup": speedup,
+        "mismatched_bodies": mismatched,
+    }
+    print(json.dumps(report, indent=2))
+
+    failures = []
+    if sync_result["errors"] or async_result["errors"]:
+        failures.append(f"{sync_result['errors']} sync and {async_result['errors']} async requests failed")
+    if mismatched:
+        failures.append(f"{mismatched} responses differ between the sync and async paths")
+    if args.min_speedup is not None and (speedup or 0) < args.min_speedup:
+        failures.append(f"async throughput is {speedup}x sync, below {args.min_speedup}x")
+    for failure in failures:
+        print(f"FAILED: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+"""
+Availability engine benchmark.
+
+Generates schedule templates (weekday hours, lunch breaks, Saturday clinics, 20/30/45-minute slots,
+days off) and bookings for hundreds of doctors, then computes every doctor's free slots over a
+months-long range with the interval engine. The same answer is computed with a naive per-slot walk
+that checks each slot against every booking of its day, as a baseline and a correctness check:
+
+    python -m benchmarks.availability_engine --doctors 300 --days 90
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from datetime import date, datetime, time as clock, timedelta
+from typing import Dict, List
+
+from app.services.availability_engine import Interval, ScheduleTemplate, compute_availability
+
+
+def random_template(rng: random.Random, start_date: date, days: int) -> ScheduleTemplate:
+    slot_minutes = rng.choice([20, 30, 30, 45])
+    opens = clock(rng.choice([7, 8, 9]), rng.choice([0, 30]))
+    closes = clock(rng.choice([16, 17, 18]), 0)
+    working_hours = {weekday: [(opens, closes)] for weekday in range(5)}
+    if rng.random() < 0.3:
+        working_hours[5] = [(clock(9), clock(13))]
+    breaks = {weekday: [(clock(12, 30), clock(13, 15))] for weekday in range(5)}
+    unavailable = {
+        start_date + timedelta(days=rng.randrange(days)): [(clock.min, clock.max)]
+        for _ in range(rng.randint(0, 6))
+    }
+    return ScheduleTemplate(slot_minutes=slot_minutes, working_hours=working_hours, breaks=breaks, unavailable=unavailable)
+
+
+def random_bookings(rng: random.Random, template: ScheduleTemplate, start_date: date, days: int, fill: float) -> List[Interval]:
+    bookings = []
+    for offset in range(days):
+        day = start_date + timedelta(days=offset)
+        for block_start, block_end in template.working_intervals(day):
+            slot = block_start
+            while slot + timedelta(minutes=template.slot_minutes) <= block_end:
+                if rng.random() < fill:
+                    # Some appointments run longer or start off the slot grid
+                    length = rng.choice([template.slot_minutes, template.slot_minutes, 15, 50])
+                    start = slot + timedelta(minutes=rng.choice([0, 0, 0, 10]))
+                    bookings.append((start, start + timedelta(minutes=length)))
+                slot += timedelta(minutes=template.slot_minutes)
+    return bookings
+
+
+def naive_availability(templates: Dict[int, ScheduleTemplate], booked: Dict[int, List[Interval]], start_date: date, days: int):
+    """Walks every slot and checks it against every booking of its day."""
+    availability = {}
+    for doctor_id, template in templates.items():
+        by_day: Dict[date, List[Interval]] = {}
+        for start, end in booked.get(doctor_id, []):
+            by_day.setdefault(start.date(), []).append((start, end))
+        step = timedelta(minutes=template.slot_minutes)
+        doctor_availability = {}
+        for offset in range(days):
+            day = start_date + timedelta(days=offset)
+            starts = []
+            for block_start, block_end in template.working_intervals(day):
+                slot = block_start
+                while slot + step <= block_end:
+                    if all(end <= slot or start >= slot + step for start, end in by_day.get(day, [])):
+                        starts.append(slot)
+                    slot += step
+            if starts:
+                doctor_availability[day] = starts
+        availability[doctor_id] = doctor_availability
+    return availability
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the interval availability engine.")
+    parser.add_argument("--doctors", type=int, default=300)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--fill", type=float, default=0.6, help="Share of template slots that get a booking")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--skip-naive", action="store_true", help="Skip the naive baseline")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    start_date = datetime.now().date()
+    end_date = start_date + timedelta(days=args.days - 1)
+    templates = {doctor_id: random_template(rng, start_date, args.days) for doctor_id in range(1, args.doctors + 1)}
+    booked = {doctor_id: random_bookings(rng, template, start_date, args.days, args.fill) for doctor_id, template in templates.items()}
+
+    started = time.perf_counter()
+    availability = compute_availability(templates, booked, start_date, end_date)
+    engine_seconds = time.perf_counter() - started
+
+    report = {
+        "doctors": args.doctors,
+        "days": args.days,
+        "bookings": sum(len(intervals) for intervals in booked.values()),
+        "free_slots": sum(len(starts) for days in availability.values() for starts in days.values()),
+        "engine_ms": round(engine_seconds * 1000, 1),
+    }
+
+    if not args.skip_naive:
+        started = time.perf_counter()
+        baseline = naive_availability(templates, booked, start_date, args.days)
+        report["naive_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        report["speedup"] = round(report["naive_ms"] / report["engine_ms"], 2) if report["engine_ms"] else None
+        report["matches_naive"] = baseline == availability
+
+    print(json.dumps(report, indent=2))
+    return 0 if report.get("matches_naive", True) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+"""
+Booking contention benchmark.
+
+Many patients race to book the same few popular doctor slots at once. Every attempt is a single
+insert that the database accepts or rejects as an overlap, so exactly one booking per slot must
+succeed and the rest must come back as structured conflicts. Reports attempts per second and
+fails if any slot ends up double-booked:
+
+    python -m benchmarks.booking_contention --patients 200 --slots 4 --workers 16
+
+Uses a fresh SQLite database unless DATABASE_URL is already set (e.g. to a PostgreSQL test database).
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+BENCH_PASSWORD = "bench-password"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Race many patients for the same doctor slots.")
+    parser.add_argument("--patients", type=int, default=100)
+    parser.add_argument("--slots", type=int, default=4, help="How many popular slots the patients compete for")
+    parser.add_argument("--workers", type=int, default=16)
+    args = parser.parse_args()
+
+    if "DATABASE_URL" not in os.environ:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='booking-contention-'), 'bench.db')}"
+    os.environ.setdefault("SECRET_KEY", "booking-contention-secret")
+
+    from sqlalchemy import func
+
+    from app.crud import crud_appointment, crud_user
+    from app.db.initial_data import init_db
+    from app.db.session import SessionLocal
+    from app.models.appointment import Appointment
+    from app.models.user import UserRole
+    from app.schemas.appointment import AppointmentCreate
+    from app.schemas.user import UserCreate
+
+    init_db()
+    db = SessionLocal()
+    try:
+        doctor = crud_user.create_user(db, UserCreate(email="popular.doctor@example.com", full_name="Dr. Popular", password=BENCH_PASSWORD, role=UserRole.DOCTOR))
+        patient_ids = [
+            crud_user.create_user(db, UserCreate(email=f"patient{i}@example.com", full_name=f"Patient {i}", password=BENCH_PASSWORD, role=UserRole.PATIENT)).id
+            for i in range(args.patients)
+        ]
+        doctor_id = doctor.id
+    finally:
+        db.close()
+
+    first_slot = datetime.combine(datetime.now().date() + timedelta(days=1), datetime.min.time().replace(hour=9))
+    slots = [first_slot + timedelta(minutes=30 * i) for i in range(args.slots)]
+
+    def attempt(index: int) -> str:
+        start_time = slots[index % len(slots)]
+        session = SessionLocal()
+        try:
+            crud_appointment.create_appointment(session, AppointmentCreate(
+                patient_id=patient_ids[index], doctor_id=doctor_id,
+                start_time=start_time, end_time=start_time + timedelta(minutes=30)
+            ))
+            return "booked"
+        except crud_appointment.AppointmentConflictError as conflict:
+            return f"conflict_{conflict.conflict_with}"
+        except Exception:
+            session.rollback()
+            return "error"
+        finally:
+            session.close()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        outcomes = Counter(executor.map(attempt, range(args.patients)))
+    elapsed = time.perf_counter() - started
+
+    db = SessionLocal()
+    try:
+        double_booked = db.query(Appointment.start_time).filter(Appointment.doctor_id == doctor_id).group_by(
+            Appointment.start_time
+        ).having(func.count(Appointment.id) > 1).count()
+    finally:
+        db.close()
+
+    report = {
+        "attempts": args.patients,
+        "seconds": round(elapsed, 3),
+        "attempts_per_second": round(args.patients / elapsed, 1) if elapsed else None,
+        "outcomes": dict(outcomes),
+        "double_booked_slots": double_booked,
+    }
+    print(json.dumps(report, indent=2))
+
+    failures = []
+    if double_booked:
+        failures.append(f"{double_booked} slots were double-booked")
+    if outcomes["booked"] != min(args.slots, args.patients):
+        failures.append(f"{outcomes['booked']} bookings succeeded for {args.slots} slots")
+    for failure in failures:
+        print(f"FAILED: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
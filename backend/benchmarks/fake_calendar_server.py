@@ -0,0 +1,197 @@
+"""
+Local stand-in for the Google Calendar v3 API, for exercising event inserts/updates without Google.
+
+It serves single event inserts (POST /calendar/v3/calendars/{calendarId}/events), updates
+(PUT .../events/{eventId}) and multipart/mixed batch requests (POST /batch/calendar/v3), and
+counts the HTTP calls and event operations it handled. Point the backend at it with
+GOOGLE_CALENDAR_API_ENDPOINT, or pass a service built from load_discovery_document() directly.
+
+Compare one request per event with batched requests:
+    python -m benchmarks.fake_calendar_server --events 120
+"""
+import argparse
+import json
+import re
+import threading
+import time
+import uuid
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+
+EVENTS_PATH = re.compile(r"^/calendar/v3/calendars/(?P<calendar>[^/]+)/events(?:/(?P<event_id>[^/?]+))?")
+
+
+class FakeCalendar:
+    """In-memory calendar that records every event it is sent."""
+
+    def __init__(self, latency_ms: float = 0.0, fail_summaries: Optional[set] = None):
+        self.latency_ms = latency_ms
+        self.fail_summaries = fail_summaries or set()
+        self._lock = threading.Lock()
+        self.events: Dict[str, dict] = {}
+        self.http_requests = 0
+        self.batch_requests = 0
+        self.operations = 0
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "http_requests": self.http_requests,
+                "batch_requests": self.batch_requests,
+                "operations": self.operations,
+                "events": len(self.events),
+            }
+
+    def count_http_request(self, batch: bool = False):
+        with self._lock:
+            self.http_requests += 1
+            if batch:
+                self.batch_requests += 1
+
+    def handle(self, method: str, path: str, body: bytes) -> Tuple[int, dict]:
+        """Carries out one insert or update and returns (status, response body)."""
+        match = EVENTS_PATH.match(path)
+        if not match or method not in ("POST", "PUT"):
+            return 404, {"error": {"code": 404, "message": f"{method} {path} is not supported"}}
+
+        event = json.loads(body or b"{}")
+        if event.get("summary") in self.fail_summaries:
+            return 400, {"error": {"code": 400, "message": "Rejected by the fake calendar"}}
+
+        with self._lock:
+            self.operations += 1
+            if method == "PUT":
+                event_id = match.group("event_id")
+                if event_id not in self.events:
+                    return 404, {"error": {"code": 404, "message": "Not Found"}}
+            else:
+                event_id = uuid.uuid4().hex
+            event.update({"id": event_id, "htmlLink": f"https://calendar.example/event?eid={event_id}", "status": "confirmed"})
+            self.events[event_id] = event
+        return 200, event
+
+
+def parse_batch(content_type: str, body: bytes):
+    """Splits a multipart/mixed batch body into (Content-ID, method, path, body) parts."""
+    message = BytesParser(policy=HTTP).parsebytes(f"Content-Type: {content_type}\r\n\r\n".encode() + body)
+    for part in message.iter_parts():
+        raw_request = part.get_payload(decode=True) or part.get_payload().encode()
+        head, _, request_body = raw_request.replace(b"\r\n", b"\n").partition(b"\n\n")
+        method, url = head.split(b"\n", 1)[0].decode().split(" ")[:2]
+        path = re.sub(r"^https?://[^/]+", "", url)
+        yield part.get("Content-ID", "").strip("<>"), method, path, request_body
+
+
+def render_batch(responses) -> Tuple[str, bytes]:
+    """Builds a multipart/mixed batch response from (Content-ID, status, body) tuples."""
+    boundary = f"batch_{uuid.uuid4().hex}"
+    parts = []
+    for content_id, status, response_body in responses:
+        payload = json.dumps(response_body)
+        parts.append(
+            f"--{boundary}\r\n"
+            "Content-Type: application/http\r\n"
+            f"Content-ID: <response-{content_id}>\r\n\r\n"
+            f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+            "Content-Type: application/json; charset=UTF-8\r\n"
+            f"Content-Length: {len(payload)}\r\n\r\n"
+            f"{payload}\r\n"
+        )
+    parts.append(f"--{boundary}--\r\n")
+    return f"multipart/mixed; boundary={boundary}", "".join(parts).encode()
+
+
+class FakeCalendarRequestHandler(BaseHTTPRequestHandler):
+    calendar: FakeCalendar = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _respond(self, status: int, content_type: str, payload: bytes):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _handle(self, method: str):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        time.sleep(self.calendar.latency_ms / 1000)
+
+        if self.path.startswith("/batch"):
+            self.calendar.count_http_request(batch=True)
+            responses = [
+                (content_id, *self.calendar.handle(part_method, part_path, part_body))
+                for content_id, part_method, part_path, part_body in parse_batch(self.headers["Content-Type"], body)
+            ]
+            content_type, payload = render_batch(responses)
+            self._respond(200, content_type, payload)
+            return
+
+        self.calendar.count_http_request()
+        status, response_body = self.calendar.handle(method, self.path, body)
+        self._respond(status, "application/json; charset=UTF-8", json.dumps(response_body).encode())
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_PUT(self):
+        self._handle("PUT")
+
+
+def start_fake_calendar_server(calendar: FakeCalendar, port: int = 0) -> ThreadingHTTPServer:
+    """Starts the fake calendar in a background thread and returns the server (server.server_port has the port)."""
+    handler = type("BoundFakeCalendarRequestHandler", (FakeCalendarRequestHandler,), {"calendar": calendar})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-event and batched calendar inserts against a fake Calendar API.")
+    parser.add_argument("--events", type=int, default=100)
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Latency the fake adds to every HTTP request")
+    args = parser.parse_args()
+
+    import datetime
+    import httplib2
+    from googleapiclient.discovery import build_from_document
+
+    from app.services.google_calendar_service import build_event_body, create_calendar_events_batch, load_discovery_document
+
+    calendar = FakeCalendar(latency_ms=args.latency_ms)
+    server = start_fake_calendar_server(calendar)
+    endpoint = f"http://127.0.0.1:{server.server_port}"
+    service = build_from_document(load_discovery_document(endpoint), http=httplib2.Http())
+
+    start = datetime.datetime(2030, 1, 7, 9, 0)
+    bodies = {
+        appointment_id: build_event_body(
+            f"Appointment {appointment_id}", start + datetime.timedelta(minutes=30 * appointment_id),
+            start + datetime.timedelta(minutes=30 * (appointment_id + 1)), ["patient@example.com", "doctor@example.com"]
+        )
+        for appointment_id in range(args.events)
+    }
+
+    report = {}
+    before, started = calendar.snapshot(), time.perf_counter()
+    for body in bodies.values():
+        service.events().insert(calendarId="primary", body=body).execute(http=httplib2.Http())
+    report["per_event"] = {"seconds": round(time.perf_counter() - started, 3), "http_requests": calendar.snapshot()["http_requests"] - before["http_requests"]}
+
+    before, started = calendar.snapshot(), time.perf_counter()
+    results = create_calendar_events_batch(bodies, service=service, http=httplib2.Http())
+    report["batched"] = {
+        "seconds": round(time.perf_counter() - started, 3),
+        "http_requests": calendar.snapshot()["http_requests"] - before["http_requests"],
+        "created": sum(1 for result in results.values() if result["success"]),
+    }
+
+    server.shutdown()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
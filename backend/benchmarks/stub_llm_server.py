@@ -0,0 +1,174 @@
+"""
+Local stand-in for the Groq chat-completions API that replays recorded transcripts.
+
+A transcript maps a user prompt to the list of assistant responses the model gave for it, in order:
+each response is either {"tool_calls": [{"name": ..., "arguments": {...}}]} or {"content": "..."},
+optionally with its own "latency_ms". For every request the stub finds the last user message and
+counts the assistant messages after it to pick the next recorded response, so it needs no state
+of its own and any number of conversations can replay at once.
+
+Run it on its own and point the backend at it with GROQ_BASE_URL:
+    python -m benchmarks.stub_llm_server --scenarios benchmarks/scenarios/agent_scenarios.json --port 8099
+"""
+import argparse
+import json
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+FALLBACK_RESPONSE = {"content": "I'm sorry, I don't have a recorded answer for that."}
+
+
+def fill_placeholders(value: Any, replacements: Dict[str, str]) -> Any:
+    """Replaces {today}/{tomorrow}-style placeholders in every string of a recorded transcript."""
+    if isinstance(value, str):
+        for placeholder, replacement in replacements.items():
+            value = value.replace("{" + placeholder + "}", replacement)
+        return value
+    if isinstance(value, list):
+        return [fill_placeholders(item, replacements) for item in value]
+    if isinstance(value, dict):
+        return {key: fill_placeholders(item, replacements) for key, item in value.items()}
+    return value
+
+
+def date_placeholders(today: Optional[datetime] = None) -> Dict[str, str]:
+    """Returns the date placeholders available to transcripts."""
+    today = (today or datetime.now()).date()
+    return {
+        "today": today.strftime("%Y-%m-%d"),
+        "tomorrow": (today + timedelta(days=1)).strftime("%Y-%m-%d"),
+        "day_after_tomorrow": (today + timedelta(days=2)).strftime("%Y-%m-%d"),
+    }
+
+
+def load_transcripts(path: str) -> Dict[str, List[Dict[str, Any]]]:
+    """Reads a scenario file and returns {prompt: [recorded responses]} for every scripted turn."""
+    with open(path) as scenario_file:
+        scenario_set = fill_placeholders(json.load(scenario_file), date_placeholders())
+    transcripts = {}
+    for scenario in scenario_set["scenarios"]:
+        for turn in scenario["turns"]:
+            transcripts[turn["prompt"]] = turn.get("llm", [])
+    return transcripts
+
+
+class StubLLM:
+    """Replays recorded responses and counts what it served."""
+
+    def __init__(self, transcripts: Dict[str, List[Dict[str, Any]]], latency_ms: float = 0.0):
+        self.transcripts = transcripts
+        self.latency_ms = latency_ms
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.tool_calls = 0
+        self.unmatched = 0
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return {"requests": self.requests, "tool_calls": self.tool_calls, "unmatched": self.unmatched}
+
+    def next_response(self, messages: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Picks the recorded response for the current round of the last user prompt."""
+        last_user = max((i for i, message in enumerate(messages) if message.get("role") == "user"), default=None)
+        recorded = self.transcripts.get(messages[last_user].get("content")) if last_user is not None else None
+        round_index = sum(1 for message in messages[(last_user or 0) + 1:] if message.get("role") == "assistant")
+
+        with self._lock:
+            self.requests += 1
+            if not recorded or round_index >= len(recorded):
+                self.unmatched += 1
+                return FALLBACK_RESPONSE
+            response = recorded[round_index]
+            self.tool_calls += len(response.get("tool_calls", []))
+            return response
+
+    def completion_message(self, response: Dict[str, Any]) -> Dict[str, Any]:
+        message = {"role": "assistant", "content": response.get("content")}
+        if response.get("tool_calls"):
+            message["tool_calls"] = [
+                {
+                    "id": f"call_{uuid.uuid4().hex[:12]}",
+                    "type": "function",
+                    "function": {"name": tool_call["name"], "arguments": json.dumps(tool_call.get("arguments", {}))},
+                }
+                for tool_call in response["tool_calls"]
+            ]
+        return message
+
+
+class StubRequestHandler(BaseHTTPRequestHandler):
+    stub: StubLLM = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        if not self.path.endswith("/chat/completions"):
+            self.send_error(404)
+            return
+
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        response = self.stub.next_response(body.get("messages", []))
+        time.sleep(response.get("latency_ms", self.stub.latency_ms) / 1000)
+
+        message = self.stub.completion_message(response)
+        finish_reason = "tool_calls" if message.get("tool_calls") else "stop"
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        created = int(time.time())
+        model = body.get("model", "stub")
+
+        if body.get("stream"):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.end_headers()
+            deltas = []
+            if message.get("tool_calls"):
+                deltas.append({"role": "assistant", "tool_calls": [dict(tool_call, index=i) for i, tool_call in enumerate(message["tool_calls"])]})
+            for word in (message.get("content") or "").split(" "):
+                deltas.append({"content": word + " "})
+            for i, delta in enumerate(deltas + [{}]):
+                chunk = {
+                    "id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                    "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason if i == len(deltas) else None}],
+                }
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            self.wfile.write(b"data: [DONE]\n\n")
+            return
+
+        payload = json.dumps({
+            "id": completion_id, "object": "chat.completion", "created": created, "model": model,
+            "choices": [{"index": 0, "message": message, "finish_reason": finish_reason}],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+def start_stub_server(stub: StubLLM, port: int = 0) -> ThreadingHTTPServer:
+    """Starts the stub in a background thread and returns the server (server.server_port has the port)."""
+    handler = type("BoundStubRequestHandler", (StubRequestHandler,), {"stub": stub})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay recorded Groq chat completions locally.")
+    parser.add_argument("--scenarios", default="benchmarks/scenarios/agent_scenarios.json")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Latency added to every response without its own latency_ms")
+    args = parser.parse_args()
+
+    server = start_stub_server(StubLLM(load_transcripts(args.scenarios), args.latency_ms), args.port)
+    print(f"Stub LLM listening on http://127.0.0.1:{server.server_port} (set GROQ_BASE_URL to this URL)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
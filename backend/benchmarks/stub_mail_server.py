@@ -0,0 +1,120 @@
+"""
+Local stand-in for the Mailgun messages API, for sending confirmation emails without Mailgun.
+
+It accepts POST /{domain}/messages form posts, including batch sends with recipient-variables,
+and counts the HTTP requests and recipients it received. Point the backend at it with
+MAILGUN_API_BASE_URL, or hand a MailgunTransport built against it to set_email_transport().
+
+Compare one request per email with batched sends:
+    python -m benchmarks.stub_mail_server --emails 200 --latency-ms 20
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+from urllib.parse import parse_qs
+
+
+class StubMailgun:
+    """Records every message it is sent."""
+
+    def __init__(self, latency_ms: float = 0.0, fail_status: int = 0):
+        self.latency_ms = latency_ms
+        self.fail_status = fail_status
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.recipients = 0
+        self.messages: List[Dict[str, object]] = []
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return {"requests": self.requests, "recipients": self.recipients}
+
+    def record(self, form: Dict[str, List[str]]):
+        recipient_variables = json.loads(form.get("recipient-variables", ["{}"])[0])
+        with self._lock:
+            self.requests += 1
+            self.recipients += len(form.get("to", []))
+            for recipient in form.get("to", []):
+                self.messages.append({"to": recipient, "subject": form.get("subject", [""])[0], "variables": recipient_variables.get(recipient, {})})
+
+
+class StubMailgunRequestHandler(BaseHTTPRequestHandler):
+    mailgun: StubMailgun = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        if not self.path.endswith("/messages"):
+            self.send_error(404)
+            return
+        form = parse_qs(self.rfile.read(int(self.headers.get("Content-Length", 0))).decode())
+        time.sleep(self.mailgun.latency_ms / 1000)
+        if self.mailgun.fail_status:
+            self.send_error(self.mailgun.fail_status)
+            return
+
+        self.mailgun.record(form)
+        payload = json.dumps({"id": f"<stub-{time.time_ns()}@stub>", "message": "Queued. Thank you."}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+def start_stub_mail_server(mailgun: StubMailgun, port: int = 0) -> ThreadingHTTPServer:
+    """Starts the stub in a background thread and returns the server (server.server_port has the port)."""
+    handler = type("BoundStubMailgunRequestHandler", (StubMailgunRequestHandler,), {"mailgun": mailgun})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-email and batched confirmation sends against a stub Mailgun.")
+    parser.add_argument("--emails", type=int, default=100)
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Latency the stub adds to every request")
+    args = parser.parse_args()
+
+    from app.services.email_service import EmailDispatcher, MailgunTransport
+
+    mailgun = StubMailgun(latency_ms=args.latency_ms)
+    server = start_stub_mail_server(mailgun)
+    dispatcher = EmailDispatcher(
+        MailgunTransport("stub-key", "stub.example", base_url=f"http://127.0.0.1:{server.server_port}"),
+        "Appointment Bot <bot@stub.example>"
+    )
+    messages = {
+        appointment_id: {
+            "to": f"patient{appointment_id}@example.com",
+            "patient_name": f"Patient {appointment_id}",
+            "doctor_name": "Dr. Stub",
+            "appointment_time": "Monday, January 07, 2030 at 09:00 AM",
+        }
+        for appointment_id in range(args.emails)
+    }
+
+    report = {}
+    before, started = mailgun.snapshot(), time.perf_counter()
+    for appointment_id, message in messages.items():
+        dispatcher.send_confirmations({appointment_id: message})
+    report["per_email"] = {"seconds": round(time.perf_counter() - started, 3), "requests": mailgun.snapshot()["requests"] - before["requests"]}
+
+    before, started = mailgun.snapshot(), time.perf_counter()
+    results = dispatcher.send_confirmations(messages)
+    report["batched"] = {
+        "seconds": round(time.perf_counter() - started, 3),
+        "requests": mailgun.snapshot()["requests"] - before["requests"],
+        "sent": sum(1 for result in results.values() if result["success"]),
+    }
+
+    server.shutdown()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()